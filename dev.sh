@@ -178,6 +178,10 @@ run_integration() {
     for dir in tests/integration/*/; do (cd "$dir" && ./runme.sh opera); done
 }
 
+run_benchmark() {
+    for dir in tests/benchmark/*/; do (cd "$dir" && ./runme.sh opera); done
+}
+
 run_help() {
     cat <<EOF
 usage:
@@ -187,6 +191,7 @@ commands:
     sanity              runs sanity tests
     unit                runs unit tests
     integration         runs integration tests
+    benchmark           runs performance benchmarks
     coverage            calculates code coverage
     help                shows this help
 EOF
@@ -216,6 +221,9 @@ case "$command" in
     integration)
         run_integration
         ;;
+    benchmark)
+        run_benchmark
+        ;;
     help)
         run_help
         ;;
@@ -1,11 +1,10 @@
 import argparse
-import inspect
+import importlib
 import sys
 
-import pkg_resources
 import shtab
 
-from opera import commands
+from opera.commands import COMMANDS
 
 
 class ArgParser(argparse.ArgumentParser):
@@ -24,25 +23,68 @@ class ArgParser(argparse.ArgumentParser):
         return subparsers
 
 
+class LazySubParsersAction(argparse._SubParsersAction):  # pylint: disable=protected-access
+    """Subparsers that import the module of a command only when the command is chosen."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lazy_modules = {}
+
+    def add_lazy_parser(self, name, module, **kwargs):
+        self._lazy_modules[name] = module
+        return self.add_parser(name, **kwargs)
+
+    def load(self, name):
+        module = self._lazy_modules.pop(name, None)
+        if module is None:
+            return
+        # the placeholder parser is replaced with the one that the command module adds
+        del self._name_parser_map[name]
+        self._choices_actions = [a for a in self._choices_actions if a.dest != name]
+        importlib.import_module(module).add_parser(self)
+
+    def load_all(self):
+        for name in list(self._lazy_modules):
+            self.load(name)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        self.load(values[0])
+        super().__call__(parser, namespace, values, option_string)
+
+
+class ShellCompletionAction(shtab.completion_action()):  # type: ignore
+    def __call__(self, parser, namespace, values, option_string=None):
+        # completion scripts cover the arguments of all commands
+        for action in parser._actions:  # pylint: disable=protected-access
+            if isinstance(action, LazySubParsersAction):
+                action.load_all()
+        super().__call__(parser, namespace, values, option_string)
+
+
 class PrintCurrentVersionAction(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
+        # importlib.metadata is only needed here and takes a while to import
+        from importlib.metadata import PackageNotFoundError, version  # pylint: disable=import-outside-toplevel
+
         try:
-            print(pkg_resources.get_distribution("opera").version)
+            print(version("opera"))
             parser.exit(0)
-        except pkg_resources.DistributionNotFound as e:
+        except PackageNotFoundError as e:
             print(f"Error when retrieving current opera version: {e}")
             parser.exit(1)
 
 
-def create_parser():
+def create_parser(lazy=True):
     parser = ArgParser(
         description="opera orchestrator",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
+    parser.register("action", "parsers", LazySubParsersAction)
     subparsers = parser.add_subparsers()
-    cmds = inspect.getmembers(commands, inspect.ismodule)
-    for _, module in sorted(cmds, key=lambda x: x[0]):
-        module.add_parser(subparsers)
+    for name, help_text in sorted(COMMANDS.items()):
+        subparsers.add_lazy_parser(name, f"opera.commands.{name}", help=help_text)
+    if not lazy:
+        subparsers.load_all()
     return parser
 
 
@@ -50,8 +92,8 @@ def main():
     parser = create_parser()
     # use shtab magic
     # add global optional argument for generating shell completion script
-    shtab.add_argument_to(
-        parser, ["-s", "--shell-completion"],
+    parser.add_argument(
+        "-s", "--shell-completion", choices=shtab.SUPPORTED_SHELLS, action=ShellCompletionAction,
         help="Generate tab completion script for your shell"
     )
     parser.add_argument(
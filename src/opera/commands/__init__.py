@@ -1,12 +1,15 @@
-from opera.commands import (  # noqa: F401
-    deploy,
-    diff,
-    info,
-    notify,
-    outputs,
-    package,
-    undeploy,
-    unpackage,
-    update,
-    validate
-)
+# Command modules import the TOSCA parser, the instance model and the executors, so the CLI only imports the module
+# of the chosen command. This maps command names to the help texts that their parsers are listed with.
+COMMANDS = {
+    "deploy": "Deploy TOSCA service template or CSAR",
+    "diff": "Compare TOSCA service template to the one from the opera project storage and print out their differences",
+    "info": "Show information about the current project",
+    "notify": "Notify the orchestrator about changes after deployment and run triggers defined in TOSCA policies",
+    "outputs": "Retrieve deployment outputs (from TOSCA service template)",
+    "package": "Package service template and all accompanying files into a CSAR (zip file)",
+    "plan": "Estimate how long the deployment takes from the durations of earlier runs",
+    "undeploy": "Undeploy TOSCA service template or CSAR",
+    "unpackage": "Unpackage TOSCA CSAR (zip file) to a specified location",
+    "update": "Update the deployed TOSCA service template and redeploy it according to the discovered template diff",
+    "validate": "Validate TOSCA service template or CSAR",
+}
@@ -6,13 +6,17 @@ from zipfile import ZipFile, is_zipfile
 
 import shtab
 import yaml
-from opera_tosca_parser.commands.parse import parse_csar, parse_service_template
+from opera_tosca_parser.commands.parse import parse_csar
 from opera_tosca_parser.parser import tosca
 
-from opera.commands.info import info
+from opera.commands.info import get_status
 from opera.error import DataError, ParseError
+from opera.executors.ansible.session import Session
 from opera.instance.topology import Topology
 from opera.storage import Storage
+from opera.threading.limits import ConcurrencyLimits
+from opera.template_cache import parse_service_template
+from opera.tracing import Tracer
 from opera.utils import prompt_yes_no_question
 
 
@@ -33,6 +37,29 @@ def add_parser(subparsers):
         "--workers", "-w", type=int, default=1,
         help="Maximum number of concurrent deployment threads (positive number, default 1)"
     )
+    parser.add_argument(
+        "--ansible-mode", choices=Session.MODES,
+        help="Start a new ansible-playbook process for every operation (subprocess) or reuse long-lived workers "
+             "with an initialised Ansible runtime (persistent), defaults to $OPERA_ANSIBLE_MODE or subprocess"
+    )
+    parser.add_argument(
+        "--batch-operations", "-b", action="store_true",
+        help="Run consecutive operations that target the same host with a single ansible-playbook invocation",
+    )
+    parser.add_argument(
+        "--trace-file", "-t",
+        help="Write timing spans of nodes, operations and Ansible runs to this file in the Chrome trace format "
+             "(open it with Perfetto or chrome://tracing)"
+    ).complete = shtab.FILE
+    parser.add_argument(
+        "--host-limit", type=int,
+        help="Maximum number of nodes that run their operations on the same host at the same time"
+    )
+    parser.add_argument(
+        "--limits", "-l",
+        help="YAML file with concurrency limits for all hosts (per_host), for single hosts (hosts: {address: limit}) "
+             "and for nodes of a type (types: {type: limit})"
+    ).complete = shtab.FILE
 
     group = parser.add_mutually_exclusive_group()
     group.add_argument(
@@ -68,7 +95,7 @@ def _parser_callback(args):  # pylint: disable=too-many-statements
         return 1
 
     storage = Storage.create(args.instance_path)
-    status = info(None, storage)["status"]
+    status = get_status(storage)
     delete_existing_state = False
 
     if storage.exists("instances"):
@@ -121,21 +148,26 @@ def _parser_callback(args):  # pylint: disable=too-many-statements
         print(f"Invalid inputs: {e}")
         return 1
 
+    tracer = Tracer(args.trace_file)
     try:
+        limits = ConcurrencyLimits.load(args.limits, args.host_limit)
+        session = Session(args.ansible_mode, args.batch_operations, tracer, limits)
         if is_zipfile(csar_or_st_path):
             deploy_compressed_csar(csar_or_st_path, inputs, storage,
                                    args.verbose, args.workers,
-                                   delete_existing_state)
+                                   delete_existing_state, session)
         else:
             deploy_service_template(csar_or_st_path, inputs, storage,
                                     args.verbose, args.workers,
-                                    delete_existing_state)
+                                    delete_existing_state, session)
     except ParseError as e:
         print(f"{e.loc}: {e}")
         return 1
     except DataError as e:
         print(str(e))
         return 1
+    finally:
+        tracer.save()
 
     return 0
 
@@ -146,7 +178,8 @@ def deploy_service_template(
         storage: Storage,
         verbose_mode: bool,
         num_workers: int,
-        delete_existing_state: bool
+        delete_existing_state: bool,
+        session: typing.Optional[Session] = None
 ):
     if delete_existing_state:
         storage.remove("instances")
@@ -160,8 +193,10 @@ def deploy_service_template(
     storage.write(str(service_template_path), "root_file")
 
     # initialize service template and deploy
-    template, workdir = parse_service_template(service_template_path, inputs)
+    template, workdir = parse_service_template(service_template_path, inputs, storage)
     topology = Topology.instantiate(template, storage)
+    if session:
+        topology.set_session(session)
     topology.deploy(verbose_mode, workdir, num_workers)
 
 
@@ -171,7 +206,8 @@ def deploy_compressed_csar(
         storage: Storage,
         verbose_mode: bool,
         num_workers: int,
-        delete_existing_state: bool
+        delete_existing_state: bool,
+        session: typing.Optional[Session] = None
 ):
     if delete_existing_state:
         storage.remove("instances")
@@ -194,4 +230,6 @@ def deploy_compressed_csar(
     workdir = str(csar_dir)
     template, _ = parse_csar(csar_path, inputs)
     topology = Topology.instantiate(template, storage)
+    if session:
+        topology.set_session(session)
     topology.deploy(verbose_mode, workdir, num_workers)
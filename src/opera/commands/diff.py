@@ -6,12 +6,13 @@ from pathlib import Path, PurePath
 
 import shtab
 import yaml
-from opera_tosca_parser.commands.parse import parse_service_template
 
 from opera.compare.instance_comparer import InstanceComparer
 from opera.compare.template_comparer import TemplateComparer, TemplateContext
+from opera.digest import DigestCache
 from opera.error import DataError, ParseError
 from opera.storage import Storage
+from opera.template_cache import parse_service_template
 from opera.utils import format_outputs, save_outputs, get_template, get_workdir
 from opera.instance.topology import Topology
 
@@ -37,6 +38,14 @@ def add_parser(subparsers):
         "--template-only", "-t", action="store_true",
         help="Compare only templates without instances",
     )
+    parser.add_argument(
+        "--quick", "-q", action="store_true",
+        help="Stop comparing at the first difference, so the output only shows some of the differences",
+    )
+    parser.add_argument(
+        "--workers", "-w", type=int, default=1,
+        help="Maximum number of concurrent node comparison threads (positive number, default 1)"
+    )
     parser.add_argument(
         "--format", "-f", choices=("yaml", "json"), type=str,
         default="yaml", help="Output format",
@@ -56,8 +65,12 @@ def _parser_callback(args):
     if args.instance_path and not path.isdir(args.instance_path):
         raise argparse.ArgumentTypeError(f"Directory {args.instance_path} is not a valid path!")
 
+    if args.workers < 1:
+        print(f"{args.workers} is not a positive number!")
+        return 1
+
     storage_old = Storage.create(args.instance_path)
-    comparer = TemplateComparer()
+    comparer = TemplateComparer(DigestCache(Path(storage_old.path) / "cache" / "digests"), args.quick, args.workers)
 
     if args.template:
         service_template_new_path = Path(args.template.name)
@@ -98,10 +111,11 @@ def _parser_callback(args):
                 workdir_new,
                 inputs_new,
                 comparer,
-                args.verbose
+                args.verbose,
+                storage_old
             )
         else:
-            instance_comparer = InstanceComparer()
+            instance_comparer = InstanceComparer(args.quick)
             with tempfile.TemporaryDirectory() as temp_path:
                 storage_new = Storage.create(temp_path)
                 storage_new.write_json(inputs_new, "inputs")
@@ -136,7 +150,8 @@ def diff_templates(
         workdir_new: Path,
         inputs_new: typing.Optional[dict],
         template_comparer: TemplateComparer,
-        verbose_mode: bool
+        verbose_mode: bool,
+        storage: typing.Optional[Storage] = None
 ):
     if inputs_new is None:
         inputs_new = {}
@@ -144,8 +159,8 @@ def diff_templates(
     if inputs_old is None:
         inputs_old = {}
 
-    template_old, _ = parse_service_template(service_template_old, inputs_old)
-    template_new, _ = parse_service_template(service_template_new, inputs_new)
+    template_old, _ = parse_service_template(service_template_old, inputs_old, storage)
+    template_new, _ = parse_service_template(service_template_new, inputs_new, storage)
     Topology.instantiate(template_old)
     Topology.instantiate(template_new)
 
@@ -166,11 +181,19 @@ def diff_instances(
 ):
     template_old = get_template(storage_old, workdir_old)
     template_new = get_template(storage_new, workdir_new)
-    topology_old = Topology.instantiate(template_old, storage_old)
+    # instance states are only read when the instance comparison needs them
+    topology_old = Topology.instantiate(template_old)
     topology_new = Topology.instantiate(template_new, storage_new)
 
     context = TemplateContext(template_old, template_new, workdir_old, workdir_new)
     _, diff = template_comparer.compare_service_template(template_old, template_new, context)
+    if instance_comparer.quick and not diff.equal():
+        return diff
+
+    topology_old.set_storage(storage_old)
+    # every node is checked for being started, including the ones that the template diff did not touch, so the
+    # states of all of them are needed and one bulk read is cheaper than reading them one by one
+    topology_old.read_all()
     _, diff = instance_comparer.compare_topology_template(topology_old, topology_new, diff)
 
     return diff
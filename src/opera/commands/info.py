@@ -4,14 +4,9 @@ from pathlib import Path, PurePath
 from typing import Dict, Optional, Union
 
 import shtab
-import yaml
-from opera_tosca_parser.error import ParseError as ToscaParserParseError
-from opera_tosca_parser.parser import tosca
 
 from opera.error import DataError, ParseError
-from opera.instance.topology import Topology
 from opera.storage import Storage
-from opera.utils import format_outputs, save_outputs
 
 
 def add_parser(subparsers):
@@ -46,6 +41,9 @@ def _parser_callback(args):
     if args.instance_path and not path.isdir(args.instance_path):
         raise argparse.ArgumentTypeError(f"Directory {args.instance_path} is not a valid path!")
 
+    # the output helpers import yaml and the template cache, which help does not need
+    from opera.utils import format_outputs, save_outputs  # pylint: disable=import-outside-toplevel
+
     storage = Storage.create(args.instance_path)
     try:
         if args.csar_or_rootdir is None:
@@ -81,6 +79,11 @@ def info(csar_or_rootdir: Optional[PurePath], storage: Storage) -> dict:  # pyli
     # stateless autodetect first if possible,
     # which can then be overwritten via state
     if csar_or_rootdir is not None:
+        # the parser takes a while to import, so it is only imported when there is a CSAR to inspect
+        # pylint: disable=import-outside-toplevel
+        from opera_tosca_parser.error import ParseError as ToscaParserParseError
+        from opera_tosca_parser.parser import tosca
+
         csar = tosca.load_csar(csar_or_rootdir, False)
         try:
             # this validates CSAR and the entrypoint's (if it exists) metadata
@@ -116,7 +119,7 @@ def info(csar_or_rootdir: Optional[PurePath], storage: Storage) -> dict:  # pyli
         info_dict["service_template"] = str(service_template_path)
 
         if storage.exists("inputs"):
-            inputs = yaml.safe_load(storage.read("inputs"))
+            inputs = storage.read_json("inputs")
         else:
             inputs = {}
         info_dict["inputs"] = inputs
@@ -124,7 +127,9 @@ def info(csar_or_rootdir: Optional[PurePath], storage: Storage) -> dict:  # pyli
         if storage.exists("csars/csar"):
             csar_dir = Path(storage.path) / "csars" / "csar"
             info_dict["content_root"] = str(csar_dir)
-            ast = tosca.load_service_template(Path(csar_dir), service_template_path.relative_to(csar_dir))
+            # pylint: disable=import-outside-toplevel
+            from opera_tosca_parser.error import ParseError as ToscaParserParseError
+            from opera_tosca_parser.parser import tosca
 
             try:
                 csar = tosca.load_csar(csar_dir)
@@ -146,16 +151,40 @@ def info(csar_or_rootdir: Optional[PurePath], storage: Storage) -> dict:  # pyli
 
             except ToscaParserParseError:
                 info_dict["csar_valid"] = False
-        else:
-            ast = tosca.load_service_template(Path(service_template_path.parent), PurePath(service_template_path.name))
-
-        if storage.exists("instances"):
-            template = ast.get_template(inputs)
-            # We need to instantiate the template in order
-            # to get access to the instance state.
-            topology = Topology.instantiate(template, storage)
-            info_dict["status"] = topology.status()
-        else:
-            info_dict["status"] = "initialized"
+
+        info_dict["status"] = stored_status(storage) or computed_status(storage, service_template_path, inputs)
 
     return info_dict
+
+
+def stored_status(storage: Storage) -> Optional[str]:
+    """Status from the summary that deployments maintain, or None if it can only be computed from the template."""
+    if not storage.exists("instances"):
+        return "initialized"
+    if storage.exists("status"):
+        return storage.read_json("status")["status"]
+    return None
+
+
+def computed_status(storage: Storage, service_template_path: PurePath, inputs: dict) -> str:
+    """Status of deployments from before the status summary existed, which needs the template and its instances."""
+    # the parser and the instance model take a while to import, so they are only imported for such deployments
+    from opera_tosca_parser.parser import tosca  # pylint: disable=import-outside-toplevel
+    from opera.instance.topology import Topology  # pylint: disable=import-outside-toplevel
+
+    if storage.exists("csars/csar"):
+        csar_dir = Path(storage.path) / "csars" / "csar"
+        ast = tosca.load_service_template(csar_dir, service_template_path.relative_to(csar_dir))
+    else:
+        ast = tosca.load_service_template(Path(service_template_path.parent), PurePath(service_template_path.name))
+    template = ast.get_template(inputs)
+    # We need to instantiate the template in order
+    # to get access to the instance state.
+    topology = Topology.instantiate(template, storage)
+    return topology.status()
+
+
+def get_status(storage: Storage) -> Optional[str]:
+    if storage.exists("root_file"):
+        return stored_status(storage) or info(None, storage)["status"]
+    return None
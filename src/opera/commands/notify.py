@@ -5,11 +5,11 @@ from pathlib import Path, PurePath
 
 import shtab
 import yaml
-from opera_tosca_parser.commands.parse import parse_service_template
 
-from opera.commands.info import info
+from opera.commands.info import get_status
 from opera.error import DataError, ParseError
 from opera.storage import Storage
+from opera.template_cache import parse_service_template
 from opera.utils import prompt_yes_no_question
 from opera.instance.topology import Topology
 
@@ -31,6 +31,10 @@ def add_parser(subparsers):
         "--notification", "-n", type=argparse.FileType("r"),
         help="Notification file (usually JSON) with changes that will be exposed to TOSCA interfaces",
     ).complete = shtab.FILE
+    parser.add_argument(
+        "--workers", "-w", type=int, default=1,
+        help="Maximum number of concurrent notification threads (positive number, default 1)"
+    )
     parser.add_argument(
         "--force", "-f", action="store_true",
         help="Skip any prompts and force execution",
@@ -46,8 +50,12 @@ def _parser_callback(args):
     if args.instance_path and not path.isdir(args.instance_path):
         raise argparse.ArgumentTypeError(f"Directory {args.instance_path} is not a valid path!")
 
+    if args.workers < 1:
+        print(f"{args.workers} is not a positive number!")
+        return 1
+
     storage = Storage.create(args.instance_path)
-    status = info(None, storage)["status"]
+    status = get_status(storage)
 
     if not args.force and storage.exists("instances"):
         if status == "initialized":
@@ -80,7 +88,7 @@ def _parser_callback(args):
     notification_file_contents = Path(args.notification.name).read_text(encoding="utf-8") if args.notification else None
 
     try:
-        notify(storage, args.verbose, args.trigger, notification_file_contents)
+        notify(storage, args.verbose, args.trigger, notification_file_contents, args.workers)
     except ParseError as e:
         print(f"{e.loc}: {e}")
         return 1
@@ -92,7 +100,7 @@ def _parser_callback(args):
 
 
 def notify(storage: Storage, verbose_mode: bool, trigger_name_or_event: str,
-           notification_file_contents: typing.Optional[str]):
+           notification_file_contents: typing.Optional[str], num_workers: int = 1):
     if storage.exists("inputs"):
         inputs = yaml.safe_load(storage.read("inputs"))
     else:
@@ -101,7 +109,7 @@ def notify(storage: Storage, verbose_mode: bool, trigger_name_or_event: str,
     if storage.exists("root_file"):
         service_template_path = PurePath(storage.read("root_file"))
 
-        template, workdir = parse_service_template(service_template_path, inputs)
+        template, workdir = parse_service_template(service_template_path, inputs, storage)
 
         # check if specified trigger or event name exists in template
         if trigger_name_or_event:
@@ -116,6 +124,6 @@ def notify(storage: Storage, verbose_mode: bool, trigger_name_or_event: str,
                 raise DataError(f"The provided trigger or event name does not exist: {trigger_name_or_event}.")
 
         topology = Topology.instantiate(template, storage)
-        topology.notify(verbose_mode, workdir, trigger_name_or_event, notification_file_contents)
+        topology.notify(verbose_mode, workdir, trigger_name_or_event, notification_file_contents, num_workers)
     else:
         print("There is no root_file in storage.")
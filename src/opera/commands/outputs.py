@@ -4,10 +4,10 @@ from pathlib import PurePath
 from typing import Dict
 
 import shtab
-from opera_tosca_parser.commands.parse import parse_service_template
 
 from opera.error import DataError, ParseError
 from opera.storage import Storage
+from opera.template_cache import parse_service_template
 from opera.utils import format_outputs, save_outputs
 from opera.instance.topology import Topology
 
@@ -72,7 +72,7 @@ def outputs(storage: Storage) -> dict:
     if storage.exists("root_file"):
         service_template_path = PurePath(storage.read("root_file"))
 
-        template, _ = parse_service_template(service_template_path, inputs)
+        template, _ = parse_service_template(service_template_path, inputs, storage)
         # We need to instantiate the template in order
         # to get access to the instance state.
         topology = Topology.instantiate(template, storage)
@@ -0,0 +1,109 @@
+import argparse
+from os import path
+from pathlib import PurePath
+
+import shtab
+
+from opera.error import DataError, ParseError
+from opera.instance.topology import Topology
+from opera.storage import Storage
+from opera.template_cache import parse_service_template
+from opera.threading.estimate import bottom_levels, critical_path, estimate_durations, makespan, useful_workers
+from opera.utils import format_outputs, save_outputs
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "plan",
+        help="Estimate how long the deployment takes from the durations of earlier runs"
+    )
+    parser.add_argument(
+        "--instance-path", "-p",
+        help="Storage folder location (instead of default .opera)"
+    ).complete = shtab.DIR
+    parser.add_argument(
+        "--workers", "-w", type=int, default=1,
+        help="Number of concurrent deployment threads to estimate the deployment duration for"
+    )
+    parser.add_argument(
+        "--undeploy", "-u", action="store_true",
+        help="Estimate the undeployment instead of the deployment",
+    )
+    parser.add_argument(
+        "--critical-path", "-c", action="store_true",
+        help="List the nodes on the longest chain of dependent nodes with their durations",
+    )
+    parser.add_argument(
+        "--format", "-f", choices=("yaml", "json"), type=str, default="yaml",
+        help="Output format",
+    )
+    parser.add_argument(
+        "--output", "-o",
+        help="Output file location"
+    )
+    parser.set_defaults(func=_parser_callback)
+
+
+def _parser_callback(args):
+    if args.instance_path and not path.isdir(args.instance_path):
+        raise argparse.ArgumentTypeError(f"Directory {args.instance_path} is not a valid path!")
+
+    if args.workers < 1:
+        print(f"{args.workers} is not a positive number!")
+        return 1
+
+    storage = Storage.create(args.instance_path)
+    try:
+        outs = plan(storage, "undeploy" if args.undeploy else "deploy", args.workers, args.critical_path)
+        if args.output:
+            save_outputs(outs, args.format, args.output)
+        else:
+            print(format_outputs(outs, args.format).strip())
+    except ParseError as e:
+        print(f"{e.loc}: {e}")
+        return 1
+    except DataError as e:
+        print(str(e))
+        return 1
+    return 0
+
+
+def plan(storage: Storage, operation: str, num_workers: int, list_critical_path: bool = False) -> dict:
+    """
+    Estimate a full run of the operation over all nodes from the durations that earlier runs recorded.
+
+    :raises ParseError:
+    :raises DataError:
+    """
+    if not storage.exists("root_file"):
+        raise DataError("There is no root_file in storage.")
+
+    inputs = storage.read_json("inputs") if storage.exists("inputs") else {}
+    template, _ = parse_service_template(PurePath(storage.read("root_file")), inputs, storage)
+    topology = Topology.instantiate(template, storage)
+
+    history = topology.read_durations(operation)
+    if not history:
+        raise DataError(f"There are no recorded {operation} durations yet, {operation} the project first.")
+
+    if operation == "deploy":
+        dependencies = topology.dependency_ids(lambda node: node.requirement_targets)
+    else:
+        dependencies = topology.dependency_ids(lambda node: node.requirement_sources)
+    durations, unknown = estimate_durations(list(topology.nodes), history)
+    length, path_ids = critical_path(durations, dependencies)
+    # deployments submit ready nodes by the length of the chains that they start
+    priorities = bottom_levels(durations, dependencies)
+
+    result = dict(
+        operation=operation,
+        nodes=len(durations),
+        critical_path_duration=round(length, 1),
+        workers=num_workers,
+        estimated_duration=round(makespan(durations, dependencies, num_workers, priorities=priorities), 1),
+        useful_workers=useful_workers(durations, dependencies, priorities),
+        nodes_without_history=unknown,
+    )
+    if list_critical_path:
+        result["critical_path"] = [{node_id: round(durations[node_id], 1)} for node_id in path_ids]
+    return result
@@ -1,13 +1,17 @@
 import argparse
 from os import path
 from pathlib import PurePath
+from typing import Optional
 
 import shtab
-from opera_tosca_parser.commands.parse import parse_service_template
 
-from opera.commands.info import info
+from opera.commands.info import get_status
 from opera.error import DataError, ParseError
+from opera.executors.ansible.session import Session
 from opera.storage import Storage
+from opera.threading.limits import ConcurrencyLimits
+from opera.template_cache import parse_service_template
+from opera.tracing import Tracer
 from opera.utils import prompt_yes_no_question
 from opera.instance.topology import Topology
 
@@ -25,6 +29,29 @@ def add_parser(subparsers):
         "--workers", "-w", type=int, default=1,
         help="Maximum number of concurrent undeployment threads (positive number, default 1)"
     )
+    parser.add_argument(
+        "--ansible-mode", choices=Session.MODES,
+        help="Start a new ansible-playbook process for every operation (subprocess) or reuse long-lived workers "
+             "with an initialised Ansible runtime (persistent), defaults to $OPERA_ANSIBLE_MODE or subprocess"
+    )
+    parser.add_argument(
+        "--batch-operations", "-b", action="store_true",
+        help="Run consecutive operations that target the same host with a single ansible-playbook invocation",
+    )
+    parser.add_argument(
+        "--trace-file", "-t",
+        help="Write timing spans of nodes, operations and Ansible runs to this file in the Chrome trace format "
+             "(open it with Perfetto or chrome://tracing)"
+    ).complete = shtab.FILE
+    parser.add_argument(
+        "--host-limit", type=int,
+        help="Maximum number of nodes that run their operations on the same host at the same time"
+    )
+    parser.add_argument(
+        "--limits", "-l",
+        help="YAML file with concurrency limits for all hosts (per_host), for single hosts (hosts: {address: limit}) "
+             "and for nodes of a type (types: {type: limit})"
+    ).complete = shtab.FILE
     parser.add_argument(
         "--resume", "-r", action="store_true",
         help="Resume the undeployment from where it was interrupted",
@@ -49,7 +76,7 @@ def _parser_callback(args):
         return 1
 
     storage = Storage.create(args.instance_path)
-    status = info(None, storage)["status"]
+    status = get_status(storage)
 
     if storage.exists("instances"):
         if args.resume and status == "error":
@@ -72,19 +99,23 @@ def _parser_callback(args):
             print("The instance model already exists. Use --resume/-r option to continue current undeployment process.")
             return 0
 
+    tracer = Tracer(args.trace_file)
     try:
-        undeploy(storage, args.verbose, args.workers)
+        limits = ConcurrencyLimits.load(args.limits, args.host_limit)
+        undeploy(storage, args.verbose, args.workers, Session(args.ansible_mode, args.batch_operations, tracer, limits))
     except ParseError as e:
         print(f"{e.loc}: {e}")
         return 1
     except DataError as e:
         print(str(e))
         return 1
+    finally:
+        tracer.save()
 
     return 0
 
 
-def undeploy(storage: Storage, verbose_mode: bool, num_workers: int):
+def undeploy(storage: Storage, verbose_mode: bool, num_workers: int, session: Optional[Session] = None):
     """
     Undeploy a deployment.
 
@@ -99,8 +130,10 @@ def undeploy(storage: Storage, verbose_mode: bool, num_workers: int):
     if storage.exists("root_file"):
         service_template_path = PurePath(storage.read("root_file"))
 
-        template, workdir = parse_service_template(service_template_path, inputs)
+        template, workdir = parse_service_template(service_template_path, inputs, storage)
         topology = Topology.instantiate(template, storage)
+        if session:
+            topology.set_session(session)
         topology.undeploy(verbose_mode, workdir, num_workers)
     else:
         print("There is no root_file in storage.")
@@ -10,6 +10,8 @@ from opera.commands.diff import diff_instances
 from opera.compare.diff import Diff
 from opera.compare.instance_comparer import InstanceComparer
 from opera.compare.template_comparer import TemplateComparer
+from opera.compare.update_plan import UpdatePlan
+from opera.digest import DigestCache
 from opera.error import DataError, ParseError
 from opera.storage import Storage
 from opera.utils import format_outputs, get_template, get_workdir
@@ -37,6 +39,10 @@ def add_parser(subparsers):
         "--verbose", "-v", action="store_true",
         help="Turns on verbose mode",
     )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Only print the update plan without changing the deployment",
+    )
     parser.add_argument(
         "template", type=argparse.FileType("r"), nargs="?",
         help="TOSCA YAML service template file",
@@ -53,7 +59,7 @@ def _parser_callback(args):
         return 1
 
     storage_old = Storage.create(args.instance_path)
-    comparer = TemplateComparer()
+    comparer = TemplateComparer(DigestCache(Path(storage_old.path) / "cache" / "digests"))
     instance_comparer = InstanceComparer()
 
     if args.template:
@@ -91,11 +97,11 @@ def _parser_callback(args):
             update(
                 storage_old, workdir_old,
                 storage_new, workdir_new,
-                instance_comparer,
                 instance_diff,
                 args.verbose,
                 args.workers,
-                overwrite=True
+                overwrite=True,
+                dry_run=args.dry_run
             )
 
     except ParseError as e:
@@ -111,11 +117,11 @@ def _parser_callback(args):
 def update(
         storage_old: Storage, workdir_old: Path,
         storage_new: Storage, workdir_new: Path,
-        instance_comparer: InstanceComparer,
         instance_diff: Diff,
         verbose_mode: bool,
         num_workers: int,
-        overwrite: bool
+        overwrite: bool,
+        dry_run: bool = False
 ):
     template_old = get_template(storage_old, workdir_old)
     template_new = get_template(storage_new, workdir_new)
@@ -125,9 +131,12 @@ def update(
     if verbose_mode:
         print(format_outputs(instance_diff.outputs(), "json"))
 
-    instance_comparer.prepare_update(topology_old, topology_new, instance_diff)
-    topology_old.undeploy(verbose_mode, workdir_old, num_workers)
-    topology_old.write_all()
+    plan = UpdatePlan(topology_old, topology_new, instance_diff)
+    print("Update plan:")
+    for action, node_ids in plan.outputs().items():
+        print(f"  {action}: {', '.join(node_ids) or '-'}")
+    if dry_run:
+        return
 
     if overwrite:
         # swap storage
@@ -136,5 +145,4 @@ def update(
         storage_old.write_json(storage_new.read_json("inputs"), "inputs")
         storage_old.write(storage_new.read("root_file"), "root_file")
 
-    topology_new.write_all()
-    topology_new.deploy(verbose_mode, workdir_new, num_workers)
+    plan.execute(verbose_mode, workdir_old, workdir_new, num_workers)
@@ -5,11 +5,13 @@ from zipfile import is_zipfile
 
 import shtab
 import yaml
-from opera_tosca_parser.commands.parse import parse_service_template, parse_csar
+from opera_tosca_parser.commands.parse import parse_csar
 
 from opera.error import OperaError, ParseError
 from opera.storage import Storage
+from opera.template_cache import parse_service_template
 from opera.instance.topology import Topology
+from opera.threading.node_executor import default_workers
 
 
 def add_parser(subparsers):
@@ -29,6 +31,11 @@ def add_parser(subparsers):
         "--executors", "-e", action="store_true",
         help="Validate TOSCA templates and also the executors (e.g., Ansible playbooks) behind them",
     )
+    parser.add_argument(
+        "--workers", "-w", type=int, default=default_workers(),
+        help="Maximum number of concurrent executor validation threads (positive number, defaults to the number "
+             "of CPUs)"
+    )
     parser.add_argument(
         "--verbose", "-v", action="store_true",
         help="Turns on verbose mode",
@@ -41,6 +48,10 @@ def add_parser(subparsers):
 
 
 def _parser_callback(args):
+    if args.workers < 1:
+        print(f"{args.workers} is not a positive number!")
+        return 1
+
     try:
         inputs = yaml.safe_load(args.inputs) if args.inputs else {}
     except yaml.YAMLError as e:
@@ -56,7 +67,7 @@ def _parser_callback(args):
 
     try:
         print("Validating TOSCA CSAR or service template...")
-        validate(csar_or_st_path, inputs, storage, args.verbose, args.executors)
+        validate(csar_or_st_path, inputs, storage, args.verbose, args.executors, args.workers)
         print("Done.")
     except ParseError as e:
         print(f"{e.loc}: {e}")
@@ -69,30 +80,30 @@ def _parser_callback(args):
 
 
 def validate(csar_or_st_path: PurePath, inputs: typing.Optional[dict], storage: Storage, verbose: bool,
-             executors: bool):
+             executors: bool, num_workers: int = 1):
     if is_zipfile(csar_or_st_path) or Path(csar_or_st_path).is_dir():
-        validate_csar(csar_or_st_path, inputs, storage, verbose, executors)
+        validate_csar(csar_or_st_path, inputs, storage, verbose, executors, num_workers)
     else:
-        validate_service_template(csar_or_st_path, inputs, storage, verbose, executors)
+        validate_service_template(csar_or_st_path, inputs, storage, verbose, executors, num_workers)
 
 
 def validate_csar(csar_path: PurePath, inputs: typing.Optional[dict], storage: Storage, verbose: bool,
-                  executors: bool):
+                  executors: bool, num_workers: int = 1):
     if inputs is None:
         inputs = {}
 
     template, workdir = parse_csar(csar_path, inputs)
     if executors:
         topology = Topology.instantiate(template, storage)
-        topology.validate(verbose, workdir, 1)
+        topology.validate(verbose, workdir, num_workers)
 
 
 def validate_service_template(service_template_path: PurePath, inputs: typing.Optional[dict], storage: Storage,
-                              verbose: bool, executors: bool):
+                              verbose: bool, executors: bool, num_workers: int = 1):
     if inputs is None:
         inputs = {}
 
-    template, workdir = parse_service_template(service_template_path, inputs)
+    template, workdir = parse_service_template(service_template_path, inputs, storage)
     if executors:
         topology = Topology.instantiate(template, storage)
-        topology.validate(verbose, workdir, 1)
+        topology.validate(verbose, workdir, num_workers)
@@ -1,13 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from .diff import Diff
 
 
 class Comparison:
     def __init__(self, compare_func):
         self.item_compare_func = compare_func
+        # quick comparisons stop at the first difference, so their diff is not complete
+        self.quick = False
+        # independent items of collections are compared concurrently when there is more than one worker
+        self.workers = 1
 
     def compare(self, collection1, collection2, context):
         return self.item_compare_func(collection1, collection2, context)
 
+    def _compare_items(self, pairs, context):
+        # yields (item_id, equal, change) in the order of pairs
+        if self.workers <= 1 or len(pairs) <= 1:
+            for item_id, item1, item2 in pairs:
+                yield (item_id, *self.item_compare_func(item1, item2, context))
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                (item_id, executor.submit(self.item_compare_func, item1, item2, context))
+                for item_id, item1, item2 in pairs
+            ]
+            try:
+                for item_id, future in futures:
+                    yield (item_id, *future.result())
+            finally:
+                # the caller stopped early or failed, so nobody needs the remaining results
+                for _, future in futures:
+                    future.cancel()
+
+    def _collect(self, diff, pairs, context):
+        results = self._compare_items(pairs, context)
+        try:
+            for item_id, equal, change in results:
+                if not equal:
+                    diff.changed[item_id] = change
+                    if self.quick:
+                        break
+        finally:
+            results.close()
+        return diff.equal(), diff
+
 
 class ListComparison(Comparison):
     def __init__(self, compare_func, id_func):
@@ -15,21 +53,23 @@ class ListComparison(Comparison):
         self.item_id_func = id_func
 
     def compare(self, collection1, collection2, context):  # pylint: disable=arguments-differ
-        diff = Diff()
+        # items are matched through their ids and the first item with an id wins
+        items1 = {}
         for item1 in collection1:
-            item2 = next((i for i in collection2 if self.item_id_func(item1) == self.item_id_func(i)), None)
-            if not item2:
-                diff.deleted.append(self.item_id_func(item1))
-            else:
-                equal, change = self.item_compare_func(item1, item2, context)
-                if not equal:
-                    diff.changed[self.item_id_func(item1)] = change
+            items1.setdefault(self.item_id_func(item1), item1)
+        items2 = {}
         for item2 in collection2:
-            item1 = next((i for i in collection1 if self.item_id_func(item2) == self.item_id_func(i)), None)
-            if not item1:
-                diff.added.append(self.item_id_func(item2))
+            items2.setdefault(self.item_id_func(item2), item2)
 
-        return diff.equal(), diff
+        diff = Diff()
+        diff.deleted.extend(self.item_id_func(i) for i in collection1 if self.item_id_func(i) not in items2)
+        diff.added.extend(self.item_id_func(i) for i in collection2 if self.item_id_func(i) not in items1)
+        if self.quick and not diff.equal():
+            return False, diff
+
+        pairs = [(self.item_id_func(i), i, items2[self.item_id_func(i)])
+                 for i in collection1 if self.item_id_func(i) in items2]
+        return self._collect(diff, pairs, context)
 
 
 class MapComparison(Comparison):
@@ -50,20 +90,13 @@ class MapComparison(Comparison):
             collection2 = collection2[0]
 
         diff = Diff()
-        for name1, item1 in collection1.items():
-            if name1 not in collection2:
-                diff.deleted.append(name1)
-            else:
-                equal, change = self.item_compare_func(item1, collection2[name1], context)
-                if not equal:
-                    if self.item_id_func is None:
-                        name = name1
-                    else:
-                        name = self.item_id_func(item1)
-                    diff.changed[name] = change
-
-        for name2 in collection2:
-            if name2 not in collection1:
-                diff.added.append(name2)
+        diff.deleted.extend(name1 for name1 in collection1 if name1 not in collection2)
+        diff.added.extend(name2 for name2 in collection2 if name2 not in collection1)
+        if self.quick and not diff.equal():
+            return False, diff
 
-        return diff.equal(), diff
+        pairs = [
+            (name1 if self.item_id_func is None else self.item_id_func(item1), item1, collection2[name1])
+            for name1, item1 in collection1.items() if name1 in collection2
+        ]
+        return self._collect(diff, pairs, context)
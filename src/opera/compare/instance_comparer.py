@@ -6,8 +6,14 @@ from .diff import Diff
 
 
 class InstanceComparer:
+    def __init__(self, quick=False):
+        # quick comparisons stop at the first difference
+        self.quick = quick
+
     def compare_topology_template(self, topology_template1, topology_template2, template_diff):
         diff_copy = template_diff.copy()
+        if self.quick and not template_diff.equal():
+            return False, diff_copy
         nodes_diff = diff_copy.changed.get("nodes", Diff())
         # we can just process model from second topology
         # as we only care about the relationships that are present
@@ -16,26 +22,13 @@ class InstanceComparer:
         if not equal:
             nodes_diff.combine_changes("dependencies", diff)
         compare_states = MapComparison(self._compare_state, self._get_template_name)
+        compare_states.quick = self.quick
         equal, diff = compare_states.compare(topology_template1.nodes, topology_template2.nodes, None)
         if not equal:
             nodes_diff.combine_changes("state", diff.changed)
 
         return equal, diff_copy
 
-    def prepare_update(self, topology_template1, topology_template2, template_diff):
-        # no need to take relationships into account
-        # as they are always in "initial" state
-        nodes_diff = template_diff.changed.get("nodes", Diff())
-        for node1 in topology_template1.nodes.values():
-            node_name = self._get_template_name(node1)
-            if not nodes_diff.find_key(node_name):
-                node1.set_state(NodeState.INITIAL, write=False)
-
-        for node2 in topology_template2.nodes.values():
-            node_name = self._get_template_name(node2)
-            if not nodes_diff.find_key(node_name):
-                node2.set_state(NodeState.STARTED, write=False)
-
     def _check_dependencies(self, nodes, changed_nodes, parent_name, parent_changed):
         dependency_changes: Dict[str, set] = {}
         # dependency graph is acyclic so we may not care about
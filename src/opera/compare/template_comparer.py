@@ -1,8 +1,8 @@
-import filecmp
 from os import path
 
 from opera_tosca_parser.error import DataError
 
+from opera.digest import DigestCache
 from .comparisons import Comparison, ListComparison, MapComparison
 from .diff import Diff
 
@@ -16,11 +16,24 @@ class TemplateContext:  # noqa: R0903
 
 
 class TemplateComparer:
+    def __init__(self, digests=None, quick=False, workers=1):
+        # files are compared through their content digests, so every file is read at most once
+        self.digests = digests or DigestCache()
+        # quick comparisons stop at the first difference
+        self.quick = quick
+        # nodes are independent of each other, so they can be compared concurrently
+        self.workers = workers
+
     def compare_service_template(self, service_template1, service_template2, context):
+        nodes = MapComparison(self._compare_node)
+        nodes.workers = self.workers
         comparisons = {
-            "nodes": MapComparison(self._compare_node),
+            "nodes": nodes,
         }
-        return self._compare_item(service_template1, service_template2, comparisons, context)
+        try:
+            return self._compare_item(service_template1, service_template2, comparisons, context)
+        finally:
+            self.digests.save()
 
     def _compare_node(self, node1, node2, context):
         comparisons = {
@@ -73,15 +86,17 @@ class TemplateComparer:
         }
         return self._compare_item(operation1, operation2, comparisons, context)
 
-    @staticmethod
-    def _compare_item(item1, item2, comparisons, context):
+    def _compare_item(self, item1, item2, comparisons, context):
         diff = Diff()
         for name, comparison in comparisons.items():
             equal = True
             if isinstance(comparison, Comparison):
+                comparison.quick = self.quick
                 equal, change = comparison.compare(getattr(item1, name), getattr(item2, name), context)
             if not equal:
                 diff.changed[name] = change
+                if self.quick:
+                    break
         return diff.equal(), diff
 
     @staticmethod
@@ -115,15 +130,11 @@ class TemplateComparer:
     def _compare_target(target1, target2, context):
         return target1.name == target2.name, [target1.name, target2.name]
 
-    @staticmethod
-    def _compare_file(filepath1, filepath2, context):
+    def _compare_file(self, filepath1, filepath2, context):
         equal = False
         if filepath1 and filepath2:
-            equal = filecmp.cmp(
-                path.join(context.workdir1, filepath1),
-                path.join(context.workdir2, filepath2),
-                shallow=False
-            )
+            equal = (self.digests.digest(path.join(context.workdir1, filepath1))
+                     == self.digests.digest(path.join(context.workdir2, filepath2)))
         elif not filepath1 and not filepath2:
             equal = True
         return equal, f"file {filepath1}"
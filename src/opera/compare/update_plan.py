@@ -0,0 +1,93 @@
+from opera.threading import DependencyScheduler, NodeExecutor
+from .diff import Diff
+
+
+class UpdateStep:
+    def __init__(self, step_id, node, operation, workdir):
+        self.tosca_id = step_id
+        self.node = node
+        self.operation = operation
+        self.workdir = workdir
+        self.dependencies = []
+
+    def run(self, verbose, _workdir):
+        getattr(self.node, self.operation)(verbose, self.workdir)
+
+
+class UpdatePlan:
+    """
+    Operations that bring a deployed topology to an updated template.
+
+    Only nodes that the instance diff marks as added, deleted or changed, which includes the nodes that depend on
+    changed ones, are undeployed from the old topology and deployed from the new one. All other nodes keep running
+    and their state is carried over to the new topology. Undeploy and deploy steps are scheduled together, so steps
+    that do not depend on each other run concurrently.
+    """
+
+    def __init__(self, topology_old, topology_new, instance_diff: Diff):
+        self.topology_old = topology_old
+        self.topology_new = topology_new
+
+        nodes_diff = instance_diff.changed.get("nodes", Diff())
+        self.undeploy = [
+            node for node in topology_old.nodes.values()
+            if nodes_diff.find_key(node.template.name) and not node.undeployed
+        ]
+        self.deploy = []
+        self.unchanged = []
+        for node in topology_new.nodes.values():
+            if nodes_diff.find_key(node.template.name) or node.tosca_id not in topology_old.nodes:
+                self.deploy.append(node)
+            else:
+                self.unchanged.append(node)
+
+    def outputs(self):
+        return dict(
+            undeploy=[node.tosca_id for node in self.undeploy],
+            deploy=[node.tosca_id for node in self.deploy],
+            unchanged=[node.tosca_id for node in self.unchanged],
+        )
+
+    def steps(self, workdir_old, workdir_new):
+        undeploy_steps = {n.tosca_id: UpdateStep(f"undeploy {n.tosca_id}", n, "undeploy", workdir_old)
+                          for n in self.undeploy}
+        deploy_steps = {n.tosca_id: UpdateStep(f"deploy {n.tosca_id}", n, "deploy", workdir_new)
+                        for n in self.deploy}
+
+        # A node can be undeployed once all nodes that require it are undeployed.
+        for step in undeploy_steps.values():
+            step.dependencies.extend(
+                undeploy_steps[s.tosca_id] for s in step.node.requirement_sources if s.tosca_id in undeploy_steps
+            )
+        # A node can be deployed once all nodes that it requires are deployed and its old instance is gone.
+        for node_id, step in deploy_steps.items():
+            step.dependencies.extend(
+                deploy_steps[t.tosca_id] for t in step.node.requirement_targets if t.tosca_id in deploy_steps
+            )
+            if node_id in undeploy_steps:
+                step.dependencies.append(undeploy_steps[node_id])
+
+        return list(undeploy_steps.values()) + list(deploy_steps.values())
+
+    def execute(self, verbose, workdir_old, workdir_new, num_workers=None):
+        for node in self.unchanged:
+            old_node = self.topology_old.nodes[node.tosca_id]
+            data = old_node.dump()
+            del data["state"]
+            node.load(data)
+            node.set_state(old_node.state, write=False)
+
+        # both topologies run their operations with the same executor session
+        self.topology_old.set_session(self.topology_new.session)
+        # the summary has to describe the new topology, so the old one must not overwrite it
+        if self.topology_old.storage is self.topology_new.storage:
+            self.topology_old.reports_status = False
+        scheduler = DependencyScheduler(self.steps(workdir_old, workdir_new), lambda step: False,
+                                        lambda step: step.dependencies)
+        try:
+            with NodeExecutor(num_workers, self.topology_new.session.tracer) as executor, self.topology_new.session:
+                scheduler.run(executor, "run", verbose, None)
+        finally:
+            self.topology_old.storage.compact()
+            self.topology_new.write_all()
+            self.topology_new.storage.compact()
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import tempfile
+from threading import Lock  # type: ignore # pylint: disable=no-name-in-module
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for chunk in iter(lambda: fd.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DigestCache:
+    """
+    Content digests of files and directories, remembered for as long as a file's stat signature is unchanged.
+
+    If a path is given, the digests are loaded from it and save() writes them back, so they outlive the process.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.digests = {}
+        self.lock = Lock()
+        self.modified = False
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as fd:
+                self.digests = {p: (tuple(signature), digest) for p, (signature, digest) in json.load(fd).items()}
+        except (OSError, ValueError, TypeError):
+            # a missing or damaged cache file just means that everything gets hashed again
+            self.digests = {}
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            if not self.modified:
+                return
+            content = json.dumps(self.digests)
+            self.modified = False
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _signature(stat):
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def digest(self, path):
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            return self._directory_digest(path)
+        return self._cached_file_digest(path)
+
+    def _cached_file_digest(self, path):
+        signature = self._signature(os.stat(path))
+        with self.lock:
+            cached = self.digests.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        digest = _file_digest(path)
+        with self.lock:
+            self.digests[path] = (signature, digest)
+            self.modified = True
+        return digest
+
+    def _directory_digest(self, path):
+        # Symbolic links are followed, just like shutil.copytree does when it copies the directory.
+        digest = hashlib.sha256()
+        for dir_path, dir_names, file_names in os.walk(path, followlinks=True):
+            dir_names.sort()
+            relative_dir = os.path.relpath(dir_path, path)
+            digest.update(f"d {relative_dir}\n".encode("utf-8"))
+            for name in sorted(file_names):
+                file_digest = self._cached_file_digest(os.path.join(dir_path, name))
+                digest.update(f"f {os.path.join(relative_dir, name)} {file_digest}\n".encode("utf-8"))
+        return digest.hexdigest()
@@ -1,3 +1,4 @@
+import functools
 import json
 import os
 import sys
@@ -6,11 +7,15 @@ import tempfile
 import yaml
 
 from opera.threading import utils as thread_utils
+from opera.tracing import Tracer
 from . import utils
-from .stdout_callbacks import json_ansible_callback
+from .events import EVENTS_ENV, OPERATION_MARKER, VERBOSE_ENV, EventStream
 
+# json_ansible_callback is loaded by Ansible from here, importing it would pull Ansible into opera's process
+CALLBACK_PLUGINS = os.path.join(os.path.dirname(__file__), "stdout_callbacks")
 
-def _get_inventory(host):
+
+def _get_inventory(host, session=None):
     inventory = dict(
         ansible_host=host,
         ansible_ssh_common_args="-o StrictHostKeyChecking=no",
@@ -24,66 +29,185 @@ def _get_inventory(host):
         opera_ssh_identity_file = os.environ.get("OPERA_SSH_IDENTITY_FILE")
         if opera_ssh_identity_file is not None:
             inventory["ansible_ssh_private_key_file"] = opera_ssh_identity_file
+        if session:
+            inventory.update(session.ssh.inventory_vars(host))
 
     return yaml.safe_dump(dict(all=dict(hosts=dict(opera=inventory))))
 
 
-def run(host, primary, dependencies, artifacts, variables, verbose, workdir, validate):
-    # pylint: disable=too-many-locals
+def _copy_operation_files(copy, workdir, dir_path, primary, dependencies, artifacts):
+    playbook = os.path.join(dir_path, os.path.basename(primary))
+    copy(os.path.join(workdir, primary), playbook)
+
+    for d in dependencies:
+        copy(os.path.join(workdir, d), os.path.join(dir_path, os.path.basename(d)))
+    for a in artifacts:
+        copy(os.path.join(workdir, a), os.path.join(dir_path, os.path.basename(a)))
+
+    return playbook
+
+
+SET_FACT_MODULES = frozenset(("set_fact", "ansible.builtin.set_fact", "ansible.legacy.set_fact"))
+# keywords and modules that bring in variables whose names cannot be told without running the playbook
+UNKNOWN_VARIABLE_SOURCES = frozenset((
+    "roles", "vars_files", "include_vars", "ansible.builtin.include_vars", "ansible.legacy.include_vars",
+    "include_role", "ansible.builtin.include_role", "import_role", "ansible.builtin.import_role",
+))
+
+
+def _set_variables(data, names):
+    # adds the variables that the tasks in data may set for later plays to names, returns False if it cannot tell
+    if isinstance(data, list):
+        return all(_set_variables(item, names) for item in data)
+    if not isinstance(data, dict):
+        return True
+
+    for key, value in data.items():
+        if key in UNKNOWN_VARIABLE_SOURCES:
+            return False
+        if key == "register":
+            names.add(str(value))
+        elif key in SET_FACT_MODULES:
+            if isinstance(value, dict):
+                facts = [k for k in value if k != "cacheable"]
+            elif isinstance(value, str):
+                facts = [item.split("=", 1)[0] for item in value.split() if "=" in item]
+            else:
+                return False
+            if any("{{" in str(fact) for fact in facts):
+                return False
+            names.update(str(fact) for fact in facts)
+        elif not _set_variables(value, names):
+            return False
+    return True
+
+
+@functools.lru_cache(maxsize=256)
+def settable_variables(workdir, primary, dependencies):
+    """
+    Return the names of facts and registered results that an operation's playbook may set, or None if unknown.
+
+    Facts outlive the play that sets them, so in a batched playbook they can shadow the inputs of later operations.
+    YAML dependencies are scanned too, since they are usually the task files that the playbook includes.
+    """
+    names = set()
+    for path in (primary, *(d for d in dependencies if d.endswith((".yaml", ".yml")))):
+        try:
+            with open(os.path.join(workdir, path), encoding="utf-8") as fd:
+                data = yaml.safe_load(fd)
+        except (OSError, yaml.YAMLError):
+            return None
+        if not _set_variables(data, names):
+            return None
+    return frozenset(names)
+
+
+def _run_playbook(dir_path, host, playbook, vars_file, verbose, validate, session, timeout=None):
+    inventory = utils.write(dir_path, _get_inventory(host, session), suffix=".yaml")
+
+    with open(f"{dir_path}/ansible.cfg", "w", encoding="utf-8") as fd:
+        fd.write("[defaults]\n")
+        fd.write("retry_files_enabled = False\n")
+
+        opera_ssh_host_key_checking = os.environ.get("OPERA_SSH_HOST_KEY_CHECKING")
+        if opera_ssh_host_key_checking is not None:
+            check = str(opera_ssh_host_key_checking).lower().strip()
+            if check[:1] == "f" or check[:1] == "false":
+                fd.write("host_key_checking = False\n")
+
+    cmd = ["ansible-playbook", "-i", inventory]
+    if vars_file:
+        cmd.extend(("-e", "@" + vars_file))
+    cmd.append(playbook)
+
+    if validate:
+        cmd.append("--syntax-check")
+
+    tracer = session.tracer if session else Tracer()
+    events = os.path.join(dir_path, "events.jsonl")
+    env = dict(
+        ANSIBLE_SHOW_CUSTOM_STATS="1",
+        ANSIBLE_CALLBACK_PLUGINS=f"~/.ansible/plugins/callback:/usr/share/ansible/plugins/callback:"
+                                 f"{CALLBACK_PLUGINS}",
+        ANSIBLE_STDOUT_CALLBACK="json_ansible_callback",
+        **{EVENTS_ENV: events, VERBOSE_ENV: "1" if verbose else ""}
+    )
+    with EventStream(events, _print_task if verbose else None) as stream, \
+            tracer.span("ansible-playbook", "ansible", host=host, playbook=os.path.basename(playbook)) as span_args:
+        if session:
+            code, out, err = session.run_in_directory(dir_path, cmd, env, timeout)
+        else:
+            code, out, err = utils.run_in_directory(dir_path, cmd, env, timeout)
+        span_args.update(code=code)
+    if code == utils.TIMEOUT_CODE and timeout:
+        thread_utils.print_thread(f"    ansible-playbook {os.path.basename(playbook)} timed out after {timeout}s")
+    if code != 0 or verbose:
+        with open(out, encoding="utf-8") as fd:
+            thread_utils.SafePrinter.print_lines(fd)
+        with open(err, encoding="utf-8") as fd:
+            thread_utils.SafePrinter.print_lines(fd)
+        thread_utils.print_thread("============")
+
+    return code, stream.result or {}
+
+
+def _print_task(event):
+    thread_utils.print_thread(f"      {event['task']} on {event['host']}: {event['status']}")
+
+
+def run(host, primary, dependencies, artifacts, variables, verbose, workdir, validate, session=None, timeout=None):
+    copy = session.copy if session else utils.copy
+    tracer = session.tracer if session else Tracer()
     with tempfile.TemporaryDirectory() as dir_path:
-        playbook = os.path.join(dir_path, os.path.basename(primary))
-        utils.copy(os.path.join(workdir, primary), playbook)
-
-        for d in dependencies:
-            utils.copy(os.path.join(workdir, d), os.path.join(dir_path, os.path.basename(d)))
-        for a in artifacts:
-            utils.copy(os.path.join(workdir, a), os.path.join(dir_path, os.path.basename(a)))
-
-        inventory = utils.write(dir_path, _get_inventory(host), suffix=".yaml")
+        with tracer.span("copy operation files", "workspace", files=1 + len(dependencies) + len(artifacts)):
+            playbook = _copy_operation_files(copy, workdir, dir_path, primary, dependencies, artifacts)
         vars_file = utils.write(dir_path, yaml.safe_dump(variables), suffix=".yaml")
 
-        with open(f"{dir_path}/ansible.cfg", "w", encoding="utf-8") as fd:
-            fd.write("[defaults]\n")
-            fd.write("retry_files_enabled = False\n")
-
-            opera_ssh_host_key_checking = os.environ.get("OPERA_SSH_HOST_KEY_CHECKING")
-            if opera_ssh_host_key_checking is not None:
-                check = str(opera_ssh_host_key_checking).lower().strip()
-                if check[:1] == "f" or check[:1] == "false":
-                    fd.write("host_key_checking = False\n")
-
         if verbose:
             print(json.dumps({"inputs": {key: variables[key] for key in variables}}, indent=2, sort_keys=True))
 
-        cmd = [
-            "ansible-playbook",
-            "-i", inventory,
-            "-e", "@" + vars_file,
-            playbook
-        ]
-
-        if validate:
-            cmd.append("--syntax-check")
-
-        env = dict(
-            ANSIBLE_SHOW_CUSTOM_STATS="1",
-            ANSIBLE_CALLBACK_PLUGINS=f"~/.ansible/plugins/callback:/usr/share/ansible/plugins/callback:"
-                                     f"{os.path.dirname(json_ansible_callback.__file__)}",
-            ANSIBLE_STDOUT_CALLBACK="json_ansible_callback"
-        )
-        code, out, err = utils.run_in_directory(dir_path, cmd, env)
-        if code != 0 or verbose:
-            with open(out, encoding="utf-8") as fd:
-                thread_utils.SafePrinter.print_lines(fd)
-            with open(err, encoding="utf-8") as fd:
-                thread_utils.SafePrinter.print_lines(fd)
-            thread_utils.print_thread("============")
-
+        code, result = _run_playbook(dir_path, host, playbook, vars_file, verbose, validate, session, timeout)
         if code != 0:
             return False, {}
 
-        outputs = {}
-        if not validate:
-            with open(out, encoding="utf-8") as fd:
-                outputs = json.load(fd)["global_custom_stats"]
-        return code == 0, outputs
+        return True, result.get("global_custom_stats", {})
+
+
+def run_batch(host, operations, verbose, workdir, session=None, timeout=None):
+    """
+    Run several operations on the same host with a single ansible-playbook invocation.
+
+    Each operation is a (primary, dependencies, artifacts, variables) tuple. Operation files are copied into separate
+    subdirectories and the generated playbook imports the primary playbooks in order, passing operation inputs as
+    import variables. Returns the number of operations that completed successfully and the outputs of each of them.
+    The timeout applies to the whole batch.
+    """
+    copy = session.copy if session else utils.copy
+    tracer = session.tracer if session else Tracer()
+    with tempfile.TemporaryDirectory() as dir_path:
+        plays = []
+        for index, (primary, dependencies, artifacts, variables) in enumerate(operations):
+            operation_dir = os.path.join(dir_path, f"operation_{index}")
+            os.mkdir(operation_dir)
+            with tracer.span("copy operation files", "workspace", files=1 + len(dependencies) + len(artifacts)):
+                playbook = _copy_operation_files(copy, workdir, operation_dir, primary, dependencies, artifacts)
+
+            if verbose:
+                print(json.dumps({"inputs": {key: variables[key] for key in variables}}, indent=2, sort_keys=True))
+
+            plays.append(dict(
+                name=f"{OPERATION_MARKER}{index}", hosts="all", gather_facts=False, tasks=[]
+            ))
+            plays.append({"import_playbook": os.path.relpath(playbook, dir_path), "vars": variables})
+
+        playbook = utils.write(dir_path, yaml.safe_dump(plays), suffix=".yaml")
+        code, result = _run_playbook(dir_path, host, playbook, None, verbose, False, session, timeout)
+
+        # no result means that ansible failed before it could report anything (e.g. the playbook did not load)
+        outputs = result.get("operation_custom_stats", [])
+        if code == 0:
+            return len(operations), outputs
+
+        failed = result.get("failed_operation")
+        completed = failed if failed is not None else max(len(outputs) - 1, 0)
+        return completed, outputs[:completed]
@@ -0,0 +1,70 @@
+import json
+import os
+from threading import Event, Thread, current_thread  # type: ignore # pylint: disable=no-name-in-module
+
+# json_ansible_callback appends one JSON document per line to the file named by this variable
+EVENTS_ENV = "OPERA_ANSIBLE_EVENTS"
+# makes json_ansible_callback dump every task result to stdout
+VERBOSE_ENV = "OPERA_ANSIBLE_VERBOSE"
+# batched playbooks start every operation with an empty play with this name prefix, followed by its index
+OPERATION_MARKER = "opera operation "
+
+
+class EventStream:
+    """
+    Follow the events file of a running playbook.
+
+    Task events are handed to the callback as soon as they are written, while the final stats event is kept as the
+    result. Only complete lines are parsed, so nothing beyond the current line is ever held in memory.
+    """
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, path, on_task=None):
+        self.path = path
+        self.on_task = on_task
+        self.result = None
+        self.offset = 0
+        self.partial = b""
+        self.stopped = Event()
+        self.thread = None
+
+    def poll(self):
+        try:
+            with open(self.path, "rb") as fd:
+                fd.seek(self.offset)
+                data = fd.read()
+        except FileNotFoundError:
+            return
+
+        self.offset += len(data)
+        *lines, self.partial = (self.partial + data).split(b"\n")
+        for line in lines:
+            if line:
+                self._handle(json.loads(line))
+
+    def _handle(self, event):
+        if event["event"] == "stats":
+            self.result = event
+        elif self.on_task:
+            self.on_task(event)
+
+    def _follow(self):
+        while not self.stopped.wait(self.POLL_INTERVAL):
+            self.poll()
+
+    def __enter__(self):
+        # make sure that we never pick up events of a previous run
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        if self.on_task:
+            # task events are reported on behalf of the thread that runs the playbook
+            self.thread = Thread(target=self._follow, name=current_thread().name, daemon=True)
+            self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.thread:
+            self.stopped.set()
+            self.thread.join()
+        self.poll()
@@ -0,0 +1,56 @@
+import os
+
+from opera.error import DataError
+from opera.tracing import Tracer
+from . import utils
+from .worker import WorkerPool
+from .ssh import ControlSockets
+from .workspace import WorkspaceCache
+
+
+class Session:
+    """Executor state that is shared by all operations of one lifecycle run (deploy, undeploy, ...)."""
+
+    # subprocess: start a new ansible-playbook process for every operation
+    # persistent: reuse long-lived workers that keep an initialised ansible runtime
+    MODES = ("subprocess", "persistent")
+    DEFAULT_MODE = "subprocess"
+
+    def __init__(self, mode=None, batch=False, tracer=None, limits=None):
+        mode = mode or os.environ.get("OPERA_ANSIBLE_MODE", self.DEFAULT_MODE)
+        if mode not in self.MODES:
+            raise DataError(f"Invalid Ansible executor mode: '{mode}'. Valid modes are: {', '.join(self.MODES)}.")
+
+        self.mode = mode
+        # run consecutive operations that target the same host as one playbook
+        self.batch = batch
+        self.pool = WorkerPool() if mode == "persistent" else None
+        self.workspace = WorkspaceCache()
+        self.ssh = ControlSockets()
+        self.tracer = tracer or Tracer()
+        # opera.threading.limits.ConcurrencyLimits for nodes that run on the same host or have the same type
+        self.limits = limits
+
+    def copy(self, source, target):
+        self.workspace.materialize(source, target)
+
+    def run_in_directory(self, dest_dir, cmd, env, timeout=None):
+        if self.pool:
+            return self.pool.run_in_directory(dest_dir, cmd, env, timeout)
+        return utils.run_in_directory(dest_dir, cmd, env, timeout)
+
+    def stats(self):
+        return dict(workspace_cache=self.workspace.stats(), ssh=self.ssh.stats())
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+        # cached workspace content and ssh master connections are only valid for one lifecycle run
+        self.workspace.close()
+        self.ssh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import subprocess  # nosec
+import tempfile
+from threading import Lock  # type: ignore # pylint: disable=no-name-in-module
+
+
+def _enabled(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return str(value).lower().strip()[:1] not in ("f", "n", "0")
+
+
+class ControlSockets:
+    """
+    SSH master connections that operations on the same remote host share for the duration of a lifecycle run.
+
+    Every host gets its own control socket in a private directory. The first operation on a host opens the master
+    connection and ssh keeps it around (ControlPersist), so later operations skip the handshake. All masters are
+    closed and the directory is removed when the run finishes.
+    """
+
+    def __init__(self):
+        self.persist = os.environ.get("OPERA_SSH_CONTROL_PERSIST", "300s")
+        self.pipelining = _enabled("OPERA_SSH_PIPELINING", True)
+        self.root = None
+        self.sockets = {}
+        self.lock = Lock()
+        self.handshakes = 0
+        self.reused = 0
+
+    def inventory_vars(self, host):
+        with self.lock:
+            if self.root is None:
+                # socket paths have to stay well under the 108 byte limit of unix sockets, hence the short names
+                self.root = tempfile.mkdtemp(prefix="opera-ssh-")
+            socket = self.sockets.setdefault(host, os.path.join(self.root, str(len(self.sockets))))
+
+            # a live master is the only thing that leaves a socket behind, so we know in advance what ssh will do
+            if os.path.exists(socket):
+                self.reused += 1
+            else:
+                self.handshakes += 1
+
+        return dict(
+            ansible_ssh_args=f"-C -o ControlMaster=auto -o ControlPersist={self.persist}",
+            ansible_control_path=socket,
+            ansible_pipelining=self.pipelining,
+        )
+
+    def stats(self):
+        return dict(handshakes=self.handshakes, handshakes_avoided=self.reused, hosts=len(self.sockets))
+
+    def close(self):
+        with self.lock:
+            root, self.root = self.root, None
+            sockets, self.sockets = self.sockets, {}
+
+        if root is None:
+            return
+
+        ssh = shutil.which("ssh")
+        for host, socket in sockets.items():
+            if ssh and os.path.exists(socket):
+                try:
+                    subprocess.run(  # nosec
+                        [ssh, "-O", "exit", "-o", f"ControlPath={socket}", host],
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30, check=False
+                    )
+                except subprocess.TimeoutExpired:
+                    pass  # the master exits on its own once ControlPersist runs out
+        shutil.rmtree(root, ignore_errors=True)
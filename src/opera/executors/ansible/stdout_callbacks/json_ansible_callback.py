@@ -1,13 +1,20 @@
 from __future__ import (absolute_import, division, print_function)
 
 import json
+import os
 
+from ansible.executor.stats import AggregateStats
 from ansible.inventory.host import Host
 from ansible.parsing.ajson import AnsibleJSONEncoder
 from ansible.plugins.callback import CallbackBase
 
 __metaclass__ = type
 
+# These are set by opera's Ansible executor and mirror the names in opera.executors.ansible.events.
+OPERATION_MARKER = "opera operation "
+EVENTS_ENV = "OPERA_ANSIBLE_EVENTS"
+VERBOSE_ENV = "OPERA_ANSIBLE_VERBOSE"
+
 DOCUMENTATION = '''
 callback: json_ansible_callback
 callback_type: stdout
@@ -17,6 +24,8 @@ short_description: Show Ansible output as JSON
 version_added: "2.0"
 description:
     - This callback converts Ansible playbook standard output to JSON
+    - Task results are only printed when OPERA_ANSIBLE_VERBOSE is set. When OPERA_ANSIBLE_EVENTS names a file, a
+      compact JSON line is appended to it for every task result and for the final stats.
 notes:
   - We had to create out custom JSON callback plugin for opera's Asnible executor because json callback is not present
     in ansible.builtin Ansible collection and is now part of ansible.posix Ansible collection, which is not included in
@@ -32,16 +41,73 @@ class CallbackModule(CallbackBase):
     def __init__(self):
         super().__init__()
         self.tasks = {}
+        # custom stats of each operation in a batched playbook, aggregated just like ansible does it for the run
+        self.operation_stats = []
+        self.failed_operation = None
+        self.verbose = bool(os.environ.get(VERBOSE_ENV))
+        events_path = os.environ.get(EVENTS_ENV)
+        self.events = None
+        if events_path:
+            # the file stays open until the playbook run ends
+            self.events = open(events_path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
 
     def dump_result(self, result):
         # pylint: disable=protected-access
-        task_result = {"name": self.tasks[result._task._uuid], "result": result._result}
+        task_result = {"name": self.tasks.get(result._task._uuid), "result": result._result}
         self._display.display(json.dumps(task_result, cls=AnsibleJSONEncoder, indent=2, sort_keys=True))
 
+    def emit(self, event):
+        if self.events:
+            self.events.write(json.dumps(event, cls=AnsibleJSONEncoder, sort_keys=True) + "\n")
+            self.events.flush()
+
+    def task_event(self, result, status):
+        # pylint: disable=protected-access
+        self.emit({
+            "event": "task",
+            "task": self.tasks.get(result._task._uuid),
+            "host": result._host.get_name(),
+            "status": status,
+            "changed": bool(result._result.get("changed", False)),
+            "operation": len(self.operation_stats) - 1 if self.operation_stats else None,
+        })
+        if self.verbose:
+            self.dump_result(result)
+
     def v2_playbook_on_task_start(self, task, is_conditional):
         # pylint: disable=protected-access
         self.tasks[task._uuid] = task.name
 
+    def v2_playbook_on_play_start(self, play):
+        if play.get_name().startswith(OPERATION_MARKER):
+            self.operation_stats.append(AggregateStats())
+
+    def v2_runner_on_ok(self, result):
+        # pylint: disable=protected-access
+        self.task_event(result, "ok")
+        if not self.operation_stats or "ansible_stats" not in result._result:
+            return
+
+        ansible_stats = result._result["ansible_stats"]
+        update_or_set = (self.operation_stats[-1].update_custom_stats if ansible_stats.get("aggregate", True)
+                         else self.operation_stats[-1].set_custom_stats)
+        host = result._host.get_name() if ansible_stats.get("per_host", True) else None
+        for k, v in ansible_stats["data"].items():
+            update_or_set(k, v, host)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self.task_event(result, "ignored" if ignore_errors else "failed")
+        if self.operation_stats and not ignore_errors:
+            self.failed_operation = len(self.operation_stats) - 1
+
+    def v2_runner_on_unreachable(self, result):
+        self.task_event(result, "unreachable")
+        if self.operation_stats:
+            self.failed_operation = len(self.operation_stats) - 1
+
+    def v2_runner_on_skipped(self, result):
+        self.task_event(result, "skipped")
+
     def v2_playbook_on_stats(self, stats):
         custom_stats = {k.get_name() if isinstance(k, (Host,)) else k: v for k, v in stats.custom.items()}
 
@@ -50,5 +116,12 @@ class CallbackModule(CallbackBase):
             "custom_stats": custom_stats,
             "global_custom_stats": custom_stats.pop("_run", {}),
         }
+        if self.operation_stats:
+            output["operation_custom_stats"] = [s.custom.get("_run", {}) for s in self.operation_stats]
+            output["failed_operation"] = self.failed_operation
 
         self._display.display(json.dumps(output, cls=AnsibleJSONEncoder, indent=2, sort_keys=True))
+        self.emit(dict(output, event="stats"))
+        if self.events:
+            self.events.close()
+            self.events = None
@@ -1,9 +1,15 @@
 import errno
 import os
 import shutil
+import signal
 import subprocess  # nosec
 import tempfile
 
+# exit code of operations that were killed because they ran out of time, the same as the timeout utility uses
+TIMEOUT_CODE = 124
+# seconds between asking a timed out process group to terminate and killing it
+KILL_GRACE_PERIOD = 5
+
 
 def copy(source, target):
     try:
@@ -21,9 +27,35 @@ def write(dest_dir, content, suffix=None):
         return dest.name
 
 
-def run_in_directory(dest_dir, cmd, env):
+def signal_group(pid, sig):
+    # ansible-playbook leaves forks and ssh connections behind, so the whole process group gets the signal
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def run_in_directory(dest_dir, cmd, env, timeout=None):
     with tempfile.NamedTemporaryFile(dir=dest_dir, delete=False, suffix=".stdout") as fstdout, \
             tempfile.NamedTemporaryFile(dir=dest_dir, delete=False, suffix=".stderr") as fstderr:
-        result = subprocess.run(cmd, cwd=dest_dir, stdout=fstdout, stderr=fstderr,  # nosec
-                                env=dict(os.environ, **env), check=False)
-        return result.returncode, fstdout.name, fstderr.name
+        if not timeout:
+            result = subprocess.run(cmd, cwd=dest_dir, stdout=fstdout, stderr=fstderr,  # nosec
+                                    env=dict(os.environ, **env), check=False)
+            return result.returncode, fstdout.name, fstderr.name
+
+        # a process group of its own can be killed as a whole when it runs out of time
+        with subprocess.Popen(cmd, cwd=dest_dir, stdout=fstdout, stderr=fstderr,  # nosec
+                              env=dict(os.environ, **env), start_new_session=True) as process:
+            try:
+                code = process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                signal_group(process.pid, signal.SIGTERM)
+                try:
+                    process.wait(KILL_GRACE_PERIOD)
+                except subprocess.TimeoutExpired:
+                    pass
+                # whatever is left of the group after the grace period is killed
+                signal_group(process.pid, signal.SIGKILL)
+                process.wait()
+                code = TIMEOUT_CODE
+        return code, fstdout.name, fstderr.name
@@ -0,0 +1,205 @@
+import json
+import os
+import queue
+import subprocess  # nosec
+import signal
+import sys
+import tempfile
+import time
+import traceback
+from threading import Lock  # type: ignore # pylint: disable=no-name-in-module
+
+from opera.error import OperaError
+from opera.executors.ansible.utils import KILL_GRACE_PERIOD, TIMEOUT_CODE, signal_group
+
+# Persistent Ansible workers.
+#
+# Starting ansible-playbook for every operation pays for interpreter startup, ansible-core imports, plugin loading and
+# configuration parsing. A persistent worker is a long-lived Python process that does all of that once and then forks
+# a fresh child for every playbook it is asked to run. Forking keeps the initialised runtime, while every run still
+# gets its own clean copy of ansible's global state (which ansible-core does not allow to be reused in-process).
+#
+# The parent talks to a worker over a line based JSON protocol on the worker's stdin and stdout. Playbook output goes
+# into the same stdout and stderr files that the subprocess mode produces, so the JSON callback contract is kept.
+
+
+def _run_job(cli_class, job):
+    code = 1
+    try:
+        os.chdir(job["cwd"])
+        os.environ.update(job["env"])
+        # stdin is the protocol channel of the worker, so the playbook must not be able to read from it
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        with open(job["stdout"], "w", encoding="utf-8") as out, open(job["stderr"], "w", encoding="utf-8") as err:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(out.fileno(), 1)
+            os.dup2(err.fileno(), 2)
+        code = cli_class(job["cmd"]).run()
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return code
+
+
+def _exit_code(status):
+    # os.waitstatus_to_exitcode needs Python 3.9
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _wait(pid, timeout):
+    # returns the exit status of the child, or None if it is still running after timeout seconds
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+    while True:
+        finished, status = os.waitpid(pid, os.WNOHANG)
+        if finished:
+            return status
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        delay = min(delay * 2, 0.1)
+
+
+def _wait_with_timeout(pid, timeout):
+    status = _wait(pid, timeout)
+    if status is not None:
+        return _exit_code(status)
+
+    # like utils.run_in_directory, the whole process group gets a grace period before it is killed
+    signal_group(pid, signal.SIGTERM)
+    status = _wait(pid, KILL_GRACE_PERIOD)
+    # whatever is left of the group after the grace period is killed
+    signal_group(pid, signal.SIGKILL)
+    if status is None:
+        os.waitpid(pid, 0)
+    return TIMEOUT_CODE
+
+
+def serve(requests, replies):
+    # Importing the CLI loads ansible configuration and plugins once for the whole lifetime of the worker.
+    from ansible.cli.playbook import PlaybookCLI  # pylint: disable=import-outside-toplevel
+
+    for line in iter(requests.readline, ""):
+        job = json.loads(line)
+        timeout = job.get("timeout")
+        pid = os.fork()
+        if pid == 0:
+            if timeout:
+                # a process group of its own can be killed as a whole when it runs out of time
+                os.setpgid(0, 0)
+            os._exit(_run_job(PlaybookCLI, job))  # pylint: disable=protected-access
+
+        if timeout:
+            try:
+                os.setpgid(pid, pid)
+            except OSError:
+                # the child did it already
+                pass
+            code = _wait_with_timeout(pid, timeout)
+        else:
+            code = _exit_code(os.waitpid(pid, 0)[1])
+        replies.write(json.dumps({"code": code}) + "\n")
+        replies.flush()
+
+
+def main():
+    # Keep the protocol channel private and send anything else that ends up on stdout to stderr.
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    serve(sys.stdin, replies)
+
+
+class Worker:
+    def __init__(self, cwd, env):
+        # Ansible refuses to run with non-blocking standard streams, so the worker does not inherit ours. Everything
+        # a playbook prints goes to per-operation files anyway.
+        self.process = subprocess.Popen(  # nosec # pylint: disable=consider-using-with
+            [sys.executable, "-m", __name__], cwd=cwd, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, encoding="utf-8"
+        )
+
+    def run(self, cwd, cmd, env, stdout, stderr, timeout=None):
+        job = dict(cwd=cwd, cmd=cmd, env=env, stdout=stdout, stderr=stderr, timeout=timeout)
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+            reply = self.process.stdout.readline()
+        except (BrokenPipeError, ValueError) as e:
+            raise OperaError(f"Persistent Ansible worker {self.process.pid} is not available: {e}") from e
+
+        if not reply:
+            raise OperaError(f"Persistent Ansible worker {self.process.pid} exited unexpectedly.")
+        return json.loads(reply)["code"]
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except (BrokenPipeError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+class WorkerPool:
+    def __init__(self):
+        # operation directories are deleted after every run, so workers live in the directory that opera runs in
+        self.cwd = os.getcwd()
+        self.idle = queue.LifoQueue()
+        self.workers = []
+        self.lock = Lock()
+
+    def run_in_directory(self, dest_dir, cmd, env, timeout=None):
+        worker = self._acquire(dest_dir, env)
+        with tempfile.NamedTemporaryFile(dir=dest_dir, delete=False, suffix=".stdout") as fstdout, \
+                tempfile.NamedTemporaryFile(dir=dest_dir, delete=False, suffix=".stderr") as fstderr:
+            pass
+
+        try:
+            code = worker.run(dest_dir, cmd, env, fstdout.name, fstderr.name, timeout)
+        except OperaError:
+            self._discard(worker)
+            raise
+
+        self.idle.put(worker)
+        return code, fstdout.name, fstderr.name
+
+    def _acquire(self, dest_dir, env):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        # A new worker loads its ansible configuration once, from the ansible.cfg of the operation that starts it. All
+        # operations of a deployment write the same ansible.cfg, so which one that is does not matter.
+        worker_env = dict(os.environ, **env)
+        worker_env.setdefault("ANSIBLE_CONFIG", os.path.join(dest_dir, "ansible.cfg"))
+        worker = Worker(self.cwd, worker_env)
+        with self.lock:
+            self.workers.append(worker)
+        return worker
+
+    def _discard(self, worker):
+        with self.lock:
+            self.workers.remove(worker)
+        worker.close()
+
+    def close(self):
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.close()
+        self.idle = queue.LifoQueue()
+
+
+if __name__ == "__main__":
+    main()
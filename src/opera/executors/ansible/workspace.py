@@ -0,0 +1,106 @@
+import errno
+import os
+import shutil
+import stat
+import tempfile
+from threading import Lock  # type: ignore # pylint: disable=no-name-in-module
+
+from opera.digest import DigestCache
+
+
+def _link_file(source, target):
+    # Prefer hard links, fall back to symbolic links and copy only if the filesystem supports neither.
+    try:
+        os.link(source, target)
+        return
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES):
+            raise
+    try:
+        os.symlink(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _protect(path):
+    # Cached files are shared by every operation that uses them, so nobody may change them in place.
+    for dir_path, _, file_names in os.walk(path):
+        for name in file_names:
+            file_path = os.path.join(dir_path, name)
+            os.chmod(file_path, stat.S_IMODE(os.stat(file_path).st_mode) & ~0o222)
+    if os.path.isfile(path):
+        os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) & ~0o222)
+
+
+class WorkspaceCache:
+    """
+    Content-addressed store for the files that operations copy into their working directories.
+
+    Every distinct file or directory content is copied into the cache only once per deployment. Operation
+    workspaces then get hard links to the cached copy (or symbolic links, or copies, where the filesystem does not
+    allow hard links). Directories are recreated in every workspace, so new files that an operation creates never
+    leak into the cache.
+    """
+
+    def __init__(self):
+        self.digests = DigestCache()
+        self.root = None
+        self.entries = {}
+        self.locks = {}
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def materialize(self, source, target):
+        digest = self.digests.digest(source)
+        cached = self._entry(digest, source)
+
+        if os.path.isdir(cached):
+            shutil.copytree(cached, target, copy_function=_link_file)
+        else:
+            # a file that is listed more than once (e.g. as an artifact and a dependency) replaces the previous one
+            if os.path.lexists(target) and not os.path.isdir(target):
+                os.unlink(target)
+            _link_file(cached, target)
+
+    def _entry(self, digest, source):
+        with self.lock:
+            if self.root is None:
+                self.root = tempfile.mkdtemp(prefix="opera-workspace-")
+            entry_lock = self.locks.setdefault(digest, Lock())
+
+        with entry_lock:
+            with self.lock:
+                cached = self.entries.get(digest)
+                if cached:
+                    self.hits += 1
+                    return cached
+
+            cached = os.path.join(self.root, digest)
+            if os.path.isdir(source):
+                shutil.copytree(source, cached)
+            else:
+                shutil.copy2(source, cached)
+            _protect(cached)
+
+            with self.lock:
+                self.entries[digest] = cached
+                self.misses += 1
+            return cached
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, entries=len(self.entries))
+
+    def close(self):
+        with self.lock:
+            root, self.root = self.root, None
+            self.entries = {}
+            self.locks = {}
+        if root:
+            shutil.rmtree(root, onerror=_force_remove)
+
+
+def _force_remove(function, path, _):
+    # read-only files can always be removed, but their parent directories may have lost the write bit on copy
+    os.chmod(os.path.dirname(path), 0o700)
+    function(path)
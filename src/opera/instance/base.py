@@ -24,15 +24,21 @@ class Base:
         self.reset_attributes()
 
     def reset_attributes(self):
-        # We need to copy values because each instance has a separate set of
-        # data. Shared stuff is left in the template. We also make every
-        # property into an attribute as TOSCA standard requires.
+        # Values are shared with the template until the instance writes them, see _write_attribute. We also make
+        # every property into an attribute as TOSCA standard requires.
+        self.invalidate_evaluations()
         self.attributes.update(
-            (k, v.copy())
+            (k, v)
             for k, v in itertools.chain(self.template.properties.items(), self.template.attributes.items())
             if k not in ("tosca_name", "tosca_id", "state")
         )
 
+    def _write_attribute(self, name, present, data):
+        # Attribute values are never modified in place because they can be shared with the template or other
+        # instances. Writes replace them instead.
+        value = self.attributes[name]
+        self.attributes[name] = type(value)(value.type, present, data)
+
     def write(self):
         self.topology.write(self.dump(), self.tosca_id)
 
@@ -46,8 +52,23 @@ class Base:
         return {k: v.dump() for k, v in self.attributes.items()}
 
     def load(self, data):
+        self.invalidate_evaluations()
         for k, v in data.items():
-            self.attributes[k].load(v)
+            self._write_attribute(k, v["is_set"], v["data"])
+
+    def invalidate_evaluations(self, attribute=None):
+        if not self.topology:
+            return
+        if attribute is None:
+            self.topology.evaluations.invalidate_instance(self.tosca_id)
+        else:
+            self.topology.evaluations.invalidate(self.tosca_id, attribute)
+
+    def read_attribute(self, attribute):
+        # reading through here makes cached evaluations that use the attribute depend on it
+        if self.topology:
+            self.topology.evaluations.depend(self.tosca_id, attribute)
+        return self.attributes[attribute].eval(self, attribute)
 
     @property
     def tosca_name(self):
@@ -61,8 +82,8 @@ class Base:
     def state(self):
         state_value = self.attributes["state"].data
         try:
-            return next(s for s in NodeState if s.value == state_value)
-        except StopIteration as e:
+            return NodeState(state_value)
+        except ValueError as e:
             raise DataError(f"Could not find state {state_value} in {list(NodeState)}") from e
 
     def set_state(self, state: NodeState, write=True):
@@ -70,6 +91,13 @@ class Base:
         if write:
             self.write()
 
+    def find_operation(self,
+                       interface: str,
+                       operation_type: Union[StandardInterfaceOperation, ConfigureInterfaceOperation, str]):
+        if isinstance(operation_type, (StandardInterfaceOperation, ConfigureInterfaceOperation)):
+            return self.template.interfaces[interface].operations.get(operation_type.value)
+        return self.template.interfaces[interface].operations.get(operation_type)
+
     def run_operation(self,
                       host: OperationHost,
                       interface: str,
@@ -77,16 +105,16 @@ class Base:
                       verbose: bool,
                       workdir: str,
                       validate: bool = False):
-        if isinstance(operation_type, (StandardInterfaceOperation, ConfigureInterfaceOperation)):
-            operation = self.template.interfaces[interface].operations.get(operation_type.value)
-        else:
-            operation = self.template.interfaces[interface].operations.get(operation_type)
+        operation = self.find_operation(interface, operation_type)
 
         if operation:
             success, outputs, attributes = self.run(operation, host, verbose, workdir, validate)
         else:
             success, outputs, attributes = True, {}, {}
 
+        self.complete_operation(interface, operation, success, outputs, attributes)
+
+    def complete_operation(self, interface, operation, success, outputs, attributes):
         if not success:
             self.set_state(NodeState.ERROR)
             raise OperationError("Failed", self.tosca_name, interface, operation)
@@ -106,7 +134,8 @@ class Base:
             raise DataError(
                 f"Instance has no '{name}' attribute. Available attributes: {', '.join(self.attributes.keys())}"
             )
-        self.attributes[name].set(value)
+        self._write_attribute(name, True, value)
+        self.invalidate_evaluations(name)
 
     @abc.abstractmethod
     def get_host(self, host: OperationHost):
@@ -116,31 +145,42 @@ class Base:
     def map_attribute(self, params, value):
         pass
 
-    def run(self, operation, host: OperationHost, verbose, workdir, validate):
-        # TODO: Respect the timeout option.
+    def prepare_operation(self, operation, host: OperationHost):
         # TODO: Add host validation.
         # TODO: Properly handle SELF - not even sure what this proper way would be at this time.
         actual_host = self.get_host(operation.host or host)
 
         operation_inputs = {k: v.eval(self, k) for k, v in operation.inputs.items()}
+        return actual_host, operation_inputs
 
-        # TODO: Currently when primary is None we skip running the operation. Fix this if needed.
-        if not operation.primary:
-            return True, {}, {}
-
-        # TODO: We print output only when primary is defined so we can run something. Fix this if needed.
-        thread_utils.print_thread(f"    Executing {operation.name} on {self.tosca_id}")
+    def run(self, operation, host: OperationHost, verbose, workdir, validate):
+        with self.topology.session.tracer.span(operation.name, "operation", node=self.tosca_id) as span_args:
+            actual_host, operation_inputs = self.prepare_operation(operation, host)
+
+            # TODO: Currently when primary is None we skip running the operation. Fix this if needed.
+            if not operation.primary:
+                return True, {}, {}
+
+            # TODO: We print output only when primary is defined so we can run something. Fix this if needed.
+            thread_utils.print_thread(f"    Executing {operation.name} on {self.tosca_id}")
+
+            # TODO: Generalize executors.
+            span_args.update(host=actual_host)
+            success, ansible_outputs = ansible.run(
+                actual_host, str(operation.primary),
+                tuple(str(i) for i in operation.dependencies),
+                tuple(str(i) for i in operation.artifacts), operation_inputs, verbose,
+                workdir, validate, self.topology.session, operation.timeout or None
+            )
+            span_args.update(success=success)
+            if not success:
+                return False, {}, {}
 
-        # TODO: Generalize executors.
-        success, ansible_outputs = ansible.run(
-            actual_host, str(operation.primary),
-            tuple(str(i) for i in operation.dependencies),
-            tuple(str(i) for i in operation.artifacts), operation_inputs, verbose,
-            workdir, validate
-        )
-        if not success:
-            return False, {}, {}
+            outputs, attributes = self.resolve_outputs(operation, ansible_outputs)
+            return success, outputs, attributes
 
+    @staticmethod
+    def resolve_outputs(operation, ansible_outputs):
         outputs = []
         unresolved_outputs = []
 
@@ -155,4 +195,4 @@ class Base:
             raise DataError(
                 f"Operation did not return the following outputs: {', '.join(unresolved_outputs)}")
 
-        return success, outputs, ansible_outputs
+        return outputs, ansible_outputs
@@ -0,0 +1,150 @@
+from opera.executors.ansible import ansible
+from opera.threading import utils as thread_utils
+
+# attributes that never change after an instance is created, so reading them does not depend on earlier operations
+STATIC_ATTRIBUTES = frozenset(("tosca_id", "tosca_name"))
+
+
+def _reads_attributes(data):
+    if isinstance(data, dict):
+        if "get_attribute" in data:
+            params = data["get_attribute"]
+            if not isinstance(params, list) or len(params) != 2 or params[1] not in STATIC_ATTRIBUTES:
+                return True
+        return any(_reads_attributes(v) for v in data.values())
+    if isinstance(data, list):
+        return any(_reads_attributes(v) for v in data)
+    return False
+
+
+def reads_attributes(operation):
+    return any(v.present and _reads_attributes(v.data) for v in operation.inputs.values())
+
+
+def shadows(variables, inputs):
+    # None means that the playbooks may set any variable
+    return bool(inputs) and (variables is None or not variables.isdisjoint(inputs))
+
+
+class OperationBatch:
+    """
+    Sequence of instance operations and state changes that runs consecutive operations on one host together.
+
+    When batching is disabled, every call is executed immediately, exactly like calling the instance methods directly.
+    When it is enabled, operations are queued until the batch is flushed, the target host changes or an operation
+    needs to read attributes that queued operations could still change. Queued operations then run as a single
+    playbook and state changes that were queued in between are applied in their original order.
+
+    Inputs of an operation that runs alone are extra variables, which nothing in a playbook overrides. In a batch
+    they are variables of the imported playbook, which facts and registered results take precedence over. So an
+    operation also starts a new batch if queued playbooks may set a variable with the name of one of its inputs, and
+    it runs alone if its own playbook may do so.
+    """
+
+    def __init__(self, enabled, verbose, workdir, validate=False):
+        # validation only checks playbook syntax, so there is nothing to gain from batching it
+        self.enabled = enabled and not validate
+        self.verbose = verbose
+        self.workdir = workdir
+        self.validate = validate
+        self.host = None
+        self.steps = []
+        # variables that the queued playbooks may set, None if they may set any
+        self.variables = frozenset()
+
+    def set_state(self, instance, state):
+        if self.steps:
+            self.steps.append((instance, state, None, None, None))
+        else:
+            instance.set_state(state)
+
+    def run_operation(self, instance, host, interface, operation_type):
+        if not self.enabled:
+            instance.run_operation(host, interface, operation_type, self.verbose, self.workdir, self.validate)
+            return
+
+        operation = instance.find_operation(interface, operation_type)
+        if operation is None:
+            self.steps.append((instance, None, interface, None, None))
+            return
+
+        if reads_attributes(operation):
+            self.flush()
+
+        actual_host, operation_inputs = instance.prepare_operation(operation, host)
+        if not operation.primary:
+            self.steps.append((instance, None, interface, operation, operation_inputs))
+            return
+
+        variables = ansible.settable_variables(
+            str(self.workdir), str(operation.primary), tuple(str(i) for i in operation.dependencies)
+        )
+        alone = shadows(variables, operation_inputs)
+        if alone or shadows(self.variables, operation_inputs) or self.host not in (None, actual_host):
+            self.flush()
+        self.host = actual_host
+        self.steps.append((instance, None, interface, operation, operation_inputs))
+        if alone:
+            self.flush()
+        elif self.variables is not None:
+            self.variables = None if variables is None else self.variables | variables
+
+    def flush(self):
+        steps, self.steps = self.steps, []
+        host, self.host = self.host, None
+        self.variables = frozenset()
+
+        executable = [(instance, operation, inputs) for instance, _, _, operation, inputs in steps
+                      if operation and operation.primary]
+        completed, results = self._execute(host, executable)
+
+        index = 0
+        for instance, state, interface, operation, _ in steps:
+            if state:
+                instance.set_state(state)
+            elif not operation or not operation.primary:
+                instance.complete_operation(interface, operation, True, [], {})
+            elif index < completed:
+                outputs, attributes = instance.resolve_outputs(operation, results[index])
+                instance.complete_operation(interface, operation, True, outputs, attributes)
+                index += 1
+            else:
+                instance.complete_operation(interface, operation, False, [], {})
+
+    def _execute(self, host, executable):
+        if not executable:
+            return 0, []
+
+        if len(executable) == 1:
+            # a single operation keeps the regular invocation where inputs are passed as extra variables
+            instance, operation, inputs = executable[0]
+            thread_utils.print_thread(f"    Executing {operation.name} on {instance.tosca_id}")
+            success, outputs = ansible.run(
+                host, str(operation.primary), tuple(str(i) for i in operation.dependencies),
+                tuple(str(i) for i in operation.artifacts), inputs, self.verbose, self.workdir, False,
+                instance.topology.session, operation.timeout or None
+            )
+            return (1, [outputs]) if success else (0, [])
+
+        thread_utils.print_thread(
+            f"    Executing {', '.join(f'{o.name} on {i.tosca_id}' for i, o, _ in executable)} as one playbook"
+        )
+        return ansible.run_batch(
+            host,
+            [
+                (str(operation.primary), tuple(str(i) for i in operation.dependencies),
+                 tuple(str(i) for i in operation.artifacts), inputs)
+                for _, operation, inputs in executable
+            ],
+            self.verbose, self.workdir, executable[0][0].topology.session,
+            # the batch gets the time of all its operations, unless one of them may run for as long as it needs
+            sum(o.timeout for _, o, _ in executable) if all(o.timeout for _, o, _ in executable) else None
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Operations that were queued before a failure have to run anyway, since they would have run already
+        # without batching. If they fail too, their error is the one that is reported.
+        self.flush()
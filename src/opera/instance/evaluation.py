@@ -0,0 +1,97 @@
+import functools
+import json
+from threading import Lock, local  # type: ignore # pylint: disable=no-name-in-module
+
+
+class EvaluationCache:
+    """
+    Results of TOSCA intrinsic functions, remembered for the lifetime of a topology.
+
+    While a result is being computed, every instance attribute that the computation reads is recorded as one of its
+    dependencies (nested cached results pass their dependencies on to the results that use them). Changing an
+    attribute drops exactly the results that depend on it. Results without attribute dependencies, like most
+    properties, stay valid for as long as the topology exists.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.values = {}
+        self.dependencies = {}
+        # instance id -> attribute name -> keys of results that read it
+        self.dependants = {}
+        # bumped on every invalidation, so results computed from outdated attributes are never stored
+        self.generation = 0
+        self.frames = local()
+        self.hits = 0
+        self.misses = 0
+
+    def _stack(self):
+        if not hasattr(self.frames, "stack"):
+            self.frames.stack = []
+        return self.frames.stack
+
+    def depend(self, instance_id, attribute):
+        stack = self._stack()
+        if stack:
+            stack[-1].add((instance_id, attribute))
+
+    def evaluate(self, key, compute):
+        stack = self._stack()
+        with self.lock:
+            if key in self.values:
+                self.hits += 1
+                if stack:
+                    stack[-1].update(self.dependencies[key])
+                return self.values[key]
+            self.misses += 1
+            generation = self.generation
+
+        frame = set()
+        stack.append(frame)
+        try:
+            value = compute()
+        finally:
+            stack.pop()
+
+        with self.lock:
+            if generation == self.generation:
+                self.values[key] = value
+                self.dependencies[key] = frame
+                for instance_id, attribute in frame:
+                    self.dependants.setdefault(instance_id, {}).setdefault(attribute, set()).add(key)
+        if stack:
+            stack[-1].update(frame)
+        return value
+
+    def _drop(self, keys):
+        for key in keys:
+            self.values.pop(key, None)
+            for instance_id, attribute in self.dependencies.pop(key, ()):
+                self.dependants.get(instance_id, {}).get(attribute, set()).discard(key)
+
+    def invalidate(self, instance_id, attribute):
+        with self.lock:
+            self.generation += 1
+            self._drop(list(self.dependants.get(instance_id, {}).pop(attribute, ())))
+
+    def invalidate_instance(self, instance_id):
+        with self.lock:
+            self.generation += 1
+            for keys in list(self.dependants.pop(instance_id, {}).values()):
+                self._drop(list(keys))
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, entries=len(self.values))
+
+
+def memoized(method):
+    """Cache the results of an instance's intrinsic function in the evaluation cache of its topology."""
+
+    @functools.wraps(method)
+    def wrapper(self, params):
+        if not self.topology:
+            return method(self, params)
+        key = (self.tosca_id, method.__name__, json.dumps(params, sort_keys=True, default=str))
+        return self.topology.evaluations.evaluate(key, lambda: method(self, params))
+
+    return wrapper
@@ -7,6 +7,8 @@ from opera_tosca_parser.parser.tosca.v_1_3.template.trigger import Trigger
 from opera.constants import StandardInterfaceOperation, ConfigureInterfaceOperation, NodeState, OperationHost
 from opera.error import DataError
 from opera.error import ToscaDeviationError
+from opera.instance.batch import OperationBatch
+from opera.instance.evaluation import memoized
 from opera.instance.relationship import Relationship
 from opera.threading import utils as thread_utils
 from opera.value import Value
@@ -14,9 +16,11 @@ from .base import Base
 
 
 class Node(Base):  # pylint: disable=too-many-public-methods
-    def __init__(self, template, topology, instance_id):
+    def __init__(self, template, topology, instance_id, index=0):
         super().__init__(template, topology, instance_id)
 
+        self.index = index  # This is the position of the instance among the instances of its template.
+
         self.in_edges = {}  # This gets filled by other instances for us.
         self.out_edges = {}  # This is what we fill during the linking phase.
         self.notified = False  # This indicates whether the node has been notified.
@@ -30,14 +34,25 @@ class Node(Base):  # pylint: disable=too-many-public-methods
             rname = requirement.name
             self.out_edges[rname] = self.out_edges.get(rname, {})
 
-            target = requirement.target.instance
-            target.in_edges[rname] = target.in_edges.get(rname, {})
+            targets = self.topology.find_node_instances(requirement.target.name)
+            if requirement.relationship.is_a("tosca.relationships.HostedOn"):
+                # Every instance lives on exactly one host, so instances are spread over the host's instances.
+                targets = [targets[self.index % len(targets)]]
+
+            for target in targets:
+                target.in_edges[rname] = target.in_edges.get(rname, {})
+
+                rel_instance = Relationship.instantiate(requirement.relationship, self.topology, self, target)
+                self.out_edges[rname][target.tosca_id] = rel_instance
+                target.in_edges[rname][self.tosca_id] = rel_instance
+                if self.topology.storage:
+                    rel_instance.read()
 
-            rel_instance = Relationship.instantiate(requirement.relationship, self.topology, self, target)
-            self.out_edges[rname][target.tosca_id] = rel_instance
-            target.in_edges[rname][self.tosca_id] = rel_instance
-            target.in_edges[rname][self.tosca_id] = rel_instance
-            rel_instance.read()
+    def set_state(self, state: NodeState, write=True):
+        previous_state = self.state
+        super().set_state(state, write)
+        if state != previous_state:
+            self.topology.node_state_changed(previous_state, state, write)
 
     @property
     def deploying(self):
@@ -60,57 +75,64 @@ class Node(Base):  # pylint: disable=too-many-public-methods
         return self.state == NodeState.ERROR
 
     @property
-    def ready_for_deploy(self):
-        return all(
-            relationship.target.deployed
+    def requirement_targets(self):
+        return [
+            relationship.target
             for requirement_relationships in self.out_edges.values()
             for relationship in requirement_relationships.values()
-        )
+        ]
 
     @property
-    def ready_for_undeploy(self):
-        return all(
-            relationship.source.undeployed
+    def requirement_sources(self):
+        return [
+            relationship.source
             for requirement_relationships in self.in_edges.values()
             for relationship in requirement_relationships.values()
-        )
+        ]
+
+    @property
+    def ready_for_deploy(self):
+        return all(target.deployed for target in self.requirement_targets)
+
+    @property
+    def ready_for_undeploy(self):
+        return all(source.undeployed for source in self.requirement_sources)
 
     def _configure_requirements(self,
                                 source_operation: ConfigureInterfaceOperation,
                                 target_operation: ConfigureInterfaceOperation,
-                                verbose: bool, workdir: str,
-                                validate: bool = False):
+                                batch: OperationBatch):
         for requirement in set(r.name for r in self.template.requirements):
             for relationship in self.out_edges[requirement].values():
-                relationship.run_operation(OperationHost.SOURCE, ConfigureInterfaceOperation.shorthand_name(),
-                                           source_operation, verbose, workdir, validate)
+                batch.run_operation(relationship, OperationHost.SOURCE, ConfigureInterfaceOperation.shorthand_name(),
+                                    source_operation)
 
         for requirement_dependants in self.in_edges.values():
             for relationship in requirement_dependants.values():
-                relationship.run_operation(OperationHost.TARGET, ConfigureInterfaceOperation.shorthand_name(),
-                                           target_operation, verbose, workdir, validate)
+                batch.run_operation(relationship, OperationHost.TARGET, ConfigureInterfaceOperation.shorthand_name(),
+                                    target_operation)
 
     def validate(self, verbose, workdir):
         thread_utils.print_thread(f"  Validating {self.tosca_id}")
 
-        # validate node's deployment
-        self.run_operation(OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.CREATE, verbose, workdir, True)
-        self._configure_requirements(ConfigureInterfaceOperation.PRE_CONFIGURE_SOURCE,
-                                     ConfigureInterfaceOperation.PRE_CONFIGURE_TARGET, verbose, workdir, True)
-        self.run_operation(OperationHost.HOST,
-                           StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.CONFIGURE, verbose, workdir, True)
-        self._configure_requirements(ConfigureInterfaceOperation.POST_CONFIGURE_SOURCE,
-                                     ConfigureInterfaceOperation.POST_CONFIGURE_TARGET, verbose, workdir, True)
-        self.run_operation(OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.START, verbose, workdir, True)
-
-        # validate node's undeployment
-        self.run_operation(OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.STOP, verbose, workdir, True)
-        self.run_operation(OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.DELETE, verbose, workdir, True)
+        with OperationBatch(False, verbose, workdir, validate=True) as batch:
+            # validate node's deployment
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.CREATE)
+            self._configure_requirements(ConfigureInterfaceOperation.PRE_CONFIGURE_SOURCE,
+                                         ConfigureInterfaceOperation.PRE_CONFIGURE_TARGET, batch)
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.CONFIGURE)
+            self._configure_requirements(ConfigureInterfaceOperation.POST_CONFIGURE_SOURCE,
+                                         ConfigureInterfaceOperation.POST_CONFIGURE_TARGET, batch)
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.START)
+
+            # validate node's undeployment
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.STOP)
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.DELETE)
         self.reset_attributes()
         self.write()
 
@@ -120,30 +142,27 @@ class Node(Base):  # pylint: disable=too-many-public-methods
     def deploy(self, verbose, workdir):
         thread_utils.print_thread(f"  Deploying {self.tosca_id}")
 
-        self.set_state(NodeState.CREATING)
-        self.run_operation(OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.CREATE, verbose, workdir)
-        self.set_state(NodeState.CREATED)
-        self.set_state(NodeState.CONFIGURING)
+        with OperationBatch(self.topology.session.batch, verbose, workdir) as batch:
+            batch.set_state(self, NodeState.CREATING)
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.CREATE)
+            batch.set_state(self, NodeState.CREATED)
+            batch.set_state(self, NodeState.CONFIGURING)
 
-        self._configure_requirements(ConfigureInterfaceOperation.PRE_CONFIGURE_SOURCE,
-                                     ConfigureInterfaceOperation.PRE_CONFIGURE_TARGET,
-                                     verbose, workdir)
+            self._configure_requirements(ConfigureInterfaceOperation.PRE_CONFIGURE_SOURCE,
+                                         ConfigureInterfaceOperation.PRE_CONFIGURE_TARGET, batch)
 
-        self.run_operation(OperationHost.HOST,
-                           StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.CONFIGURE,
-                           verbose, workdir)
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.CONFIGURE)
 
-        self._configure_requirements(ConfigureInterfaceOperation.POST_CONFIGURE_SOURCE,
-                                     ConfigureInterfaceOperation.POST_CONFIGURE_TARGET,
-                                     verbose, workdir)
+            self._configure_requirements(ConfigureInterfaceOperation.POST_CONFIGURE_SOURCE,
+                                         ConfigureInterfaceOperation.POST_CONFIGURE_TARGET, batch)
 
-        self.set_state(NodeState.CONFIGURED)
-        self.set_state(NodeState.STARTING)
-        self.run_operation(OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.START, verbose, workdir)
-        self.set_state(NodeState.STARTED)
+            batch.set_state(self, NodeState.CONFIGURED)
+            batch.set_state(self, NodeState.STARTING)
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.START)
+            batch.set_state(self, NodeState.STARTED)
 
         # TODO: Execute various add hooks
         thread_utils.print_thread(f"  Deployment of {self.tosca_id} complete")
@@ -151,15 +170,16 @@ class Node(Base):  # pylint: disable=too-many-public-methods
     def undeploy(self, verbose, workdir):
         thread_utils.print_thread(f"  Undeploying {self.tosca_id}")
 
-        self.set_state(NodeState.STOPPING)
-        self.run_operation(OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.STOP, verbose, workdir)
-        self.set_state(NodeState.CONFIGURED)
+        with OperationBatch(self.topology.session.batch, verbose, workdir) as batch:
+            batch.set_state(self, NodeState.STOPPING)
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.STOP)
+            batch.set_state(self, NodeState.CONFIGURED)
 
-        self.set_state(NodeState.DELETING)
-        self.run_operation(OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
-                           StandardInterfaceOperation.DELETE, verbose, workdir)
-        self.set_state(NodeState.INITIAL)
+            batch.set_state(self, NodeState.DELETING)
+            batch.run_operation(self, OperationHost.HOST, StandardInterfaceOperation.shorthand_name(),
+                                StandardInterfaceOperation.DELETE)
+            batch.set_state(self, NodeState.INITIAL)
 
         # TODO: Execute various remove hooks
 
@@ -213,14 +233,40 @@ class Node(Base):  # pylint: disable=too-many-public-methods
         self.notified = True
         thread_utils.print_thread(f"  Notification on {self.tosca_id} complete")
 
+    @staticmethod
+    def instance_count(template: Template, topology):
+        # The number of instances comes from the default_instances property of a tosca.capabilities.Scalable
+        # capability, which can also be set from inputs. Capabilities only carry the properties that the node
+        # template assigns, so the limits are only checked when they are set there too.
+        for capability in template.capabilities:
+            if "default_instances" not in capability.properties:
+                continue
+
+            limits = {
+                name: Value(None, True, capability.properties[name].data).eval(topology, name)
+                for name in ("default_instances", "min_instances", "max_instances") if name in capability.properties
+            }
+            count = limits["default_instances"]
+            min_instances = limits.get("min_instances", 1)
+            max_instances = limits.get("max_instances", "UNBOUNDED")
+            if not isinstance(count, int) or count < max(min_instances, 1) or (
+                    max_instances != "UNBOUNDED" and count > max_instances):
+                raise DataError(
+                    f"The default_instances of node {template.name} should be a positive integer between "
+                    f"min_instances ({min_instances}) and max_instances ({max_instances}), got {count}."
+                )
+            return count
+        return 1
+
     @staticmethod
     def instantiate(template: Template, topology):
-        # NOTE: This is where we should handle multiple instances.
-        # At the moment, we simply create one instance per node template. But
-        # the algorithm is fully prepared for multiple instances.
-        node_id = template.name + "_0"
-        template.instance = Node(template, topology, node_id)
-        return template.instance
+        instances = [
+            Node(template, topology, f"{template.name}_{i}", i)
+            for i in range(Node.instance_count(template, topology))
+        ]
+        # Templates keep their first instance, which is what functions that address a template by name resolve to.
+        template.instance = instances[0]
+        return instances
 
     def get_host(self, host: OperationHost):
         # TODO: Properly handle situations where multiple hosts are
@@ -243,28 +289,16 @@ class Node(Base):  # pylint: disable=too-many-public-methods
         # 1. Scan requirements for direct compute host and return one.
         # 2. Scan requirements for indirect compute host and return one.
         # 3. Default to localhost.
-        host = next((
-            r.target
-            for r in self.template.requirements
-            if r.relationship.is_a("tosca.relationships.HostedOn") and r.target.is_a("tosca.nodes.Compute")
-        ), None)
-        if host:
-            instance = host.instance
-            return instance.attributes["public_address"].eval(
-                self, "public_address"
-            )
-
-        host = next((
-            r.target.find_host()
-            for r in self.template.requirements
-            if r.relationship.is_a("tosca.relationships.HostedOn")
-        ), None)
-
-        return host or "localhost"
+        host = self.topology.hosts.get(self.tosca_id)
+        if host is None:
+            return "localhost"
+        # cached until the public_address attribute of the compute node changes
+        return host.get_attribute([OperationHost.SELF.value, "public_address"])
 
     #
     # TOSCA functions
     #
+    @memoized
     def get_property(self, params):
         host, prop, *rest = params
 
@@ -310,17 +344,15 @@ class Node(Base):  # pylint: disable=too-many-public-methods
             raise DataError(f"{host} keyword can be only used within relationship template context.")
         else:
             # try to find the property within the TOSCA nodes
-            for node in self.topology.nodes.values():
-                if host == node.template.name or host in node.template.types:
-                    # TODO: Add support for nested property values.
-                    if prop in node.template.properties:
-                        return node.template.properties[prop].eval(self, prop)
+            for node in self.topology.find_node_templates(host):
+                # TODO: Add support for nested property values.
+                if prop in node.properties:
+                    return node.properties[prop].eval(self, prop)
             # try to find the property within the TOSCA relationships
-            for rel in self.topology.template.relationships.values():
-                if host == rel.name or host in rel.types:
-                    # TODO: Add support for nested property values.
-                    if prop in rel.properties:
-                        return rel.properties[prop].eval(self, prop)
+            for rel in self.topology.find_relationship_templates(host):
+                # TODO: Add support for nested property values.
+                if prop in rel.properties:
+                    return rel.properties[prop].eval(self, prop)
             # try to find the property within the connected TOSCA polices
             for policy in self.template.policies:
                 if host == policy.name or host in policy.types:
@@ -336,13 +368,14 @@ class Node(Base):  # pylint: disable=too-many-public-methods
                 f"in the node itself."
             )
 
+    @memoized
     def get_attribute(self, params):
         host, attr, *rest = params
 
         if host == OperationHost.SELF.value:
             # TODO: Add support for nested attribute values once we have data type support.
             if attr in self.attributes:
-                return self.attributes[attr].eval(self, attr)
+                return self.read_attribute(attr)
 
             # Check if there are capability and requirement with the same name.
             if attr in self.out_edges and attr in [c.name for c in self.template.capabilities]:
@@ -354,6 +387,8 @@ class Node(Base):  # pylint: disable=too-many-public-methods
                 raise DataError(f"More than one capability is named '{attr}'.")
 
             if len(capabilities) == 1 and capabilities[0].attributes and len(rest) != 0:
+                # capability attributes can be changed by attribute mapping
+                self.topology.evaluations.depend(self.tosca_id, attr)
                 return capabilities[0].attributes.get(rest[0]).data
 
             # If we have no attribute, try searching for requirement.
@@ -381,17 +416,15 @@ class Node(Base):  # pylint: disable=too-many-public-methods
             raise DataError(f"{host} keyword can be only used within relationship template context.")
         else:
             # try to find the attribute within the TOSCA nodes
-            for node in self.template.topology.nodes.values():
-                if host == node.name or host in node.types:
-                    # TODO: Add support for nested attribute values.
-                    if attr in node.attributes:
-                        return node.attributes[attr].eval(self, attr)
+            for node in self.topology.find_node_templates(host):
+                # TODO: Add support for nested attribute values.
+                if attr in node.attributes:
+                    return node.attributes[attr].eval(self, attr)
             # try to find the attribute within the TOSCA relationships
-            for rel in self.template.topology.relationships.values():
-                if host == rel.name or host in rel.types:
-                    # TODO: Add support for nested attribute values.
-                    if attr in rel.attributes:
-                        return rel.attributes[attr].eval(self, attr)
+            for rel in self.topology.find_relationship_templates(host):
+                # TODO: Add support for nested attribute values.
+                if attr in rel.attributes:
+                    return rel.attributes[attr].eval(self, attr)
 
             raise DataError(
                 f"We were unable to find the attribute: {attr} within the specified modelable entity or keyname: "
@@ -426,6 +459,7 @@ class Node(Base):  # pylint: disable=too-many-public-methods
         if len(capabilities) == 1 and capabilities[0].attributes and len(rest) != 0:
             if rest[0] in capabilities[0].attributes:
                 capabilities[0].attributes[rest[0]] = value
+                self.invalidate_evaluations(attr)
                 attribute_mapped = True
 
         if not attribute_mapped:
@@ -1,6 +1,7 @@
 from opera.constants import OperationHost
 from opera.error import DataError
 from opera.instance.base import Base
+from opera.instance.evaluation import memoized
 
 
 class Relationship(Base):
@@ -22,6 +23,7 @@ class Relationship(Base):
     #
     # TOSCA functions
     #
+    @memoized
     def get_attribute(self, params):
         host, attr, *rest = params
 
@@ -30,7 +32,7 @@ class Relationship(Base):
             if attr not in self.attributes:
                 raise DataError(
                     f"Instance has no '{attr}' attribute. Available attributes: {', '.join(self.attributes)}")
-            return self.attributes[attr].eval(self, attr)
+            return self.read_attribute(attr)
         elif host == OperationHost.SOURCE.value:
             return self.source.get_attribute([OperationHost.SELF.value, attr] + rest)
         elif host == OperationHost.TARGET.value:
@@ -39,17 +41,15 @@ class Relationship(Base):
             raise DataError(f"{host} keyword can be only used within node template context.")
         else:
             # try to find the attribute within the TOSCA nodes
-            for node in self.template.topology.nodes.values():
-                if host == node.name or host in node.types:
-                    # TODO: Add support for nested attribute values.
-                    if attr in node.attributes:
-                        return node.attributes[attr].eval(self, attr)
+            for node in self.topology.find_node_templates(host):
+                # TODO: Add support for nested attribute values.
+                if attr in node.attributes:
+                    return node.attributes[attr].eval(self, attr)
             # try to find the attribute within the TOSCA relationships
-            for rel in self.template.topology.relationships.values():
-                if host == rel.name or host in rel.types:
-                    # TODO: Add support for nested attribute values.
-                    if attr in rel.attributes:
-                        return rel.attributes[attr].eval(self, attr)
+            for rel in self.topology.find_relationship_templates(host):
+                # TODO: Add support for nested attribute values.
+                if attr in rel.attributes:
+                    return rel.attributes[attr].eval(self, attr)
 
             raise DataError(
                 f"We were unable to find the attribute: {attr} within the specified modelable entity or keyname: "
@@ -59,6 +59,7 @@ class Relationship(Base):
                 f"in the relationship itself."
             )
 
+    @memoized
     def get_property(self, params):
         host, prop, *rest = params
 
@@ -76,17 +77,15 @@ class Relationship(Base):
             raise DataError(f"{host} keyword can be only used within node template context.")
         else:
             # try to find the property within the TOSCA nodes
-            for node in self.topology.nodes.values():
-                if host == node.name or host in node.types:
-                    # TODO: Add support for nested property values.
-                    if prop in node.template.properties:
-                        return node.template.properties[prop].eval(self, prop)
+            for node in self.topology.find_node_templates(host):
+                # TODO: Add support for nested property values.
+                if prop in node.properties:
+                    return node.properties[prop].eval(self, prop)
             # try to find the property within the TOSCA relationships
-            for rel in self.topology.relationships.values():
-                if host == rel.name or host in rel.types:
-                    # TODO: Add support for nested property values.
-                    if prop in rel.template.properties:
-                        return rel.template.properties[prop].eval(self, prop)
+            for rel in self.topology.find_relationship_templates(host):
+                # TODO: Add support for nested property values.
+                if prop in rel.properties:
+                    return rel.properties[prop].eval(self, prop)
 
             raise DataError(
                 f"We were unable to find the property: {prop} within the specified modelable entity or keyname: "
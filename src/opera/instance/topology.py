@@ -1,106 +1,218 @@
+from collections import Counter
+from threading import Lock  # type: ignore # pylint: disable=no-name-in-module
 from typing import Optional
 
 from opera_tosca_parser.parser.tosca.v_1_3.template.topology import Topology as Template
 
-from opera.threading import NodeExecutor
-from opera.constants import OperationHost
+from opera.executors.ansible.session import Session
+from opera.threading import DependencyScheduler, NodeExecutor
+from opera.threading.estimate import Eta, bottom_levels, estimate_durations, update_durations
+from opera.constants import NodeState, OperationHost
 from opera.error import DataError
+from .evaluation import EvaluationCache
 from .node import Node
 from .relationship import Relationship
 
 
+DEPLOYING_STATES = (NodeState.CREATING, NodeState.CREATED, NodeState.CONFIGURING, NodeState.STARTING)
+UNDEPLOYING_STATES = (NodeState.STOPPING, NodeState.DELETING)
+
+
+def summarize_status(state_counts, total):
+    if any(state_counts[s] for s in DEPLOYING_STATES):
+        return "deploying"
+
+    if state_counts[NodeState.STARTED] == total:
+        return "deployed"
+
+    if any(state_counts[s] for s in UNDEPLOYING_STATES):
+        return "undeploying"
+
+    if state_counts[NodeState.INITIAL] == total:
+        return "undeployed"
+
+    if state_counts[NodeState.ERROR]:
+        return "error"
+
+    return "unknown"
+
+
+def index_templates(templates):
+    # template name and every type in its hierarchy -> templates, in their original order
+    index = {}
+    for template in templates:
+        for key in dict.fromkeys((template.name, *template.types)):
+            index.setdefault(key, []).append(template)
+    return index
+
+
+def resolve_hosts(nodes):
+    # node -> compute node at the bottom of its HostedOn chain, or None for nodes that run on the orchestrator
+    hosts = {}
+
+    def resolve(node):
+        if node not in hosts:
+            hosted_on = [
+                relationship.target
+                for requirement_relationships in node.out_edges.values()
+                for relationship in requirement_relationships.values()
+                if relationship.template.is_a("tosca.relationships.HostedOn")
+            ]
+            host = next((t for t in hosted_on if t.template.is_a("tosca.nodes.Compute")), None)
+            if host is None and hosted_on:
+                host = resolve(hosted_on[0])
+            hosts[node] = host
+        return hosts[node]
+
+    for node in nodes:
+        resolve(node)
+    return hosts
+
+
 class Topology:  # pylint: disable=too-many-public-methods
     def __init__(self, template, storage=None):
         self.storage = storage
-        self.nodes = {n.tosca_id: n for n in (Node.instantiate(node, self) for node in template.nodes.values())}
+        self.evaluations = EvaluationCache()
+        # all stored instance states are loaded at once and handed out while the instances are being created
+        self.preloaded = self.storage.read_instances() if self.storage else None
+        self.template = template
+        # node template name -> instances of the template
+        self.node_instances = {name: Node.instantiate(node, self) for name, node in template.nodes.items()}
+        self.nodes = {n.tosca_id: n for instances in self.node_instances.values() for n in instances}
         self.relationships = {r.tosca_id: r for r in (Relationship.instantiate(relationship, self)
                               for relationship in template.relationships.values())}
-        self.template = template
+        self.session = Session()
+        self.node_index = index_templates(template.nodes.values())
+        self.relationship_index = index_templates(template.relationships.values())
 
         for node in self.nodes.values():
             node.instantiate_relationships()
             if self.storage:
                 node.read()
+        self.preloaded = None
+        # the HostedOn tree does not change, only the addresses of compute nodes do
+        self.hosts = {n.tosca_id: h for n, h in resolve_hosts(self.nodes.values()).items()}
 
-    def status(self):
-        if any(node.deploying for node in self.nodes.values()):
-            return "deploying"
-
-        if all(node.deployed for node in self.nodes.values()):
-            return "deployed"
+        # Node state counts are kept up to date on every state change, so that the status never needs a full scan.
+        self.state_lock = Lock()
+        self.state_counts = Counter(node.state for node in self.nodes.values())
+        self.stored_status = None
+        # a topology that another one replaces in the same storage folder leaves the status summary to that one
+        self.reports_status = True
 
-        if any(node.undeploying for node in self.nodes.values()):
-            return "undeploying"
-
-        if all(node.undeployed for node in self.nodes.values()):
-            return "undeployed"
-
-        if any(node.error for node in self.nodes.values()):
-            return "error"
-
-        return "unknown"
+    def status(self):
+        return summarize_status(self.state_counts, len(self.nodes))
+
+    def node_state_changed(self, old_state, new_state, write=True):
+        with self.state_lock:
+            self.state_counts[old_state] -= 1
+            self.state_counts[new_state] += 1
+            # the summary only needs rewriting when the status that it reports changes and the state is saved
+            if write and self.status() != self.stored_status:
+                self.write_status()
+
+    def write_status(self):
+        if not self.storage or not self.reports_status:
+            return
+        self.stored_status = self.status()
+        self.storage.write_json(dict(
+            status=self.stored_status,
+            nodes=len(self.nodes),
+            states={state.value: count for state, count in self.state_counts.items() if count},
+        ), "status")
 
     def validate(self, verbose, workdir, num_workers=None):
-        # Currently, we are running a really stupid O(n^3) algorithm, but unless we get to the templates with
-        # millions of node instances, we should be fine.
-        with NodeExecutor(num_workers) as executor:
-            do_validate = True
-            while do_validate:
-                for node in self.nodes.values():
-                    if not node.validated and executor.can_submit(node.tosca_id):
-                        executor.submit_operation(node.validate, node.tosca_id, verbose, workdir)
-                do_validate = executor.wait_results()
+        self._walk("validate", lambda node: node.validated, lambda node: (), num_workers, verbose, workdir)
 
     def deploy(self, verbose, workdir, num_workers=None):
-        # Currently, we are running a really stupid O(n^3) algorithm, but unless we get to the templates with
-        # millions of node instances, we should be fine.
-        with NodeExecutor(num_workers) as executor:
-            do_deploy = True
-            while do_deploy:
-                for node in self.nodes.values():
-                    if (not node.deployed
-                            and node.ready_for_deploy
-                            and executor.can_submit(node.tosca_id)):
-                        executor.submit_operation(node.deploy, node.tosca_id, verbose, workdir)
-                do_deploy = executor.wait_results()
+        # A node can be deployed once all nodes that it requires are deployed.
+        self._walk("deploy", lambda node: node.deployed, lambda node: node.requirement_targets, num_workers,
+                   verbose, workdir)
 
     def undeploy(self, verbose, workdir, num_workers=None):
-        # Currently, we are running a really stupid O(n^3) algorithm, but unless we get to the templates with
-        # millions of node instances, we should be fine.
-        with NodeExecutor(num_workers) as executor:
-            do_undeploy = True
-            while do_undeploy:
-                for node in self.nodes.values():
-                    if (not node.undeployed
-                            and node.ready_for_undeploy
-                            and executor.can_submit(node.tosca_id)):
-                        executor.submit_operation(node.undeploy, node.tosca_id, verbose, workdir)
-                do_undeploy = executor.wait_results()
+        # A node can be undeployed once all nodes that require it are undeployed.
+        self._walk("undeploy", lambda node: node.undeployed, lambda node: node.requirement_sources, num_workers,
+                   verbose, workdir)
 
     def notify(self, verbose: bool, workdir: str, trigger_name_or_event: Optional[str],
                notification_file_contents: Optional[str], num_workers=1):
         # This will run selected interface operations on triggers from policies that have been applied to nodes.
-        with NodeExecutor(num_workers) as executor:
-            do_notify = True
-            while do_notify:
-                for node in self.nodes.values():
-                    if not node.notified and executor.can_submit(node.tosca_id):
-                        executor.submit_operation(node.notify, node.tosca_id, verbose, workdir, trigger_name_or_event,
-                                                  notification_file_contents)
-                do_notify = executor.wait_results()
+        self._walk("notify", lambda node: node.notified, lambda node: (), num_workers, verbose, workdir,
+                   trigger_name_or_event, notification_file_contents)
+
+    def _walk(self, operation, done, dependencies, num_workers, verbose, workdir, *args):
+        executor = NodeExecutor(num_workers, self.session.tracer)
+        # Nodes that start the longest remaining chains are submitted first, so they do not wait behind cheap ones
+        # when workers are scarce. Chains are weighed by the durations of earlier runs or by their number of nodes.
+        history = self.read_durations(operation)
+        durations, _ = estimate_durations([i for i, n in self.nodes.items() if not done(n)], history)
+        dependency_ids = self.dependency_ids(dependencies)
+        priorities = bottom_levels(durations, dependency_ids)
+        # the remaining time can only be estimated once the operation has run before
+        eta = Eta(durations, dependency_ids, executor.num_workers, priorities) if history else None
+        scheduler = DependencyScheduler(self.nodes.values(), done, dependencies, eta, priorities, self.session.limits)
+        try:
+            with executor, self.session:
+                scheduler.run(executor, operation, verbose, workdir, *args)
+                if verbose:
+                    print(f"Executor statistics: {self.session.stats()}")
+                    print(f"Evaluation cache statistics: {self.evaluations.stats()}")
+        finally:
+            self.record_durations(operation, executor.durations)
+            if self.storage:
+                with self.state_lock:
+                    self.write_status()
+                self.storage.compact()
+
+    def read_durations(self, operation):
+        """Return the moving averages of how long the operation (deploy, undeploy, ...) took for each node."""
+        if not self.storage or not self.storage.exists("durations"):
+            return {}
+        return self.storage.read_json("durations").get(operation, {})
+
+    def record_durations(self, operation, samples):
+        if not self.storage or not samples:
+            return
+        durations = self.storage.read_json("durations") if self.storage.exists("durations") else {}
+        durations[operation] = update_durations(durations.get(operation, {}), samples)
+        self.storage.write_json(durations, "durations")
+
+    def dependency_ids(self, dependencies):
+        return {node_id: [d.tosca_id for d in dependencies(node)] for node_id, node in self.nodes.items()}
 
     def write(self, data, instance_id):
-        self.storage.write_json(data, "instances", instance_id)
+        self.storage.write_instance(data, instance_id)
 
     def write_all(self):
-        for node in self.nodes.values():
-            node.write()
+        self.storage.write_instances({node.tosca_id: node.dump() for node in self.nodes.values()})
+        with self.state_lock:
+            self.write_status()
+
+    def read_all(self):
+        # all instance states are loaded with one storage read
+        self.preloaded = self.storage.read_instances()
+        try:
+            for node in self.nodes.values():
+                node.read()
+        finally:
+            self.preloaded = None
+        with self.state_lock:
+            self.state_counts = Counter(node.state for node in self.nodes.values())
 
     def read(self, instance_id):
-        return self.storage.read_json("instances", instance_id)
+        if self.preloaded is not None:
+            if instance_id not in self.preloaded:
+                raise FileNotFoundError(f"There is no state for instance '{instance_id}'.")
+            return self.preloaded[instance_id]
+        return self.storage.read_instance(instance_id)
 
     def set_storage(self, storage):
         self.storage = storage
+        # the summary in the new storage folder is unknown
+        self.stored_status = None
+
+    def set_session(self, session):
+        self.session = session
 
     @staticmethod
     def instantiate(template: Template, storage=None):
@@ -131,12 +243,21 @@ class Topology:  # pylint: disable=too-many-public-methods
 
         return self.template.nodes[node_name].instance
 
+    def find_node_instances(self, node_name):
+        return self.node_instances.get(node_name, [])
+
     def find_relationship(self, relationship_name):
         if relationship_name not in self.template.relationships:
             return None
 
         return self.template.relationships[relationship_name].instance
 
+    def find_node_templates(self, name_or_type):
+        return self.node_index.get(name_or_type, ())
+
+    def find_relationship_templates(self, name_or_type):
+        return self.relationship_index.get(name_or_type, ())
+
     #
     # TOSCA functions
     #
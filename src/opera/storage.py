@@ -1,17 +1,171 @@
 import json
+import os
 import pathlib
 import shutil
+import sqlite3
+import tempfile
+from threading import Lock  # type: ignore # pylint: disable=no-name-in-module
+
+from opera.error import DataError
+
+# read the umask once, while importing is still single threaded, so that new files get the usual permissions
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _fsync_directory(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path, content):
+    # Readers (and a crashed opera) only ever see the old or the new file, never a partially written one.
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            os.fchmod(tmp.fileno(), 0o666 & ~_UMASK)
+            tmp.write(content)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class InstanceJournal:
+    """
+    Write-ahead log of instance states.
+
+    Every instance write appends one line with the complete instance state to the journal. Threads that write at the
+    same time share an fsync (group commit). Once the journal grows long enough, or when a lifecycle run ends, the
+    latest states are written into the per-instance snapshot files with atomic renames and the journal is dropped.
+    Replaying the journal on open restores the states that were written after the last compaction, so resuming an
+    interrupted deployment sees every completed write.
+    """
+
+    NAME = ".journal"
+    COMPACT_THRESHOLD = 1000
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = directory / self.NAME
+        self.lock = Lock()
+        self.sync_lock = Lock()
+        # serialized latest state of every instance that was written since the last compaction
+        self.states = {}
+        self.fd = None
+        self.entries = 0
+        self.written = 0
+        self.synced = 0
+        self._replay()
+
+    def _replay(self):
+        try:
+            with open(self.path, encoding="utf-8") as fd:
+                for line in fd:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # the last write was torn by a crash and never committed
+                    self.states[entry["id"]] = json.dumps(entry["data"])
+                    self.entries += 1
+        except FileNotFoundError:
+            pass
+
+    def get(self, instance_id):
+        with self.lock:
+            state = self.states.get(instance_id)
+        return None if state is None else json.loads(state)
+
+    def ids(self):
+        with self.lock:
+            return list(self.states)
+
+    def append(self, instance_id, data):
+        state = json.dumps(data)
+        with self.lock:
+            if self.fd is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self.fd = open(self.path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+            self.fd.write(f'{{"id": {json.dumps(instance_id)}, "data": {state}}}\n')
+            self.states[instance_id] = state
+            self.entries += 1
+            self.written += 1
+            sequence = self.written
+
+        self._commit(sequence)
+        if self.entries >= self.COMPACT_THRESHOLD:
+            self.compact()
+
+    def _commit(self, sequence):
+        with self.sync_lock:
+            # somebody else's fsync may have covered our write while we were waiting
+            if self.synced >= sequence:
+                return
+            with self.lock:
+                self.fd.flush()
+                target = self.written
+            os.fsync(self.fd.fileno())
+            self.synced = target
+
+    def compact(self):
+        with self.sync_lock, self.lock:
+            if self.entries == 0:
+                return
+
+            for instance_id, state in self.states.items():
+                _atomic_write(self.directory / instance_id, json.dumps(json.loads(state), indent=2))
+            _fsync_directory(self.directory)
+
+            # snapshots are durable now, so the journal is not needed anymore
+            if self.fd:
+                self.fd.close()
+                self.fd = None
+            if self.path.exists():
+                self.path.unlink()
+            self.states = {}
+            self.entries = 0
+            self.synced = self.written
+
+    def close(self):
+        with self.sync_lock, self.lock:
+            if self.fd:
+                self.fd.close()
+                self.fd = None
+
+
+def _instance_state(data):
+    return data.get("state", {}).get("data")
 
 
 class Storage:
     DEFAULT_INSTANCE_PATH = ".opera"
+    INSTANCES = "instances"
+    BACKENDS = ("json", "sqlite")
 
     @classmethod
     def create(cls, instance_path: str = None) -> "Storage":
-        return Storage(pathlib.Path(instance_path or cls.DEFAULT_INSTANCE_PATH))
+        path = pathlib.Path(instance_path or cls.DEFAULT_INSTANCE_PATH)
+        backend = os.environ.get("OPERA_STORAGE_BACKEND")
+        if backend is None:
+            # keep using whatever backend an existing storage folder was created with
+            backend = "sqlite" if (path / SqliteStorage.DATABASE).exists() else "json"
+        if backend not in cls.BACKENDS:
+            raise DataError(f"Invalid storage backend: '{backend}'. Valid backends are: {', '.join(cls.BACKENDS)}.")
+
+        if backend == "sqlite":
+            return SqliteStorage(path)
+        return Storage(path)
 
     def __init__(self, path):
         self.path = path.absolute()
+        self.journal_lock = Lock()
+        self.journal = None
 
         path.mkdir(exist_ok=True)
 
@@ -19,7 +173,7 @@ class Storage:
         *subpath, name = path
         dir_path = self.path / pathlib.PurePath(*subpath)
         dir_path.mkdir(exist_ok=True, parents=True)
-        (dir_path / name).write_text(content)
+        _atomic_write(dir_path / name, content)
 
     def read(self, *path):
         return (self.path / pathlib.PurePath(*path)).read_text()
@@ -34,10 +188,166 @@ class Storage:
         return (self.path / pathlib.PurePath(*path)).exists()
 
     def remove(self, *path):
+        if path[:1] == (self.INSTANCES,) or not path:
+            self._drop_journal()
         if self.exists(*path):
             shutil.rmtree(self.path / pathlib.PurePath(*path))
 
     def remove_all(self):
+        self._drop_journal()
         shutil.rmtree(self.path)
         # the storage dir needs to exist after we delete the content
         pathlib.Path(self.path).mkdir(exist_ok=True)
+
+    def _instance_journal(self):
+        with self.journal_lock:
+            if self.journal is None:
+                self.journal = InstanceJournal(self.path / self.INSTANCES)
+            return self.journal
+
+    def _drop_journal(self):
+        with self.journal_lock:
+            journal, self.journal = self.journal, None
+        if journal:
+            journal.close()
+
+    def write_instance(self, data, instance_id):
+        self._instance_journal().append(instance_id, data)
+
+    def write_instances(self, instances):
+        for instance_id, data in instances.items():
+            self.write_instance(data, instance_id)
+
+    def read_instance(self, instance_id):
+        data = self._instance_journal().get(instance_id)
+        if data is None:
+            data = self.read_json(self.INSTANCES, instance_id)
+        return data
+
+    def read_instances(self):
+        instances = {}
+        if self.exists(self.INSTANCES):
+            for path in (self.path / self.INSTANCES).iterdir():
+                if not path.name.startswith("."):
+                    instances[path.name] = json.loads(path.read_text())
+        journal = self._instance_journal()
+        for instance_id in journal.ids():
+            instances[instance_id] = journal.get(instance_id)
+        return instances
+
+    def find_instances(self, state):
+        return sorted(i for i, data in self.read_instances().items() if _instance_state(data) == state)
+
+    def compact(self):
+        with self.journal_lock:
+            journal = self.journal
+        if journal:
+            journal.compact()
+
+
+class SqliteStorage(Storage):
+    """
+    Storage that keeps instance states in an SQLite database instead of one JSON file per instance.
+
+    Everything else (inputs, root file, CSARs, ...) stays in plain files. Instance states are indexed by their
+    state, all of them can be loaded with one query and several instances can be written in one transaction. An
+    existing JSON instances folder is imported on first use and kept as a backup.
+    """
+
+    DATABASE = "instances.db"
+    MIGRATED = "instances.json-backup"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.lock = Lock()
+        self.connection = None
+
+    def _connect(self):
+        with self.lock:
+            if self.connection is None:
+                # worker threads share the connection, so the lock above serializes all access to it
+                connection = sqlite3.connect(self.path / self.DATABASE, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                with connection:
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS instances (id TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL)"
+                    )
+                    connection.execute("CREATE INDEX IF NOT EXISTS instances_state ON instances (state)")
+                self.connection = connection
+                self._migrate()
+            return self.connection
+
+    def _migrate(self):
+        json_instances = self.path / self.INSTANCES
+        if not json_instances.is_dir():
+            return
+
+        # states that were still in the journal are newer than the snapshot files
+        journal = InstanceJournal(json_instances)
+        instances = {p.name: json.loads(p.read_text()) for p in json_instances.iterdir() if not p.name.startswith(".")}
+        instances.update((instance_id, journal.get(instance_id)) for instance_id in journal.ids())
+        journal.close()
+
+        self._insert(instances)
+        shutil.rmtree(self.path / self.MIGRATED, ignore_errors=True)
+        json_instances.rename(self.path / self.MIGRATED)
+
+    def _insert(self, instances):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO instances (id, state, data) VALUES (?, ?, ?)",
+                ((i, _instance_state(data), json.dumps(data)) for i, data in instances.items())
+            )
+
+    def _query(self, sql, *params):
+        connection = self._connect()
+        with self.lock:
+            return connection.execute(sql, params).fetchall()
+
+    def exists(self, *path):
+        if path == (self.INSTANCES,):
+            return bool(self._query("SELECT 1 FROM instances LIMIT 1"))
+        return super().exists(*path)
+
+    def remove(self, *path):
+        if path == (self.INSTANCES,):
+            connection = self._connect()
+            with self.lock, connection:
+                connection.execute("DELETE FROM instances")
+            return
+        super().remove(*path)
+
+    def remove_all(self):
+        self.close()
+        super().remove_all()
+
+    def write_instance(self, data, instance_id):
+        self.write_instances({instance_id: data})
+
+    def write_instances(self, instances):
+        self._connect()
+        with self.lock:
+            self._insert(instances)
+
+    def read_instance(self, instance_id):
+        rows = self._query("SELECT data FROM instances WHERE id = ?", instance_id)
+        if not rows:
+            raise FileNotFoundError(f"There is no state for instance '{instance_id}'.")
+        return json.loads(rows[0][0])
+
+    def read_instances(self):
+        return {i: json.loads(data) for i, data in self._query("SELECT id, data FROM instances")}
+
+    def find_instances(self, state):
+        return [row[0] for row in self._query("SELECT id FROM instances WHERE state = ? ORDER BY id", state)]
+
+    def compact(self):
+        # every write is its own transaction already
+        pass
+
+    def close(self):
+        with self.lock:
+            connection, self.connection = self.connection, None
+        if connection:
+            connection.close()
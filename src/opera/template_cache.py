@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import pickle  # nosec
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path, PurePath
+from typing import Optional
+
+from opera_tosca_parser.commands.parse import parse_service_template as parse
+from opera_tosca_parser.error import ParseError
+from opera_tosca_parser.parser import tosca, yaml
+from opera_tosca_parser.parser.tosca.v_1_3 import stdlib
+from opera_tosca_parser.parser.utils.location import Location
+
+from opera.digest import DigestCache
+
+# bump this whenever opera starts to depend on something new in the parsed templates
+CACHE_VERSION = "2"
+
+
+def _version(package):
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def _tracks_imports():
+    # parse_with_imports relies on parser internals, so anything else than the expected parser is not cached
+    return callable(getattr(tosca, "_get_tosca_version", None)) and callable(getattr(tosca, "_get_parser", None))
+
+
+def _enabled():
+    return os.environ.get("OPERA_TEMPLATE_CACHE", "true").lower().strip()[:1] not in ("f", "n", "0")
+
+
+def parse_with_imports(service_template_path: PurePath, inputs: dict):
+    """
+    Parse a service template like opera_tosca_parser does and also return the files that the parser read for it.
+
+    The files are relative to the service template's directory. Imports that the parser resolved outside of it, like
+    URLs that it downloaded, make the files None, because there is no way to tell whether their content changed.
+    """
+    # this mirrors tosca.load_service_template, which does not tell what it imported
+    workdir = Path(service_template_path.parent)
+    name = PurePath(service_template_path.name)
+    with (workdir / name).open() as input_fd:
+        input_yaml = yaml.load(input_fd, str(name))
+    if not isinstance(input_yaml.value, dict):
+        raise ParseError("Top level structure should be a map.", Location(str(name), 0, 0))
+
+    tosca_version = tosca._get_tosca_version(input_yaml)  # pylint: disable=protected-access
+    parser = tosca._get_parser(tosca_version)  # pylint: disable=protected-access
+    if tosca_version == "v_2_0":
+        service, imported = parser.parse_service_template(input_yaml, workdir, name, set())
+    else:
+        service = parser.parse_service_template(stdlib.load(tosca_version), workdir, PurePath("STDLIB"), set())[0]
+        template_service, imported = parser.parse_service_template(input_yaml, workdir, name, set())
+        service.merge(template_service)
+    service.visit("resolve_path", workdir)
+    service.visit("resolve_reference", service)
+
+    files = []
+    for path in imported:
+        if path.is_absolute() or path.parts[:1] == ("..",):
+            return service.get_template(inputs), None
+        # TOSCA 2.0 profiles are no files, they come with the parser like the TOSCA 1.3 normative types
+        if (workdir / path).is_file():
+            files.append(str(path))
+    return service.get_template(inputs), sorted(files)
+
+
+class TemplateCache:
+    """
+    Parsed service templates, kept in the storage folder.
+
+    Entries are keyed by the service template path, the inputs and the content of every file that the parser read
+    for the template, which the cache remembers from the last parse of the same template with the same inputs.
+    Changing any of the files leads to a new key, so stale entries are never used and only the most recently used
+    ones are kept around. Templates that import anything from outside of their directory are not cached.
+    """
+
+    MAX_ENTRIES = 8
+
+    def __init__(self, storage):
+        self.directory = Path(storage.path) / "cache" / "templates"
+        self.imports_directory = Path(storage.path) / "cache" / "imports"
+        self.digests = DigestCache()
+
+    @staticmethod
+    def base_key(service_template_path: PurePath, inputs: dict):
+        service_template_path = Path(service_template_path).absolute()
+        digest = hashlib.sha256()
+        versions = f"{CACHE_VERSION}\n{_version('opera')}\n{_version('opera-tosca-parser')}"
+        digest.update(f"{versions}\n{service_template_path}\n".encode("utf-8"))
+        digest.update(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def key(self, service_template_path: PurePath, inputs: dict):
+        base_key = self.base_key(service_template_path, inputs)
+        path = self.imports_directory / base_key
+        try:
+            with open(path, encoding="utf-8") as fd:
+                files = json.load(fd)
+        except (OSError, ValueError):
+            return None
+
+        os.utime(path)
+        return self._key(base_key, Path(service_template_path).absolute().parent, files)
+
+    def _key(self, base_key, workdir, files):
+        digest = hashlib.sha256(base_key.encode("utf-8"))
+        for relative_path in files:
+            try:
+                file_digest = self.digests.digest(workdir / relative_path)
+            except OSError:
+                return None
+            digest.update(f"\n{relative_path} {file_digest}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        path = self.directory / key
+        try:
+            with open(path, "rb") as fd:
+                template = pickle.load(fd)  # nosec
+        except Exception:  # pylint: disable=broad-except
+            # missing and damaged entries, or ones that fail to unpickle with the current code, are just misses
+            return None
+
+        os.utime(path)
+        return template
+
+    def put(self, key, template):
+        try:
+            content = pickle.dumps(template, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError, TypeError):
+            return
+        self._write(self.directory, key, content)
+
+    def put_imports(self, base_key, files):
+        self._write(self.imports_directory, base_key, json.dumps(files).encode("utf-8"))
+
+    def _write(self, directory, name, content):
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, directory / name)
+        self._prune(directory)
+
+    def _prune(self, directory):
+        entries = sorted(
+            (p for p in directory.iterdir() if not p.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime, reverse=True
+        )
+        for entry in entries[self.MAX_ENTRIES:]:
+            entry.unlink()
+
+    def parse_service_template(self, service_template_path: PurePath, inputs: dict):
+        workdir = Path(service_template_path.parent)
+        key = self.key(service_template_path, inputs)
+        template = self.get(key) if key else None
+        if template is None:
+            template, files = parse_with_imports(service_template_path, inputs)
+            if files is not None:
+                base_key = self.base_key(service_template_path, inputs)
+                self.put_imports(base_key, files)
+                key = self._key(base_key, workdir.absolute(), files)
+                if key:
+                    self.put(key, template)
+        return template, workdir
+
+
+def parse_service_template(service_template_path: PurePath, inputs: Optional[dict], storage=None):
+    """Parse a service template, reusing the result of an earlier parse from the storage folder if possible."""
+    if inputs is None:
+        inputs = {}
+    if storage is None or not _enabled() or not _tracks_imports():
+        return parse(service_template_path, inputs)
+    return TemplateCache(storage).parse_service_template(service_template_path, inputs)
@@ -1,3 +1,6 @@
 from opera.threading.node_executor import (  # noqa: F401
     NodeExecutor
 )
+from opera.threading.scheduler import (  # noqa: F401
+    DependencyScheduler
+)
@@ -0,0 +1,151 @@
+import heapq
+import itertools
+import time
+from collections import deque
+
+# weight of the latest measurement in the moving average of node durations
+SMOOTHING = 0.5
+# the remaining time is estimated at most this often (in seconds) while nodes keep completing
+ETA_INTERVAL = 1.0
+
+
+def update_durations(history, samples, smoothing=SMOOTHING):
+    """Exponentially weighted moving averages of node durations, updated with new measurements."""
+    updated = dict(history)
+    for node_id, duration in samples.items():
+        previous = history.get(node_id)
+        updated[node_id] = duration if previous is None else smoothing * duration + (1 - smoothing) * previous
+    return updated
+
+
+def estimate_durations(node_ids, history):
+    """
+    Durations from history, where nodes without any fall back to the average duration of the others.
+
+    Without any history every node takes a second, so that paths are as long as the number of their nodes.
+    """
+    known = [history[i] for i in node_ids if i in history]
+    default = sum(known) / len(known) if known else 1.0
+    return {i: history.get(i, default) for i in node_ids}, [i for i in node_ids if i not in history]
+
+
+def _graph(durations, dependencies):
+    # dependencies outside of durations are done already, so they are left out
+    pending = {}
+    dependants = {}
+    for node_id in durations:
+        blockers = {d for d in dependencies.get(node_id, ()) if d in durations}
+        pending[node_id] = len(blockers)
+        for blocker_id in blockers:
+            dependants.setdefault(blocker_id, []).append(node_id)
+    return pending, dependants
+
+
+def _order(pending, dependants):
+    # topological order, dependencies before the nodes that wait for them
+    pending = dict(pending)
+    ready = deque(i for i, count in pending.items() if count == 0)
+    while ready:
+        node_id = ready.popleft()
+        yield node_id
+        for dependant_id in dependants.get(node_id, ()):
+            pending[dependant_id] -= 1
+            if pending[dependant_id] == 0:
+                ready.append(dependant_id)
+
+
+def bottom_levels(durations, dependencies):
+    """Length of the longest chain that starts with each node, including the node itself."""
+    pending, dependants = _graph(durations, dependencies)
+    levels = {}
+    for node_id in reversed(list(_order(pending, dependants))):
+        levels[node_id] = durations[node_id] + max((levels[d] for d in dependants.get(node_id, ())), default=0.0)
+    return levels
+
+
+def critical_path(durations, dependencies):
+    """Duration and nodes of the longest chain of dependent nodes, which bounds the duration of the whole run."""
+    pending, dependants = _graph(durations, dependencies)
+    finish = {}
+    previous = {}
+    for node_id in _order(pending, dependants):
+        finish[node_id] = finish.get(previous.get(node_id), 0.0) + durations[node_id]
+        for dependant_id in dependants.get(node_id, ()):
+            if previous.get(dependant_id) is None or finish[node_id] > finish[previous[dependant_id]]:
+                previous[dependant_id] = node_id
+
+    path = []
+    node_id = max(finish, key=finish.get, default=None)
+    length = finish.get(node_id, 0.0)
+    while node_id is not None:
+        path.append(node_id)
+        node_id = previous.get(node_id)
+    return length, path[::-1]
+
+
+def makespan(durations, dependencies, workers, elapsed=None, priorities=None):
+    """
+    Simulate the duration of a run with the given number of workers.
+
+    Ready nodes start on the first free worker like DependencyScheduler runs them, the ones with higher priorities
+    first and otherwise in the order in which they became ready. Nodes in elapsed are already running and have spent
+    that many seconds so far.
+    """
+    elapsed = elapsed or {}
+    priorities = priorities or {}
+    pending, dependants = _graph(durations, dependencies)
+    sequence = itertools.count()
+    ready = [(-priorities.get(i, 0), next(sequence), i) for i, count in pending.items()
+             if count == 0 and i not in elapsed]
+    heapq.heapify(ready)
+    running = [(max(durations[i] - spent, 0.0), i) for i, spent in elapsed.items() if i in durations]
+    heapq.heapify(running)
+
+    now = 0.0
+    while ready or running:
+        while ready and len(running) < workers:
+            node_id = heapq.heappop(ready)[2]
+            heapq.heappush(running, (now + durations[node_id], node_id))
+        now, node_id = heapq.heappop(running)
+        for dependant_id in dependants.get(node_id, ()):
+            pending[dependant_id] -= 1
+            if pending[dependant_id] == 0:
+                heapq.heappush(ready, (-priorities.get(dependant_id, 0), next(sequence), dependant_id))
+    return now
+
+
+def useful_workers(durations, dependencies, priorities=None):
+    """Smallest number of workers that runs as fast as unlimited workers do, more workers stop helping there."""
+    fastest = makespan(durations, dependencies, max(len(durations), 1), priorities=priorities)
+    # list scheduling can get slower with more workers in rare cases, so this is a good guess rather than the minimum
+    low, high = 1, max(len(durations), 1)
+    while low < high:
+        middle = (low + high) // 2
+        if makespan(durations, dependencies, middle, priorities=priorities) <= fastest + 1e-9:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+class Eta:
+    """Remaining time of a run, estimated from historical node durations as nodes complete."""
+
+    def __init__(self, durations, dependencies, workers, priorities=None):
+        self.durations = durations
+        self.dependencies = dependencies
+        self.workers = workers
+        self.priorities = priorities
+        self.completed = set()
+        self.last = None
+
+    def remaining(self, completed, running):
+        """Estimate after the completed nodes are done, or None if the last estimate is too recent."""
+        self.completed.update(completed)
+        now = time.monotonic()
+        if self.last is not None and now - self.last < ETA_INTERVAL:
+            return None
+        self.last = now
+
+        durations = {i: d for i, d in self.durations.items() if i not in self.completed}
+        return makespan(durations, self.dependencies, self.workers, running, self.priorities)
@@ -0,0 +1,71 @@
+from collections import Counter
+
+import yaml
+
+from opera.error import DataError
+
+
+class ConcurrencyLimits:
+    """
+    Caps on nodes that run at the same time on one host or with one node type, on top of the number of workers.
+
+    Hosts are the addresses that Node.find_host returns, so all nodes that are hosted on the same compute node share
+    its cap, and nodes without a host share the localhost cap. A node counts towards the cap of every node type that
+    it is, including its parent types. Only the thread that schedules nodes uses the limits.
+    """
+
+    def __init__(self, per_host=None, hosts=None, types=None):
+        self.per_host = per_host
+        self.hosts = hosts or {}
+        self.types = types or {}
+        for name, limit in [("per_host", per_host), *self.hosts.items(), *self.types.items()]:
+            if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 1):
+                raise DataError(f"Concurrency limit for {name} must be a positive number, got {limit}.")
+
+        self.running = Counter()
+        # node id -> groups that the node counts towards while it runs
+        self.acquired = {}
+
+    @classmethod
+    def load(cls, path=None, per_host=None):
+        """Limits from a YAML file with optional per_host, hosts and types keys, per_host can be overridden."""
+        if path is None:
+            return cls(per_host)
+
+        try:
+            with open(path, encoding="utf-8") as fd:
+                config = yaml.safe_load(fd) or {}
+        except (OSError, yaml.YAMLError) as e:
+            raise DataError(f"Cannot read concurrency limits from {path}: {e}") from e
+        if not isinstance(config, dict) or set(config) - {"per_host", "hosts", "types"}:
+            raise DataError(f"Concurrency limits in {path} can only set per_host, hosts and types.")
+
+        return cls(
+            per_host if per_host is not None else config.get("per_host"),
+            {str(host): limit for host, limit in (config.get("hosts") or {}).items()},
+            config.get("types") or {},
+        )
+
+    def groups(self, node):
+        groups = [(("type", name), limit) for name, limit in self.types.items() if node.template.is_a(name)]
+        if self.per_host is not None or self.hosts:
+            host = node.find_host()
+            limit = self.hosts.get(host, self.per_host)
+            if limit is not None:
+                groups.append((("host", host), limit))
+        return groups
+
+    def acquire(self, node):
+        """Count the node towards its caps and return True, or return False if one of them is full."""
+        groups = self.groups(node)
+        if any(self.running[group] >= limit for group, limit in groups):
+            return False
+
+        for group, _ in groups:
+            self.running[group] += 1
+        self.acquired[node.tosca_id] = [group for group, _ in groups]
+        return True
+
+    def release(self, node_id):
+        for group in self.acquired.pop(node_id, ()):
+            self.running[group] -= 1
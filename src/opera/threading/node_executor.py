@@ -1,36 +1,68 @@
+import os
+import time
 from concurrent.futures import ThreadPoolExecutor, wait
 from concurrent.futures._base import CancelledError
+from threading import BoundedSemaphore  # type: ignore # pylint: disable=no-name-in-module
 
 from opera.error import AggregatedOperationError, OperaError
+from opera.tracing import Tracer
 
 WORKER_PREFIX = "Worker"
 
 
+def default_workers():
+    return os.cpu_count() or 1
+
+
 class NodeExecutor(ThreadPoolExecutor):
-    def __init__(self, num_workers=None):
+    def __init__(self, num_workers=None, tracer=None):
+        if num_workers is None:
+            num_workers = default_workers()
+        if num_workers < 1:
+            raise ValueError(f"Number of workers must be a positive number, got {num_workers}.")
+
         super().__init__(
             max_workers=num_workers,
             thread_name_prefix=WORKER_PREFIX
         )
         self.futures = {}
-        self.processed_nodes = set()
         self.num_workers = num_workers
+        # Admission control: a slot is taken before submitting an operation and given back when its future is
+        # done, so the number of in-flight operations can never exceed the number of workers.
+        self.slots = BoundedSemaphore(num_workers)
+        self.tracer = tracer or Tracer()
+        # node id -> seconds that its operation took, for the nodes that completed successfully
+        self.durations = {}
 
-    def can_submit(self, node_id):
-        return len(self.processed_nodes) < self.num_workers and node_id not in self.processed_nodes
+    def acquire_slot(self):
+        return self.slots.acquire(blocking=False)
+
+    def release_slot(self):
+        self.slots.release()
 
     def submit_operation(self, operation, node_id, verbose, workdir, *args):
-        self.processed_nodes.add(node_id)
-        self.futures[self.submit(operation, verbose, workdir, *args)] = node_id
+        """Submit an operation for a node. The caller must hold a slot obtained with acquire_slot()."""
+        future = self.submit(self._run_in_slot, operation, node_id, self.tracer.now(), verbose, workdir, *args)
+        self.futures[future] = node_id
 
-    def wait_results(self):
-        proceed = bool(self.futures)
+    def _run_in_slot(self, operation, node_id, submitted, *args):
+        # The slot is released before the future resolves, so whoever wakes up on the result can reuse it at once.
+        try:
+            self.tracer.wait(node_id, "queue", submitted)
+            with self.tracer.span(node_id, "node", operation=operation.__name__):
+                start = time.monotonic()
+                result = operation(*args)
+                self.durations[node_id] = time.monotonic() - start
+                return result
+        finally:
+            self.slots.release()
 
+    def wait_results(self):
         results = wait(
             self.futures,
             return_when="FIRST_COMPLETED"
         )
-        errors = self.process_results(results)
+        completed, errors = self.process_results(results)
 
         if errors:
             # if errors occurred
@@ -42,21 +74,22 @@ class NodeExecutor(ThreadPoolExecutor):
             # wait for all running operations to complete
             # and halt execution
             results = wait(running, return_when="ALL_COMPLETED")
-            errors.update(self.process_results(results))
+            errors.update(self.process_results(results)[1])
             for node_id, error in errors.items():
                 print(f"Error processing node {node_id}: {error}")
             raise AggregatedOperationError("Failed", errors)
 
-        return proceed
+        return completed
 
     def process_results(self, results):
+        completed = []
         errors = {}
         for future in results.done:
             node_id = self.futures.pop(future)
             try:
                 future.result()
-                self.processed_nodes.remove(node_id)
+                completed.append(node_id)
             except (CancelledError, TimeoutError, OperaError) as e:
                 errors[node_id] = e
 
-        return errors
+        return completed, errors
@@ -0,0 +1,105 @@
+import heapq
+import itertools
+import time
+
+from opera.threading import utils as thread_utils
+
+
+class DependencyScheduler:
+    """
+    Feed a NodeExecutor from a ready queue that is driven by dependency counters.
+
+    Ready nodes with higher priorities are submitted first and nodes with equal priorities in the order in which they
+    became ready. Without priorities this is a FIFO queue. Ready nodes that would exceed one of their concurrency limits
+    wait until a node that counts towards the same limit completes.
+    """
+
+    def __init__(self, nodes, done, dependencies, eta=None, priorities=None, limits=None):
+        self.nodes = {node.tosca_id: node for node in nodes}
+        # number of unfinished dependencies for every node that still needs processing
+        self.pending = {}
+        # reverse edges: node id -> ids of nodes that wait for it
+        self.dependants = {}
+        # heap of (-priority, sequence number, node id)
+        self.ready = []
+        self.priorities = priorities or {}
+        self.sequence = itertools.count()
+        # optional opera.threading.estimate.Eta that reports the remaining time as nodes complete
+        self.eta = eta
+        self.started = {}
+        # optional opera.threading.limits.ConcurrencyLimits
+        self.limits = limits
+
+        for node_id, node in self.nodes.items():
+            if done(node):
+                continue
+
+            # dependencies that are already done will never complete again, so we leave them out of the counters
+            blockers = {d.tosca_id for d in dependencies(node) if not done(d)}
+            self.pending[node_id] = len(blockers)
+            for blocker_id in blockers:
+                self.dependants.setdefault(blocker_id, []).append(node_id)
+
+            if not blockers:
+                self.push_ready(node_id)
+
+    def push_ready(self, node_id):
+        heapq.heappush(self.ready, (-self.priorities.get(node_id, 0), next(self.sequence), node_id))
+
+    def take_ready(self):
+        # the ready node with the highest priority that its limits admit, or None if they admit none of them
+        if self.limits is None:
+            return heapq.heappop(self.ready)[2]
+
+        blocked = []
+        node_id = None
+        while self.ready:
+            entry = heapq.heappop(self.ready)
+            if self.limits.acquire(self.nodes[entry[2]]):
+                node_id = entry[2]
+                break
+            blocked.append(entry)
+        for entry in blocked:
+            heapq.heappush(self.ready, entry)
+        return node_id
+
+    def run(self, executor, operation, verbose, workdir, *args):
+        while True:
+            while self.ready and executor.acquire_slot():
+                node_id = self.take_ready()
+                if node_id is None:
+                    # all ready nodes wait for a host or a node type that is at its limit
+                    executor.release_slot()
+                    break
+                node = self.nodes[node_id]
+                self.started[node.tosca_id] = time.monotonic()
+                executor.submit_operation(getattr(node, operation), node.tosca_id, verbose, workdir, *args)
+
+            completed = executor.wait_results()
+            if not completed:
+                # nothing was in flight and nothing is ready, so we are done
+                break
+
+            for node_id in completed:
+                self.complete(node_id)
+            self.report_eta(completed)
+
+    def complete(self, node_id):
+        self.started.pop(node_id, None)
+        if self.limits is not None:
+            self.limits.release(node_id)
+        for dependant_id in self.dependants.pop(node_id, ()):
+            self.pending[dependant_id] -= 1
+            if self.pending[dependant_id] == 0:
+                self.push_ready(dependant_id)
+
+    def report_eta(self, completed):
+        if self.eta is None:
+            return
+
+        now = time.monotonic()
+        remaining = self.eta.remaining(completed, {i: now - start for i, start in self.started.items()})
+        if remaining is not None:
+            thread_utils.print_thread(
+                f"  {len(self.eta.completed)}/{len(self.eta.durations)} nodes done, about {remaining:.0f}s left"
+            )
@@ -0,0 +1,78 @@
+import itertools
+import json
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock, current_thread, get_ident  # type: ignore # pylint: disable=no-name-in-module
+
+
+class Tracer:
+    """
+    Timing spans of a lifecycle run in the Chrome trace event format.
+
+    The saved file can be opened with Perfetto (https://ui.perfetto.dev) or chrome://tracing. Spans are shown per
+    thread, so every worker gets its own track. A tracer without a path records nothing, which keeps the spans that
+    are placed around operations cheap when tracing is not requested.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.events = []
+        self.threads = {}
+        self.ids = itertools.count()
+        self.lock = Lock()
+        self.start = time.perf_counter()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def now(self):
+        # timestamps are microseconds since the tracer was created
+        return (time.perf_counter() - self.start) * 1e6
+
+    def _record(self, event):
+        thread_id = get_ident()
+        event.update(pid=os.getpid(), tid=thread_id)
+        with self.lock:
+            self.threads.setdefault(thread_id, current_thread().name)
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, category, **args):
+        # the span yields its args, so the code that it measures can add details that are only known later on
+        if not self.enabled:
+            yield args
+            return
+
+        start = self.now()
+        try:
+            yield args
+        finally:
+            self._record(dict(name=name, cat=category, ph="X", ts=start, dur=self.now() - start, args=args))
+
+    def wait(self, name, category, start, **args):
+        """Record the time from start until now that was spent waiting rather than running on some thread."""
+        if not self.enabled:
+            return
+
+        # asynchronous events get their own track, so they may overlap with the spans of the current thread
+        event_id = next(self.ids)
+        end = self.now()
+        self._record(dict(name=name, cat=category, ph="b", id=event_id, ts=start, args=args))
+        self._record(dict(name=name, cat=category, ph="e", id=event_id, ts=end))
+
+    def trace(self):
+        with self.lock:
+            metadata = [
+                dict(name="thread_name", ph="M", pid=os.getpid(), tid=thread_id, args=dict(name=thread_name))
+                for thread_id, thread_name in self.threads.items()
+            ]
+            return dict(traceEvents=metadata + sorted(self.events, key=lambda e: e["ts"]), displayTimeUnit="ms")
+
+    def save(self):
+        if not self.enabled:
+            return
+
+        with open(self.path, "w", encoding="utf-8") as fd:
+            json.dump(self.trace(), fd)
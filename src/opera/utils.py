@@ -6,7 +6,8 @@ from uuid import uuid4
 from zipfile import is_zipfile
 
 import yaml
-from opera_tosca_parser.commands.parse import parse_service_template
+
+from opera.template_cache import parse_service_template
 
 
 def prompt_yes_no_question(
@@ -97,9 +98,10 @@ def get_template(storage, workdir):
 
         if storage.exists("csars"):
             csar_dir = Path(storage.path) / "csars" / "csar"
-            template, _ = parse_service_template((csar_dir / service_template_path), inputs)
+            template, _ = parse_service_template((csar_dir / service_template_path), inputs, storage)
         else:
-            template, _ = parse_service_template(Path(workdir) / PurePath(service_template_path.name), inputs)
+            template, _ = parse_service_template(Path(workdir) / PurePath(service_template_path.name), inputs,
+                                                 storage)
 
         return template
     else:
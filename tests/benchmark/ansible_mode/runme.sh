@@ -0,0 +1,54 @@
+#!/bin/bash
+set -euo pipefail
+
+# Compares the wall time of a deploy and undeploy cycle with one ansible-playbook process per operation
+# (subprocess) against long-lived Ansible workers (persistent), both with and without batching of operations that run
+# on the same host.
+
+# get opera executable and the optional number of nodes and workers
+opera_executable="$1"
+num_nodes="${2:-20}"
+num_workers="${3:-4}"
+
+# generate a service template with many small operations
+{
+    cat <<TEMPLATE
+tosca_definitions_version: tosca_simple_yaml_1_3
+
+node_types:
+  noop_type:
+    derived_from: tosca.nodes.Root
+    interfaces:
+      Standard:
+        inputs:
+          marker:
+            value: { get_attribute: [ SELF, tosca_id ] }
+            type: string
+        operations:
+          create: playbooks/noop.yaml
+          configure: playbooks/noop.yaml
+          start: playbooks/noop.yaml
+          stop: playbooks/noop.yaml
+          delete: playbooks/noop.yaml
+
+topology_template:
+  node_templates:
+TEMPLATE
+    for i in $(seq 1 "$num_nodes"); do
+        echo "    noop-$i:"
+        echo "      type: noop_type"
+    done
+} > service.yaml
+
+for mode in subprocess persistent; do
+    for batch in "" "--batch-operations"; do
+        rm -rf .opera
+        start="$(date +%s%N)"
+        $opera_executable deploy --ansible-mode "$mode" ${batch:+"$batch"} -w "$num_workers" service.yaml > /dev/null
+        $opera_executable undeploy --ansible-mode "$mode" ${batch:+"$batch"} -w "$num_workers" > /dev/null
+        end="$(date +%s%N)"
+        echo "$mode $batch: $(((end - start) / 1000000)) ms for $((num_nodes * 5)) operations on $num_workers workers"
+    done
+done
+
+rm -rf .opera service.yaml
@@ -0,0 +1,84 @@
+#!/bin/bash
+set -euo pipefail
+
+# Measures get_property and get_attribute calls that address other nodes by template name or type on a large
+# topology, and compares the topology's lookup indexes with the linear scan over all templates that they replace.
+
+# get opera executable and the optional number of nodes
+opera_executable="$1"
+num_nodes="${2:-5000}"
+
+# generate a service template where every node references another node by name and by type
+{
+    cat <<TEMPLATE
+tosca_definitions_version: tosca_simple_yaml_1_3
+
+node_types:
+  lookup_type:
+    derived_from: tosca.nodes.Root
+    properties:
+      size:
+        type: integer
+    attributes:
+      colour:
+        type: string
+        default: red
+
+topology_template:
+  node_templates:
+TEMPLATE
+    for i in $(seq 1 "$num_nodes"); do
+        echo "    node-$i:"
+        echo "      type: lookup_type"
+        echo "      properties:"
+        echo "        size: $i"
+    done
+} > service.yaml
+
+python - "$num_nodes" <<'PYTHON'
+import sys
+import time
+from pathlib import Path
+
+from opera_tosca_parser.commands.parse import parse_service_template
+
+from opera.instance.topology import Topology
+
+num_nodes = int(sys.argv[1])
+template, _ = parse_service_template(Path("service.yaml"), {})
+topology = Topology.instantiate(template)
+hosts = [f"node-{i}" for i in range(num_nodes, 0, -1)] + ["lookup_type"] * num_nodes
+
+
+def linear_scan(host):
+    return [n for n in template.nodes.values() if host == n.name or host in n.types]
+
+
+start = time.perf_counter()
+for host in hosts[:1000]:
+    linear_scan(host)
+scan = (time.perf_counter() - start) * len(hosts) / 1000
+
+start = time.perf_counter()
+for host in hosts:
+    topology.find_node_templates(host)
+index = time.perf_counter() - start
+
+start = time.perf_counter()
+for node, host in zip(topology.nodes.values(), hosts):
+    node.get_property([host, "size"])
+    node.get_attribute([host, "colour"])
+evaluation = time.perf_counter() - start
+
+print(f"{len(hosts)} lookups on {num_nodes} nodes: linear scan {scan * 1000:.0f} ms (extrapolated), "
+      f"index {index * 1000:.1f} ms")
+print(f"{2 * len(topology.nodes)} get_property and get_attribute calls: {evaluation * 1000:.0f} ms")
+PYTHON
+
+# the same template end to end, which parses it and instantiates the topology in the given opera executable
+start=$(date +%s%N)
+$opera_executable validate service.yaml > /dev/null
+end=$(date +%s%N)
+echo "$opera_executable validate: $(( (end - start) / 1000000 )) ms"
+
+rm -rf .opera service.yaml
@@ -0,0 +1,74 @@
+#!/bin/bash
+set -euo pipefail
+
+# Measures the memory that instances of a large topology take on top of its parsed service template, and the time
+# that reading the state of every node takes.
+
+# get opera executable and the optional number of nodes
+opera_executable="$1"
+num_nodes="${2:-50000}"
+
+# generate a service template with properties and attributes that every instance gets
+{
+    cat <<TEMPLATE
+tosca_definitions_version: tosca_simple_yaml_1_3
+
+node_types:
+  memory_type:
+    derived_from: tosca.nodes.Root
+    properties:
+      settings:
+        type: map
+        default:
+          replicas: 3
+          labels: [ one, two, three ]
+      size:
+        type: integer
+    attributes:
+      address:
+        type: string
+        default: 127.0.0.1
+
+topology_template:
+  node_templates:
+TEMPLATE
+    for i in $(seq 1 "$num_nodes"); do
+        echo "    node-$i:"
+        echo "      type: memory_type"
+        echo "      properties:"
+        echo "        size: $i"
+    done
+} > service.yaml
+
+python - <<'PYTHON'
+import time
+import tracemalloc
+from pathlib import Path
+
+from opera_tosca_parser.commands.parse import parse_service_template
+
+from opera.instance.topology import Topology
+
+template, _ = parse_service_template(Path("service.yaml"), {})
+
+tracemalloc.start()
+topology = Topology.instantiate(template)
+memory, _ = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+start = time.perf_counter()
+for node in topology.nodes.values():
+    _ = node.state
+states = time.perf_counter() - start
+
+print(f"{len(topology.nodes)} instances: {memory / 2 ** 20:.1f} MiB, {memory / len(topology.nodes):.0f} B per instance")
+print(f"reading all states: {states * 1000:.1f} ms")
+PYTHON
+
+# the same template end to end, which parses it and instantiates the topology in the given opera executable
+start=$(date +%s%N)
+$opera_executable validate service.yaml > /dev/null
+end=$(date +%s%N)
+echo "$opera_executable validate: $(( (end - start) / 1000000 )) ms"
+
+rm -rf .opera service.yaml
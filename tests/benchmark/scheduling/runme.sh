@@ -0,0 +1,54 @@
+#!/bin/bash
+set -euo pipefail
+
+# Simulates deployments of synthetic topologies with opera's scheduling model and compares the makespan of
+# submitting ready nodes in FIFO order with submitting the nodes that start the longest remaining chains first.
+# Every topology has a few deep chains of slow nodes (e.g. VMs, databases) next to many cheap leaf nodes that
+# become ready early (e.g. configuration files, users).
+
+# get opera executable and the optional number of topologies per worker count and the random seed
+opera_executable="$1"
+topologies="${2:-20}"
+seed="${3:-42}"
+
+# the simulation imports the scheduling model instead of running deployments, so the executable only reports its version
+echo "opera version: $($opera_executable --version)"
+
+python - "$topologies" "$seed" <<'PYTHON'
+import random
+import sys
+
+from opera.threading.estimate import bottom_levels, critical_path, makespan
+
+topologies, seed = int(sys.argv[1]), int(sys.argv[2])
+rng = random.Random(seed)
+
+
+def synthetic_topology():
+    durations = {"root": rng.uniform(5, 30)}
+    dependencies = {}
+    # cheap leaves first, so that FIFO order submits them before the chains
+    for i in range(rng.randint(20, 80)):
+        durations[f"leaf_{i}"] = rng.uniform(1, 5)
+        dependencies[f"leaf_{i}"] = ["root"]
+    for c in range(rng.randint(2, 5)):
+        previous = "root"
+        for i in range(rng.randint(3, 8)):
+            node_id = f"chain_{c}_{i}"
+            durations[node_id] = rng.uniform(20, 120)
+            dependencies[node_id] = [previous] + rng.sample([f"leaf_{j}" for j in range(5)], rng.randint(0, 1))
+            previous = node_id
+    return durations, dependencies
+
+
+print(f"{'workers':>7} {'critical path':>13} {'FIFO':>9} {'priority':>9} {'reduction':>9}")
+for workers in (2, 4, 8, 16):
+    totals = [0.0, 0.0, 0.0]
+    for _ in range(topologies):
+        durations, dependencies = synthetic_topology()
+        totals[0] += critical_path(durations, dependencies)[0]
+        totals[1] += makespan(durations, dependencies, workers)
+        totals[2] += makespan(durations, dependencies, workers, priorities=bottom_levels(durations, dependencies))
+    path, fifo, priority = (t / topologies for t in totals)
+    print(f"{workers:>7} {path:>12.0f}s {fifo:>8.0f}s {priority:>8.0f}s {(fifo - priority) / fifo:>9.1%}")
+PYTHON
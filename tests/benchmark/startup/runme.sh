@@ -0,0 +1,23 @@
+#!/bin/bash
+set -euo pipefail
+
+# Measures how long opera takes to start for commands that do not need the TOSCA parser or the instance model and
+# lists the slowest imports, which should not include any command module other than the chosen one.
+
+# get opera executable and the optional number of runs
+opera_executable="$1"
+runs="${2:-10}"
+
+for args in "--version" "info --help" "deploy --help"; do
+    start=$(date +%s%N)
+    for _ in $(seq 1 "$runs"); do
+        # shellcheck disable=SC2086
+        $opera_executable $args > /dev/null
+    done
+    end=$(date +%s%N)
+    echo "$opera_executable $args: $(( (end - start) / runs / 1000000 )) ms"
+done
+
+echo "Slowest imports for opera --version (cumulative microseconds):"
+python -X importtime -c "import sys; sys.argv = ['opera', '--version']; from opera.cli import main; main()" \
+    2>&1 >/dev/null | sort -t '|' -k 2 -n | tail -n 10
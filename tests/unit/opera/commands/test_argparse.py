@@ -1,6 +1,11 @@
+import json
+import subprocess
+import sys
+
 import pytest
 
 from opera.cli import create_parser
+from opera.commands import COMMANDS
 
 
 class TestArgparse:
@@ -13,7 +18,47 @@ class TestArgparse:
             parser.parse_args(["notify", "-h"])
             parser.parse_args(["outputs", "-h"])
             parser.parse_args(["package", "-h"])
+            parser.parse_args(["plan", "-h"])
             parser.parse_args(["undeploy", "-h"])
             parser.parse_args(["unpackage", "-h"])
             parser.parse_args(["update", "-h"])
             parser.parse_args(["validate", "-h"])
+
+    def test_help_texts_match_commands(self):
+        parser = create_parser(lazy=False)
+        subparsers = parser._subparsers._group_actions[0]  # pylint: disable=protected-access
+
+        assert {a.dest: a.help for a in subparsers._choices_actions} == COMMANDS  # pylint: disable=protected-access
+
+    @pytest.mark.parametrize("argv,loaded,not_loaded", [
+        (["--version"], [], ["opera.commands.info", "opera_tosca_parser", "yaml", "pkg_resources"]),
+        (["unpackage", "-h"], ["opera.commands.unpackage"], ["opera.commands.deploy", "opera.instance.topology"]),
+        (["deploy", "-h"], ["opera.commands.deploy"], ["opera.commands.diff", "opera.compare", "ansible"]),
+        (["info", "-h"], ["opera.commands.info"], ["opera_tosca_parser", "yaml", "pkg_resources"]),
+        # only the CSAR in the current directory is parsed, the status comes from the summary
+        (["info"], ["opera.commands.info"], ["opera.instance.topology", "opera.executors", "ansible"]),
+    ])
+    def test_only_chosen_command_is_imported(self, argv, loaded, not_loaded, tmp_path):
+        storage = tmp_path / ".opera"
+        (storage / "instances").mkdir(parents=True)
+        (storage / "root_file").write_text("service.yaml")
+        (storage / "status").write_text(json.dumps(dict(status="deployed", nodes=0, states={})))
+
+        # a fresh interpreter is needed because the test session has already imported everything
+        script = (
+            "import sys\n"
+            "from opera.cli import main\n"
+            f"sys.argv = ['opera', *{argv!r}]\n"
+            "try:\n"
+            "    main()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print(' '.join(sys.modules), file=sys.stderr)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=tmp_path
+        )
+        modules = set(result.stderr.split())
+
+        assert set(loaded) <= modules
+        assert not set(not_loaded) & modules
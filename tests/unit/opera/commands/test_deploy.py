@@ -1,4 +1,13 @@
+import json
+import time
+
+import pytest
+
 from opera.commands.deploy import deploy_service_template, deploy_compressed_csar
+from opera.error import AggregatedOperationError
+from opera.executors.ansible.session import Session
+from opera.storage import Storage
+from opera.tracing import Tracer
 
 
 class TestDeploy:
@@ -9,3 +18,73 @@ class TestDeploy:
     def test_deploy_csar(self, csar):
         path, storage = csar
         deploy_compressed_csar(path / "compressed" / "test.zip", {"marker": "test-marker"}, storage, False, 1, True)
+
+    def test_deploy_service_template_persistent_workers(self, service_template):
+        _, path, storage = service_template
+        deploy_service_template(path / "service.yaml", {"marker": "test-marker"}, storage, False, 2, True,
+                                Session("persistent"))
+        assert storage.read_json("instances", "hello_0")["state"]["data"] == "started"
+
+    def test_deploy_trace(self, service_template, tmp_path):
+        _, path, storage = service_template
+        tracer = Tracer(tmp_path / "trace.json")
+        deploy_service_template(path / "service.yaml", {"marker": "test-marker"}, storage, False, 2, True,
+                                Session(tracer=tracer))
+        tracer.save()
+
+        events = json.loads((tmp_path / "trace.json").read_text(encoding="utf-8"))["traceEvents"]
+        spans = {(e["cat"], e["name"]) for e in events if e["ph"] == "X"}
+        assert {("node", "hello_0"), ("operation", "create"), ("workspace", "copy operation files"),
+                ("ansible", "ansible-playbook")} <= spans
+        assert [e["args"]["name"] for e in events if e["ph"] == "M"]
+        # every span of an operation is nested in the span of its node on the same worker thread
+        node = next(e for e in events if e["ph"] == "X" and e["cat"] == "node")
+        operation = next(e for e in events if e["ph"] == "X" and e["cat"] == "operation" and e["tid"] == node["tid"])
+        assert node["ts"] <= operation["ts"] and operation["ts"] + operation["dur"] <= node["ts"] + node["dur"]
+        assert {e["ph"] for e in events if e.get("cat") == "queue"} == {"b", "e"}
+
+    def test_deploy_without_trace(self, service_template):
+        _, path, storage = service_template
+        tracer = Tracer()
+        deploy_service_template(path / "service.yaml", {"marker": "test-marker"}, storage, False, 1, True,
+                                Session(tracer=tracer))
+        tracer.save()
+
+        assert tracer.events == []
+
+    @pytest.mark.parametrize("mode", ["subprocess", "persistent"])
+    def test_operation_timeout(self, tmp_path, yaml_text, mode):
+        (tmp_path / "service.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            topology_template:
+              node_templates:
+                slow:
+                  type: tosca.nodes.Root
+                  interfaces:
+                    Standard:
+                      operations:
+                        create:
+                          implementation:
+                            primary: slow.yaml
+                            timeout: 3
+            """
+        ))
+        (tmp_path / "slow.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            - hosts: all
+              gather_facts: false
+              tasks:
+                - command: sleep 60
+            """
+        ))
+        storage = Storage(tmp_path / ".opera")
+
+        start = time.monotonic()
+        with pytest.raises(AggregatedOperationError):
+            deploy_service_template(tmp_path / "service.yaml", {}, storage, False, 1, True, Session(mode))
+
+        assert time.monotonic() - start < 30
+        assert storage.read_json("instances", "slow_0")["state"]["data"] == "error"
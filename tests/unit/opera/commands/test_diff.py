@@ -2,6 +2,10 @@ from opera.commands.deploy import deploy_service_template
 from opera.commands.diff import diff_templates, diff_instances
 from opera.compare.instance_comparer import InstanceComparer
 from opera.compare.template_comparer import TemplateComparer
+from opera.constants import NodeState
+from opera.instance.topology import Topology
+from opera.storage import Storage
+from opera.utils import get_template
 
 
 class TestDiff:
@@ -14,6 +18,45 @@ class TestDiff:
 
         template_comparer = TemplateComparer()
         diff_templates(path / "service.yaml", path, {"marker": "test-marker"}, path_updated / "service.yaml",
-                       path_updated, {"another_marker": "test-marker"}, template_comparer, False)
+                       path_updated, {"another_marker": "test-marker"}, template_comparer, False, storage)
         instance_comparer = InstanceComparer()
         diff_instances(storage, path, storage_updated, path_updated, template_comparer, instance_comparer, False)
+
+    def test_diff_instances_reports_unchanged_nodes_that_are_not_started(self, tmp_path, yaml_text):
+        # language=yaml
+        template = """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            node_types:
+              my_type:
+                derived_from: tosca.nodes.Root
+                properties:
+                  colour:
+                    type: string
+            topology_template:
+              node_templates:
+                changed:
+                  type: my_type
+                  properties:
+                    colour: red
+                unchanged:
+                  type: my_type
+                  properties:
+                    colour: red
+        """
+        (tmp_path / "old").mkdir()
+        (tmp_path / "old" / "service.yaml").write_text(yaml_text(template))
+        (tmp_path / "new").mkdir()
+        (tmp_path / "new" / "service.yaml").write_text(yaml_text(template).replace("red", "blue", 1))
+        storage = Storage.create(str(tmp_path / "old" / ".opera"))
+        deploy_service_template(tmp_path / "old" / "service.yaml", {}, storage, False, 1, True)
+        topology = Topology.instantiate(get_template(storage, tmp_path / "old"), storage)
+        topology.read_all()
+        topology.find_node("unchanged").set_state(NodeState.ERROR)
+
+        storage_new = Storage.create(str(tmp_path / "new" / ".opera"))
+        storage_new.write_json({}, "inputs")
+        storage_new.write(str(tmp_path / "new" / "service.yaml"), "root_file")
+        diff = diff_instances(storage, tmp_path / "old", storage_new, tmp_path / "new", TemplateComparer(),
+                              InstanceComparer(), False)
+
+        assert diff.outputs()["nodes"]["unchanged"] == {"state": [NodeState.ERROR, NodeState.STARTED]}
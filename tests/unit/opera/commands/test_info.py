@@ -1,4 +1,10 @@
-from opera.commands.info import info
+from opera_tosca_parser.parser import tosca
+
+from opera.commands.deploy import deploy_service_template
+from opera.constants import NodeState
+from opera.commands.info import get_status, info
+from opera.instance.topology import Topology
+from opera.template_cache import parse_service_template
 
 
 class TestInfo:
@@ -9,3 +15,29 @@ class TestInfo:
     def test_info_csar(self, csar):
         path, storage = csar
         info(path / "compressed" / "test.zip", storage)
+
+    def test_status_from_summary(self, service_template, monkeypatch):
+        _, path, storage = service_template
+        assert get_status(storage) is None
+
+        deploy_service_template(path / "service.yaml", {"marker": "test-marker"}, storage, False, 1, True)
+        assert storage.read_json("status") == dict(status="deployed", nodes=1, states=dict(started=1))
+
+        # the status has to be answered without loading or instantiating the template
+        def fail(*_):
+            raise AssertionError("template was loaded")
+        monkeypatch.setattr(tosca, "load_service_template", fail)
+        monkeypatch.setattr(Topology, "instantiate", fail)
+        assert get_status(storage) == "deployed"
+        assert info(None, storage)["status"] == "deployed"
+
+    def test_unsaved_state_keeps_summary(self, service_template):
+        _, path, storage = service_template
+        deploy_service_template(path / "service.yaml", {"marker": "test-marker"}, storage, False, 1, True)
+
+        template, _ = parse_service_template(path / "service.yaml", {"marker": "test-marker"}, storage)
+        topology = Topology.instantiate(template, storage)
+        node = next(iter(topology.nodes.values()))
+        node.set_state(NodeState.INITIAL, write=False)
+        assert topology.status() == "undeployed"
+        assert storage.read_json("status")["status"] == "deployed"
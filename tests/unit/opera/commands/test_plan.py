@@ -0,0 +1,29 @@
+import pytest
+
+from opera.commands.deploy import deploy_service_template
+from opera.commands.plan import plan
+from opera.commands.undeploy import undeploy
+from opera.error import DataError
+
+
+class TestPlan:
+    def test_plan_from_recorded_durations(self, service_template):
+        _, path, storage = service_template
+        deploy_service_template(path / "service.yaml", {"marker": "test-marker"}, storage, False, 1, True)
+        assert set(storage.read_json("durations")["deploy"]) == {"hello_0"}
+
+        result = plan(storage, "deploy", 4, list_critical_path=True)
+        assert result["nodes"] == 1
+        assert result["useful_workers"] == 1
+        assert result["estimated_duration"] == result["critical_path_duration"] > 0
+        assert [list(step) for step in result["critical_path"]] == [["hello_0"]]
+        assert result["nodes_without_history"] == []
+
+    def test_plan_needs_history(self, service_template):
+        _, path, storage = service_template
+        deploy_service_template(path / "service.yaml", {"marker": "test-marker"}, storage, False, 1, True)
+
+        with pytest.raises(DataError):
+            plan(storage, "undeploy", 1)
+        undeploy(storage, False, 1)
+        assert plan(storage, "undeploy", 1)["nodes"] == 1
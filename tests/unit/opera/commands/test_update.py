@@ -16,4 +16,4 @@ class TestUpdate:
         template_comparer = TemplateComparer()
         instance_comparer = InstanceComparer()
         diff = diff_instances(storage, path, storage_updated, path_updated, template_comparer, instance_comparer, False)
-        update(storage, path, storage_updated, path_updated, instance_comparer, diff, False, 1, True)
+        update(storage, path, storage_updated, path_updated, diff, False, 1, True)
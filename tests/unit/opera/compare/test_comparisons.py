@@ -0,0 +1,35 @@
+from opera.compare.comparisons import ListComparison
+from opera.compare.template_comparer import TemplateComparer, TemplateContext
+from opera.digest import DigestCache
+
+
+class TestListComparison:
+    def test_items_are_matched_by_id(self):
+        comparison = ListComparison(lambda item1, item2, context: (item1 == item2, [item1, item2]),
+                                    lambda item: item[0])
+        equal, diff = comparison.compare(["a1", "b1", "c1"], ["d1", "c2", "b1"], None)
+
+        assert not equal
+        assert diff.deleted == ["a"]
+        assert diff.added == ["d"]
+        assert diff.changed == {"c": ["c1", "c2"]}
+
+
+class TestFileComparison:
+    def test_files_are_compared_by_digest(self, tmp_path, monkeypatch):
+        for name, content in (("a", "one"), ("b", "one"), ("c", "two")):
+            (tmp_path / name).write_text(content)
+        context = TemplateContext(None, None, tmp_path, tmp_path)
+        cache_path = tmp_path / "cache" / "digests"
+        comparer = TemplateComparer(DigestCache(cache_path))
+
+        assert comparer._compare_file("a", "b", context)[0]
+        assert not comparer._compare_file("a", "c", context)[0]
+        comparer.digests.save()
+
+        # the persisted digests are used as long as the files are unchanged
+        def fail(path):
+            raise AssertionError(f"{path} should not be read")
+        monkeypatch.setattr("opera.digest._file_digest", fail)
+        comparer = TemplateComparer(DigestCache(cache_path))
+        assert comparer._compare_file("a", "b", context)[0]
@@ -2,7 +2,6 @@ import pytest
 
 from opera.compare.instance_comparer import InstanceComparer
 from opera.compare.template_comparer import TemplateComparer, TemplateContext
-from opera.constants import NodeState
 
 
 class TestInstanceCompare:
@@ -53,16 +52,3 @@ class TestInstanceCompare:
         assert "dependencies" not in diff.changed["nodes"].changed["hello-1"].changed
         assert "dependencies" not in diff.changed["nodes"].changed["hello-3"].changed
         assert "dependencies" not in diff.changed["nodes"].changed["my-workstation"].changed
-
-    def test_prepare_update(self, service_template1, service_template2, template_diff):
-        comparer = InstanceComparer()
-        for node1 in service_template1[1].nodes.values():
-            node1.set_state(NodeState.STARTED)
-        assert service_template2[1].nodes["my-workstation_0"].state == NodeState.INITIAL
-
-        equal, diff = comparer.compare_topology_template(service_template1[1], service_template2[1], template_diff)
-        assert not equal
-
-        comparer.prepare_update(service_template1[1], service_template2[1], diff)
-        assert service_template1[1].nodes["my-workstation_0"].state == NodeState.INITIAL
-        assert service_template2[1].nodes["my-workstation_0"].state == NodeState.STARTED
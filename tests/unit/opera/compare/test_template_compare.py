@@ -86,3 +86,29 @@ class TestTemplateCompare:
                diff.changed["interfaces"].changed["Standard"].changed["operations"].changed["create"].changed
         assert "inputs" in \
                diff.changed["interfaces"].changed["Standard"].changed["operations"].changed["create"].changed
+
+    def test_parallel_comparison(self, service_template1, service_template2):
+        context = TemplateContext(service_template1[0],
+                                  service_template2[0],
+                                  service_template1[2],
+                                  service_template2[2])
+        _, diff = TemplateComparer().compare_service_template(service_template1[0], service_template2[0], context)
+        _, parallel_diff = TemplateComparer(workers=4).compare_service_template(
+            service_template1[0], service_template2[0], context
+        )
+
+        assert parallel_diff.outputs() == diff.outputs()
+
+    def test_quick_comparison(self, service_template1, service_template2):
+        comparer = TemplateComparer(quick=True)
+        context = TemplateContext(service_template1[0],
+                                  service_template2[0],
+                                  service_template1[2],
+                                  service_template2[2])
+        equal, diff = comparer.compare_service_template(service_template1[0], service_template2[0], context)
+
+        assert equal is False
+        # added and deleted nodes are found first, so no node needs to be compared in depth
+        assert diff.changed["nodes"].added == ["hello-5"]
+        assert diff.changed["nodes"].deleted == ["hello-4"]
+        assert diff.changed["nodes"].changed == {}
@@ -0,0 +1,75 @@
+import pytest
+
+from opera.compare.instance_comparer import InstanceComparer
+from opera.compare.template_comparer import TemplateComparer, TemplateContext
+from opera.compare.update_plan import UpdatePlan
+from opera.constants import NodeState
+from opera.storage import Storage
+
+
+class TestUpdatePlan:
+    @pytest.fixture
+    def plan(self, service_template1, service_template2):
+        template1, topology1, path1, _ = service_template1
+        template2, topology2, path2, _ = service_template2
+        for node in topology1.nodes.values():
+            node.set_state(NodeState.STARTED)
+
+        context = TemplateContext(template1, template2, path1, path2)
+        _, template_diff = TemplateComparer().compare_service_template(template1, template2, context)
+        _, instance_diff = InstanceComparer().compare_topology_template(topology1, topology2, template_diff)
+        yield UpdatePlan(topology1, topology2, instance_diff)
+
+    def test_outputs(self, plan):
+        assert plan.outputs() == dict(
+            undeploy=["hello-1_0", "hello-2_0", "hello-3_0", "hello-4_0", "hello-6_0"],
+            deploy=["hello-1_0", "hello-2_0", "hello-3_0", "hello-5_0", "hello-6_0"],
+            unchanged=["my-workstation_0"],
+        )
+
+    def test_step_dependencies(self, plan, tmp_path):
+        steps = {step.tosca_id: step for step in plan.steps(tmp_path / "t1", tmp_path / "t2")}
+
+        def dependencies(step_id):
+            return sorted(d.tosca_id for d in steps[step_id].dependencies)
+
+        assert dependencies("undeploy hello-1_0") == ["undeploy hello-6_0"]
+        assert dependencies("undeploy hello-4_0") == []
+        assert dependencies("deploy hello-5_0") == []
+        assert dependencies("deploy hello-2_0") == ["deploy hello-1_0", "undeploy hello-2_0"]
+        assert dependencies("deploy hello-6_0") == ["deploy hello-2_0", "undeploy hello-6_0"]
+        assert steps["deploy hello-6_0"].workdir == tmp_path / "t2"
+
+    def test_execute(self, plan, tmp_path, monkeypatch):
+        calls = []
+        for step in plan.steps(tmp_path / "t1", tmp_path / "t2"):
+            monkeypatch.setattr(step.node, step.operation,
+                                lambda verbose, workdir, step_id=step.tosca_id: calls.append(step_id))
+        workstation = plan.topology_old.find_node("my-workstation")
+        workstation.set_attribute("private_address", "10.0.0.1")
+
+        plan.execute(False, tmp_path / "t1", tmp_path / "t2", 4)
+
+        assert sorted(calls) == sorted(step.tosca_id for step in plan.steps(tmp_path / "t1", tmp_path / "t2"))
+        assert calls.index("undeploy hello-6_0") < calls.index("undeploy hello-1_0")
+        assert calls.index("deploy hello-2_0") < calls.index("deploy hello-6_0")
+        # unchanged nodes are not touched, but keep their state in the new topology
+        assert "deploy my-workstation_0" not in calls
+        kept = plan.topology_new.find_node("my-workstation")
+        assert kept.state == NodeState.STARTED
+        assert kept.get_attribute(["SELF", "private_address"]) == "10.0.0.1"
+
+    def test_only_new_topology_writes_status(self, plan, tmp_path, monkeypatch):
+        # update swaps the storage of the new topology for the old one
+        storage = Storage(tmp_path / ".opera")
+        plan.topology_old.set_storage(storage)
+        plan.topology_new.set_storage(storage)
+        for step in plan.steps(tmp_path / "t1", tmp_path / "t2"):
+            state = NodeState.INITIAL if step.operation == "undeploy" else NodeState.STARTED
+            monkeypatch.setattr(step.node, step.operation,
+                                lambda verbose, workdir, node=step.node, state=state: node.set_state(state))
+
+        plan.execute(False, tmp_path / "t1", tmp_path / "t2", 4)
+
+        assert plan.topology_old.stored_status is None
+        assert storage.read_json("status") == dict(status="deployed", nodes=6, states=dict(started=6))
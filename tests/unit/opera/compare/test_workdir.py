@@ -19,3 +19,19 @@ class TestWorkirCompare:
         assert "hello-2" in diff.changed["nodes"].changed
         assert "hello-3" in diff.changed["nodes"].changed
         assert "hello-6" in diff.changed["nodes"].changed
+
+    def test_quick_instance_diff(self, service_template1, service_template2, monkeypatch):
+        storage_1 = service_template1[3]
+        storage_2 = service_template2[3]
+
+        # the templates differ, so instance states are never read
+        def fail():
+            raise AssertionError("instance states should not be read")
+        monkeypatch.setattr(storage_1, "read_instances", fail)
+
+        diff = diff_instances(storage_1, service_template1[2],
+                              storage_2, service_template2[2],
+                              TemplateComparer(quick=True), InstanceComparer(quick=True),
+                              False)
+
+        assert not diff.equal()
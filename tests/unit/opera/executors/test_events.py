@@ -0,0 +1,38 @@
+import json
+
+from opera.executors.ansible.events import EventStream
+
+
+class TestEventStream:
+    def test_partial_lines_wait_for_the_rest(self, tmp_path):
+        path = tmp_path / "events.jsonl"
+        tasks = []
+        stream = EventStream(path, tasks.append)
+
+        task = json.dumps(dict(event="task", task="a", host="opera", status="ok"))
+        path.write_text(task[:10])
+        stream.poll()
+        assert tasks == []
+
+        path.write_text(task + "\n")
+        stream.poll()
+        assert tasks == [dict(event="task", task="a", host="opera", status="ok")]
+
+    def test_stats_are_the_result(self, tmp_path):
+        path = tmp_path / "events.jsonl"
+        with EventStream(path) as stream:
+            path.write_text(
+                json.dumps(dict(event="task", task="a", host="opera", status="ok")) + "\n"
+                + json.dumps(dict(event="stats", global_custom_stats=dict(colour="red"))) + "\n"
+            )
+
+        assert stream.result["global_custom_stats"] == dict(colour="red")
+
+    def test_stale_events_are_removed(self, tmp_path):
+        path = tmp_path / "events.jsonl"
+        path.write_text(json.dumps(dict(event="stats", global_custom_stats=dict(stale=True))) + "\n")
+
+        with EventStream(path) as stream:
+            pass
+
+        assert stream.result is None
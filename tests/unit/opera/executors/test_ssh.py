@@ -0,0 +1,34 @@
+import os
+
+from opera.executors.ansible.ssh import ControlSockets
+
+
+class TestControlSockets:
+    def test_socket_per_host(self):
+        sockets = ControlSockets()
+        first = sockets.inventory_vars("10.0.0.1")
+        second = sockets.inventory_vars("10.0.0.2")
+        again = sockets.inventory_vars("10.0.0.1")
+
+        assert first["ansible_control_path"] == again["ansible_control_path"]
+        assert first["ansible_control_path"] != second["ansible_control_path"]
+        assert "ControlPersist=" in first["ansible_ssh_args"]
+        sockets.close()
+
+    def test_live_socket_avoids_handshake(self):
+        sockets = ControlSockets()
+        socket = sockets.inventory_vars("10.0.0.1")["ansible_control_path"]
+        # pretend that ssh left a master connection behind
+        with open(socket, "w", encoding="utf-8"):
+            pass
+        sockets.inventory_vars("10.0.0.1")
+
+        assert sockets.stats() == dict(handshakes=1, handshakes_avoided=1, hosts=1)
+        sockets.close()
+        assert not os.path.exists(os.path.dirname(socket))
+
+    def test_pipelining_can_be_disabled(self, monkeypatch):
+        monkeypatch.setenv("OPERA_SSH_PIPELINING", "false")
+        sockets = ControlSockets()
+        assert sockets.inventory_vars("10.0.0.1")["ansible_pipelining"] is False
+        sockets.close()
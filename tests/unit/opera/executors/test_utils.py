@@ -0,0 +1,37 @@
+import os
+import time
+
+from opera.executors.ansible import utils
+
+# the shell stays in the foreground while a background child keeps running, like ansible-playbook with its forks
+SPAWN_CHILD = ["sh", "-c", "sleep 30 & echo $! > child.pid; wait"]
+
+
+def _child_alive(directory):
+    with open(os.path.join(directory, "child.pid"), encoding="utf-8") as fd:
+        pid = int(fd.read())
+    # the child is killed asynchronously, so it gets a moment to go away
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline:
+        try:
+            with open(f"/proc/{pid}/stat", encoding="utf-8") as fd:
+                # a zombie is gone as far as we are concerned
+                if fd.read().split()[2] == "Z":
+                    return False
+        except FileNotFoundError:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+class TestRunInDirectory:
+    def test_timeout_kills_process_group(self, tmp_path):
+        start = time.monotonic()
+        code, _, _ = utils.run_in_directory(str(tmp_path), SPAWN_CHILD, {}, timeout=0.5)
+
+        assert code == utils.TIMEOUT_CODE
+        assert time.monotonic() - start < 10
+        assert not _child_alive(tmp_path)
+
+    def test_without_timeout(self, tmp_path):
+        assert utils.run_in_directory(str(tmp_path), ["sh", "-c", "exit 2"], {})[0] == 2
@@ -0,0 +1,32 @@
+import os
+import signal
+
+from opera.executors.ansible import worker
+
+
+def _status(child):
+    pid = os.fork()
+    if pid == 0:
+        child()
+    return os.waitpid(pid, 0)[1]
+
+
+class TestWorker:
+    def test_exit_code(self):
+        assert worker._exit_code(_status(lambda: os._exit(3))) == 3  # pylint: disable=protected-access
+        assert worker._exit_code(  # pylint: disable=protected-access
+            _status(lambda: os.kill(os.getpid(), signal.SIGKILL))
+        ) == -signal.SIGKILL
+
+    def test_worker_outlives_operation_directory(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        operation_dir = tmp_path / "operation"
+        operation_dir.mkdir()
+        pool = worker.WorkerPool()
+        try:
+            process = pool._acquire(str(operation_dir), {}).process  # pylint: disable=protected-access
+            operation_dir.rmdir()
+
+            assert os.readlink(f"/proc/{process.pid}/cwd") == str(tmp_path)
+        finally:
+            pool.close()
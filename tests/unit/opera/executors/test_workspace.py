@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+
+from opera.executors.ansible.workspace import WorkspaceCache
+
+
+class TestWorkspaceCache:
+    def test_files_are_copied_once(self, tmp_path):
+        (tmp_path / "playbook.yaml").write_text("- hosts: all")
+        cache = WorkspaceCache()
+
+        for i in range(3):
+            workspace = tmp_path / f"workspace_{i}"
+            workspace.mkdir()
+            cache.materialize(tmp_path / "playbook.yaml", workspace / "playbook.yaml")
+            assert (workspace / "playbook.yaml").read_text() == "- hosts: all"
+
+        assert cache.stats() == dict(hits=2, misses=1, entries=1)
+        cache.close()
+
+    def test_same_content_shares_an_entry(self, tmp_path):
+        (tmp_path / "a.yaml").write_text("same")
+        (tmp_path / "b.yaml").write_text("same")
+        (tmp_path / "workspace").mkdir()
+        cache = WorkspaceCache()
+
+        cache.materialize(tmp_path / "a.yaml", tmp_path / "workspace" / "a.yaml")
+        cache.materialize(tmp_path / "b.yaml", tmp_path / "workspace" / "b.yaml")
+
+        assert cache.stats()["entries"] == 1
+        assert os.stat(tmp_path / "workspace" / "a.yaml").st_ino == os.stat(tmp_path / "workspace" / "b.yaml").st_ino
+        cache.close()
+
+    def test_changed_content_is_a_miss(self, tmp_path):
+        source = tmp_path / "vars.yaml"
+        source.write_text("a: 1")
+        (tmp_path / "w1").mkdir()
+        (tmp_path / "w2").mkdir()
+        cache = WorkspaceCache()
+
+        cache.materialize(source, tmp_path / "w1" / "vars.yaml")
+        source.write_text("a: 22")
+        cache.materialize(source, tmp_path / "w2" / "vars.yaml")
+
+        assert (tmp_path / "w1" / "vars.yaml").read_text() == "a: 1"
+        assert (tmp_path / "w2" / "vars.yaml").read_text() == "a: 22"
+        assert cache.stats()["misses"] == 2
+        cache.close()
+
+    def test_directories_do_not_leak_new_files(self, tmp_path):
+        artifact = tmp_path / "files"
+        (artifact / "nested").mkdir(parents=True)
+        (artifact / "nested" / "data.txt").write_text("data")
+        cache = WorkspaceCache()
+
+        cache.materialize(artifact, tmp_path / "w1")
+        (tmp_path / "w1" / "nested" / "new.txt").write_text("created by an operation")
+        cache.materialize(artifact, tmp_path / "w2")
+
+        assert (tmp_path / "w2" / "nested" / "data.txt").read_text() == "data"
+        assert not (tmp_path / "w2" / "nested" / "new.txt").exists()
+        assert cache.stats()["hits"] == 1
+        cache.close()
+
+    def test_close_evicts_everything(self, tmp_path):
+        (tmp_path / "playbook.yaml").write_text("- hosts: all")
+        (tmp_path / "workspace").mkdir()
+        cache = WorkspaceCache()
+        cache.materialize(tmp_path / "playbook.yaml", tmp_path / "workspace" / "playbook.yaml")
+        root = Path(cache.root)
+
+        cache.close()
+
+        assert not root.exists()
+        assert cache.stats()["entries"] == 0
@@ -0,0 +1,67 @@
+import pathlib
+
+import pytest
+from opera_tosca_parser.commands.parse import parse_service_template
+
+from opera.constants import NodeState
+from opera.error import DataError
+from opera.instance.topology import Topology
+from opera.storage import Storage
+
+
+class TestAttributes:
+    @pytest.fixture
+    def topology(self, tmp_path, yaml_text):
+        (tmp_path / "service.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            node_types:
+              my_type:
+                derived_from: tosca.nodes.Root
+                properties:
+                  settings:
+                    type: map
+                    default: { replicas: 3 }
+                attributes:
+                  address:
+                    type: string
+                    default: 127.0.0.1
+            topology_template:
+              node_templates:
+                my_node:
+                  type: my_type
+            """
+        ))
+        storage = Storage(tmp_path / pathlib.Path(".opera"))
+        template, _ = parse_service_template(tmp_path / "service.yaml", {})
+        yield Topology.instantiate(template, storage)
+
+    def test_values_are_shared_until_written(self, topology):
+        node = topology.find_node("my_node")
+        template_address = node.template.attributes["address"]
+        assert node.attributes["address"] is template_address
+        assert node.attributes["settings"] is node.template.properties["settings"]
+
+        node.set_attribute("address", "10.0.0.1")
+        assert node.attributes["address"] is not template_address
+        assert node.get_attribute(["SELF", "address"]) == "10.0.0.1"
+        assert template_address.data == "127.0.0.1"
+
+        node.reset_attributes()
+        assert node.get_attribute(["SELF", "address"]) == "127.0.0.1"
+
+    def test_load_does_not_touch_template(self, topology):
+        node = topology.find_node("my_node")
+        node.load({"address": {"is_set": True, "data": "10.0.0.2"}, "state": {"is_set": True, "data": "started"}})
+
+        assert node.get_attribute(["SELF", "address"]) == "10.0.0.2"
+        assert node.state == NodeState.STARTED
+        assert node.template.attributes["address"].data == "127.0.0.1"
+
+    def test_invalid_state(self, topology):
+        node = topology.find_node("my_node")
+        node.set_attribute("state", "sleeping")
+
+        with pytest.raises(DataError):
+            _ = node.state
@@ -0,0 +1,168 @@
+import pathlib
+
+import pytest
+from opera_tosca_parser.commands.parse import parse_service_template
+
+from opera.error import AggregatedOperationError
+from opera.executors.ansible import ansible
+from opera.executors.ansible.session import Session
+from opera.instance.topology import Topology
+from opera.storage import Storage
+
+
+def set_stats_playbook(name, value):
+    return f"""
+    - hosts: all
+      gather_facts: false
+      tasks:
+        - set_stats:
+            data:
+              {name}: {value}
+    """
+
+
+class TestOperationBatch:
+    @pytest.fixture
+    def topology(self, tmp_path, yaml_text):
+        (tmp_path / "template.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            node_types:
+              my_node_type:
+                derived_from: tosca.nodes.Root
+                attributes:
+                  colour:
+                    type: string
+                  size:
+                    type: string
+                  shape:
+                    type: string
+                interfaces:
+                  Standard:
+                    type: tosca.interfaces.node.lifecycle.Standard
+                    operations:
+                      create:
+                        implementation: create.yaml
+                        outputs:
+                          colour: [ SELF, colour ]
+                      configure:
+                        implementation: configure.yaml
+                        outputs:
+                          size: [ SELF, size ]
+                      start:
+                        implementation: start.yaml
+                        inputs:
+                          colour: { value: { get_attribute: [ SELF, colour ] }, type: string }
+                        outputs:
+                          shape: [ SELF, shape ]
+
+            topology_template:
+              node_templates:
+                my_node:
+                  type: my_node_type
+            """
+        ))
+        (tmp_path / "create.yaml").write_text(yaml_text(set_stats_playbook("colour", "red")))
+        (tmp_path / "configure.yaml").write_text(yaml_text(set_stats_playbook("size", "big")))
+        (tmp_path / "start.yaml").write_text(yaml_text(set_stats_playbook("shape", "'{{ colour }} circle'")))
+
+        storage = Storage(tmp_path / pathlib.Path(".opera"))
+        storage.write("template.yaml", "root_file")
+        template, _ = parse_service_template(tmp_path / "template.yaml", {})
+        yield Topology.instantiate(template, storage), tmp_path
+
+    @pytest.fixture
+    def invocations(self, monkeypatch):
+        calls = []
+        run, run_batch = ansible.run, ansible.run_batch
+
+        def counting_run(*args):
+            calls.append(1)
+            return run(*args)
+
+        def counting_run_batch(host, operations, *args):
+            calls.append(len(operations))
+            return run_batch(host, operations, *args)
+
+        monkeypatch.setattr(ansible, "run", counting_run)
+        monkeypatch.setattr(ansible, "run_batch", counting_run_batch)
+        yield calls
+
+    def test_deploy_batches_operations(self, topology, invocations):
+        topology, workdir = topology
+        topology.set_session(Session(batch=True))
+        topology.deploy(False, workdir, 1)
+
+        node = topology.find_node("my_node")
+        assert node.get_attribute(["SELF", "colour"]) == "red"
+        assert node.get_attribute(["SELF", "size"]) == "big"
+        assert node.get_attribute(["SELF", "shape"]) == "red circle"
+        assert node.deployed
+        # start reads an attribute that create sets, so it cannot join the first playbook
+        assert invocations == [2, 1]
+
+    def test_deploy_failure_keeps_completed_outputs(self, topology):
+        topology, workdir = topology
+        (workdir / "configure.yaml").write_text("- hosts: all\n  gather_facts: false\n  tasks:\n    - fail:\n")
+        topology.set_session(Session(batch=True))
+
+        with pytest.raises(AggregatedOperationError):
+            topology.deploy(False, workdir, 1)
+
+        node = topology.find_node("my_node")
+        assert node.get_attribute(["SELF", "colour"]) == "red"
+        assert node.error
+
+    def test_facts_do_not_shadow_inputs(self, tmp_path, yaml_text, invocations):
+        (tmp_path / "template.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            node_types:
+              my_node_type:
+                derived_from: tosca.nodes.Root
+                attributes:
+                  port:
+                    type: string
+                interfaces:
+                  Standard:
+                    type: tosca.interfaces.node.lifecycle.Standard
+                    operations:
+                      create:
+                        implementation: create.yaml
+                      configure:
+                        implementation: configure.yaml
+                        inputs:
+                          port: { value: "8080", type: string }
+                        outputs:
+                          port: [ SELF, port ]
+
+            topology_template:
+              node_templates:
+                my_node:
+                  type: my_node_type
+            """
+        ))
+        (tmp_path / "create.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            - hosts: all
+              gather_facts: false
+              tasks:
+                - set_fact:
+                    port: "80"
+            """
+        ))
+        (tmp_path / "configure.yaml").write_text(yaml_text(set_stats_playbook("port", "'{{ port }}'")))
+        storage = Storage(tmp_path / pathlib.Path(".opera"))
+        storage.write("template.yaml", "root_file")
+        template, _ = parse_service_template(tmp_path / "template.yaml", {})
+        topology = Topology.instantiate(template, storage)
+        topology.set_session(Session(batch=True))
+        topology.deploy(False, tmp_path, 1)
+
+        assert ansible.settable_variables(str(tmp_path), "create.yaml", ()) == {"port"}
+        assert topology.find_node("my_node").get_attribute(["SELF", "port"]) == "8080"
+        # the fact that create sets would shadow the input of configure in the same playbook
+        assert invocations == [1, 1]
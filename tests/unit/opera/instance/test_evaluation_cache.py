@@ -0,0 +1,81 @@
+import pathlib
+
+import pytest
+from opera_tosca_parser.commands.parse import parse_service_template
+
+from opera.instance.topology import Topology
+from opera.storage import Storage
+
+
+class TestEvaluationCache:
+    @pytest.fixture
+    def topology(self, tmp_path, yaml_text):
+        (tmp_path / "template.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            node_types:
+              my_node_type:
+                derived_from: tosca.nodes.Root
+                properties:
+                  size:
+                    type: string
+                attributes:
+                  colour:
+                    type: string
+                    default: red
+              my_collector_node_type:
+                derived_from: tosca.nodes.Root
+                attributes:
+                  target_colour:
+                    type: string
+                    default: { get_attribute: [ SELF, my_target, colour ] }
+                requirements:
+                  - my_target:
+                      capability: tosca.capabilities.Root
+                      relationship: tosca.relationships.DependsOn
+
+            topology_template:
+              node_templates:
+                my_node:
+                  type: my_node_type
+                  properties:
+                    size: big
+                my_collector:
+                  type: my_collector_node_type
+                  requirements:
+                    - my_target: my_node
+            """
+        ))
+        storage = Storage(tmp_path / pathlib.Path(".opera"))
+        template, _ = parse_service_template(tmp_path / "template.yaml", {})
+        yield Topology.instantiate(template, storage)
+
+    def test_results_are_reused(self, topology):
+        node = topology.find_node("my_node")
+        assert node.get_property(["SELF", "size"]) == "big"
+        assert node.get_property(["SELF", "size"]) == "big"
+        assert node.get_attribute(["SELF", "colour"]) == "red"
+        assert node.get_attribute(["SELF", "colour"]) == "red"
+
+        assert topology.evaluations.stats() == dict(hits=2, misses=2, entries=2)
+
+    def test_set_attribute_invalidates_dependants(self, topology):
+        node = topology.find_node("my_node")
+        collector = topology.find_node("my_collector")
+        assert collector.get_attribute(["SELF", "target_colour"]) == "red"
+        assert node.get_property(["SELF", "size"]) == "big"
+
+        node.set_attribute("colour", "blue")
+        assert collector.get_attribute(["SELF", "target_colour"]) == "blue"
+        # properties do not depend on attributes and stay cached
+        assert node.get_property(["SELF", "size"]) == "big"
+        assert topology.evaluations.stats()["hits"] == 1
+
+    def test_unrelated_attribute_keeps_results(self, topology):
+        collector = topology.find_node("my_collector")
+        assert collector.get_attribute(["SELF", "target_colour"]) == "red"
+
+        topology.find_node("my_node").set_attribute("tosca_name", "renamed")
+        assert collector.get_attribute(["SELF", "target_colour"]) == "red"
+        assert topology.evaluations.stats()["hits"] == 1
@@ -0,0 +1,67 @@
+import pathlib
+
+import pytest
+from opera_tosca_parser.commands.parse import parse_service_template
+
+from opera.constants import OperationHost
+from opera.instance.topology import Topology
+from opera.storage import Storage
+
+
+class TestHosts:
+    @pytest.fixture
+    def topology(self, tmp_path, yaml_text):
+        (tmp_path / "service.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            node_types:
+              runtime_type:
+                derived_from: tosca.nodes.SoftwareComponent
+                capabilities:
+                  host:
+                    type: tosca.capabilities.Container
+              app_type:
+                derived_from: tosca.nodes.Root
+                requirements:
+                  - host:
+                      capability: tosca.capabilities.Container
+                      relationship: tosca.relationships.HostedOn
+            topology_template:
+              node_templates:
+                vm:
+                  type: tosca.nodes.Compute
+                  attributes:
+                    public_address: 10.0.0.1
+                runtime:
+                  type: runtime_type
+                  requirements:
+                    - host: vm
+                app:
+                  type: app_type
+                  requirements:
+                    - host: runtime
+                standalone:
+                  type: tosca.nodes.Root
+            """
+        ))
+        storage = Storage(tmp_path / pathlib.Path(".opera"))
+        template, _ = parse_service_template(tmp_path / "service.yaml", {})
+        yield Topology.instantiate(template, storage)
+
+    def test_hosted_on_chains_are_resolved_once(self, topology):
+        vm = topology.find_node("vm")
+        assert topology.hosts == {"vm_0": None, "runtime_0": vm, "app_0": vm, "standalone_0": None}
+
+    def test_find_host(self, topology):
+        assert topology.find_node("app").find_host() == "10.0.0.1"
+        assert topology.find_node("runtime").get_host(OperationHost.HOST) == "10.0.0.1"
+        assert topology.find_node("standalone").find_host() == "localhost"
+        assert topology.find_node("vm").find_host() == "localhost"
+
+    def test_address_change_is_picked_up(self, topology):
+        app = topology.find_node("app")
+        assert app.find_host() == "10.0.0.1"
+
+        topology.find_node("vm").set_attribute("public_address", "10.0.0.2")
+        assert app.find_host() == "10.0.0.2"
@@ -0,0 +1,94 @@
+import pathlib
+
+import pytest
+from opera_tosca_parser.commands.parse import parse_service_template
+
+from opera.error import DataError
+from opera.instance.topology import Topology
+from opera.storage import Storage
+
+
+class TestMultipleInstances:
+    @pytest.fixture
+    def service_template(self, tmp_path, yaml_text):
+        (tmp_path / "service.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            node_types:
+              worker_type:
+                derived_from: tosca.nodes.Root
+                capabilities:
+                  scalable:
+                    type: tosca.capabilities.Scalable
+                    properties:
+                      max_instances:
+                        type: integer
+                        default: 10
+                requirements:
+                  - host:
+                      capability: tosca.capabilities.Compute
+                      relationship: tosca.relationships.HostedOn
+            topology_template:
+              inputs:
+                vms:
+                  type: integer
+              node_templates:
+                vm:
+                  type: tosca.nodes.Compute
+                  attributes:
+                    public_address: 10.0.0.1
+                  capabilities:
+                    scalable:
+                      properties:
+                        max_instances: 10
+                        default_instances: { get_input: vms }
+                worker:
+                  type: worker_type
+                  capabilities:
+                    scalable:
+                      properties:
+                        default_instances: 4
+                  requirements:
+                    - host: vm
+                monitor:
+                  type: tosca.nodes.Root
+                  requirements:
+                    - dependency: vm
+            """
+        ))
+        yield tmp_path / "service.yaml", Storage(tmp_path / pathlib.Path(".opera"))
+
+    def test_instances_and_relationships(self, service_template):
+        path, storage = service_template
+        template, _ = parse_service_template(path, {"vms": 2})
+        topology = Topology.instantiate(template, storage)
+
+        assert list(topology.nodes) == ["vm_0", "vm_1", "worker_0", "worker_1", "worker_2", "worker_3", "monitor_0"]
+        assert topology.find_node("vm").tosca_id == "vm_0"
+        # dependencies connect every pair of instances while hosted instances are spread over hosts
+        assert [n.tosca_id for n in topology.find_node("monitor").requirement_targets] == ["vm_0", "vm_1"]
+        assert {i: h.tosca_id for i, h in topology.hosts.items() if h} == {
+            "worker_0": "vm_0", "worker_1": "vm_1", "worker_2": "vm_0", "worker_3": "vm_1"
+        }
+
+        topology.find_node_instances("vm")[1].set_attribute("public_address", "10.0.0.2")
+        assert topology.nodes["worker_2"].find_host() == "10.0.0.1"
+        assert topology.nodes["worker_3"].find_host() == "10.0.0.2"
+
+    def test_deploy_all_instances(self, service_template):
+        path, storage = service_template
+        template, _ = parse_service_template(path, {"vms": 3})
+        topology = Topology.instantiate(template, storage)
+        topology.deploy(False, path.parent, 4)
+
+        assert len(topology.nodes) == 8
+        assert all(node.deployed for node in topology.nodes.values())
+        assert set(storage.read_instances()) >= set(topology.nodes)
+
+    def test_invalid_count(self, service_template):
+        path, storage = service_template
+        template, _ = parse_service_template(path, {"vms": 11})
+
+        with pytest.raises(DataError):
+            Topology.instantiate(template, storage)
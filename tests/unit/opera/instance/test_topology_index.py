@@ -0,0 +1,85 @@
+import pathlib
+
+import pytest
+from opera_tosca_parser.commands.parse import parse_service_template
+
+from opera.error import DataError
+from opera.instance.topology import Topology
+from opera.storage import Storage
+
+
+class TestTopologyIndex:
+    @pytest.fixture
+    def topology(self, tmp_path, yaml_text):
+        (tmp_path / "service.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            node_types:
+              base_type:
+                derived_from: tosca.nodes.Root
+                properties:
+                  size:
+                    type: string
+                attributes:
+                  colour:
+                    type: string
+                    default: green
+              derived_type:
+                derived_from: base_type
+            relationship_types:
+              my_relationship_type:
+                derived_from: tosca.relationships.DependsOn
+                properties:
+                  weight:
+                    type: integer
+
+            topology_template:
+              node_templates:
+                first:
+                  type: base_type
+                  properties:
+                    size: small
+                second:
+                  type: derived_type
+                  properties:
+                    size: big
+                  attributes:
+                    colour: blue
+                  requirements:
+                    - dependency:
+                        node: first
+                        relationship: my_relationship
+              relationship_templates:
+                my_relationship:
+                  type: my_relationship_type
+                  properties:
+                    weight: 3
+            """
+        ))
+        storage = Storage(tmp_path / pathlib.Path(".opera"))
+        template, _ = parse_service_template(tmp_path / "service.yaml", {})
+        yield Topology.instantiate(template, storage)
+
+    def test_index_covers_names_and_type_hierarchy(self, topology):
+        assert [n.name for n in topology.find_node_templates("second")] == ["second"]
+        assert [n.name for n in topology.find_node_templates("derived_type")] == ["second"]
+        assert [n.name for n in topology.find_node_templates("base_type")] == ["first", "second"]
+        assert [n.name for n in topology.find_node_templates("tosca.nodes.Root")] == ["first", "second"]
+        assert [r.name for r in topology.find_relationship_templates("tosca.relationships.Root")] == ["my_relationship"]
+        assert topology.find_node_templates("missing") == ()
+
+    def test_node_lookups(self, topology):
+        node = topology.find_node("first")
+        assert node.get_property(["second", "size"]) == "big"
+        assert node.get_property(["base_type", "size"]) == "small"
+        assert node.get_property(["my_relationship_type", "weight"]) == 3
+        assert node.get_attribute(["derived_type", "colour"]) == "blue"
+        with pytest.raises(DataError):
+            node.get_property(["missing", "size"])
+
+    def test_relationship_lookups(self, topology):
+        relationship = topology.find_relationship("my_relationship")
+        assert relationship.get_property(["derived_type", "size"]) == "big"
+        assert relationship.get_property(["my_relationship", "weight"]) == 3
+        assert relationship.get_attribute(["base_type", "colour"]) == "green"
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from opera.error import DataError
+from opera.storage import InstanceJournal, SqliteStorage, Storage
+
+
+class TestInstanceJournal:
+    def test_writes_are_readable_before_compaction(self, tmp_path):
+        storage = Storage(tmp_path / ".opera")
+        storage.write_instance({"state": "creating"}, "node_0")
+        storage.write_instance({"state": "started"}, "node_0")
+
+        assert storage.read_instance("node_0") == {"state": "started"}
+        assert not storage.exists("instances", "node_0")
+
+    def test_replay_after_crash(self, tmp_path):
+        storage = Storage(tmp_path / ".opera")
+        storage.write_instance({"state": "started"}, "node_0")
+        storage.write_instance({"state": "creating"}, "node_1")
+        # simulate a crash in the middle of the last write
+        with open(tmp_path / ".opera" / "instances" / InstanceJournal.NAME, "a", encoding="utf-8") as fd:
+            fd.write('{"id": "node_1", "data": {"sta')
+
+        resumed = Storage(tmp_path / ".opera")
+        assert resumed.read_instances() == {"node_0": {"state": "started"}, "node_1": {"state": "creating"}}
+
+    def test_compaction_writes_snapshots(self, tmp_path):
+        storage = Storage(tmp_path / ".opera")
+        storage.write_instance({"state": "started"}, "node_0")
+        storage.compact()
+
+        assert storage.read_json("instances", "node_0") == {"state": "started"}
+        assert not storage.exists("instances", InstanceJournal.NAME)
+        assert Storage(tmp_path / ".opera").read_instance("node_0") == {"state": "started"}
+
+    def test_compaction_threshold(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(InstanceJournal, "COMPACT_THRESHOLD", 3)
+        storage = Storage(tmp_path / ".opera")
+        for i in range(3):
+            storage.write_instance({"count": i}, "node_0")
+
+        assert json.loads((tmp_path / ".opera" / "instances" / "node_0").read_text()) == {"count": 2}
+        assert not storage.exists("instances", InstanceJournal.NAME)
+
+    def test_remove_instances_drops_journal(self, tmp_path):
+        storage = Storage(tmp_path / ".opera")
+        storage.write_instance({"state": "started"}, "node_0")
+        storage.remove("instances")
+
+        assert storage.read_instances() == {}
+        storage.write_instance({"state": "initial"}, "node_0")
+        assert storage.read_instance("node_0") == {"state": "initial"}
+
+
+class TestSqliteStorage:
+    def test_write_and_read(self, tmp_path):
+        storage = SqliteStorage(tmp_path / ".opera")
+        assert not storage.exists("instances")
+
+        storage.write_instances({
+            "a_0": {"state": {"is_set": True, "data": "started"}},
+            "b_0": {"state": {"is_set": True, "data": "error"}},
+        })
+        storage.write_instance({"state": {"is_set": True, "data": "started"}}, "b_0")
+
+        assert storage.exists("instances")
+        assert storage.read_instance("b_0") == {"state": {"is_set": True, "data": "started"}}
+        assert storage.find_instances("started") == ["a_0", "b_0"]
+        assert set(storage.read_instances()) == {"a_0", "b_0"}
+        with pytest.raises(FileNotFoundError):
+            storage.read_instance("c_0")
+
+        storage.remove("instances")
+        assert not storage.exists("instances")
+        storage.close()
+
+    def test_migrate_json_instances(self, tmp_path):
+        json_storage = Storage(tmp_path / ".opera")
+        json_storage.write_instance({"state": {"is_set": True, "data": "started"}}, "a_0")
+        json_storage.compact()
+        json_storage.write_instance({"state": {"is_set": True, "data": "creating"}}, "b_0")
+
+        storage = SqliteStorage(tmp_path / ".opera")
+        assert storage.read_instances() == {
+            "a_0": {"state": {"is_set": True, "data": "started"}},
+            "b_0": {"state": {"is_set": True, "data": "creating"}},
+        }
+        assert not (tmp_path / ".opera" / "instances").exists()
+        assert (tmp_path / ".opera" / SqliteStorage.MIGRATED / "a_0").exists()
+        storage.close()
+
+    def test_create_selects_backend(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("OPERA_STORAGE_BACKEND", raising=False)
+        assert type(Storage.create(str(tmp_path / "json"))) is Storage
+
+        monkeypatch.setenv("OPERA_STORAGE_BACKEND", "sqlite")
+        storage = Storage.create(str(tmp_path / "sqlite"))
+        assert isinstance(storage, SqliteStorage)
+        storage.write_instance({}, "a_0")
+        storage.close()
+
+        # an existing database is picked up without any configuration
+        monkeypatch.delenv("OPERA_STORAGE_BACKEND")
+        assert isinstance(Storage.create(str(tmp_path / "sqlite")), SqliteStorage)
+
+        monkeypatch.setenv("OPERA_STORAGE_BACKEND", "xml")
+        with pytest.raises(DataError):
+            Storage.create(str(tmp_path / "xml"))
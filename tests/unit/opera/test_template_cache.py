@@ -0,0 +1,153 @@
+import types
+
+import pytest
+
+from opera import template_cache
+from opera.instance.topology import Topology
+from opera.storage import Storage
+from opera.template_cache import parse_service_template
+
+
+class TestTemplateCache:
+    @pytest.fixture
+    def service_template(self, tmp_path, yaml_text):
+        (tmp_path / "types.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            node_types:
+              my_type:
+                derived_from: tosca.nodes.Root
+                properties:
+                  colour:
+                    type: string
+            """
+        ))
+        (tmp_path / "service.yaml").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            imports:
+              - types.yaml
+            topology_template:
+              inputs:
+                colour:
+                  type: string
+              node_templates:
+                my_node:
+                  type: my_type
+                  properties:
+                    colour: { get_input: colour }
+            """
+        ))
+        yield tmp_path / "service.yaml", Storage(tmp_path / ".opera")
+
+    @pytest.fixture
+    def parses(self, monkeypatch):
+        calls = []
+        for name in ("parse", "parse_with_imports"):
+            def counting_parse(*args, parse=getattr(template_cache, name)):
+                calls.append(args)
+                return parse(*args)
+
+            monkeypatch.setattr(template_cache, name, counting_parse)
+        yield calls
+
+    def test_hit_skips_parsing(self, service_template, parses):
+        path, storage = service_template
+        parse_service_template(path, {"colour": "red"}, storage)
+        template, workdir = parse_service_template(path, {"colour": "red"}, storage)
+
+        assert len(parses) == 1
+        assert workdir == path.parent
+        assert Topology.instantiate(template).find_node("my_node").get_property(["SELF", "colour"]) == "red"
+
+    def test_inputs_are_part_of_the_key(self, service_template, parses):
+        path, storage = service_template
+        parse_service_template(path, {"colour": "red"}, storage)
+        parse_service_template(path, {"colour": "blue"}, storage)
+
+        assert len(parses) == 2
+
+    def test_changed_import_invalidates(self, service_template, parses):
+        path, storage = service_template
+        parse_service_template(path, {"colour": "red"}, storage)
+        types = path.parent / "types.yaml"
+        types.write_text(types.read_text() + "\n# changed\n")
+        parse_service_template(path, {"colour": "red"}, storage)
+
+        assert len(parses) == 2
+
+    def test_cache_can_be_disabled(self, service_template, parses, monkeypatch):
+        monkeypatch.setenv("OPERA_TEMPLATE_CACHE", "false")
+        path, storage = service_template
+        parse_service_template(path, {"colour": "red"}, storage)
+        parse_service_template(path, {"colour": "red"}, storage)
+
+        assert len(parses) == 2
+
+    def test_imports_are_tracked_by_the_parser(self, service_template, parses, yaml_text):
+        path, storage = service_template
+        (path.parent / "nested").mkdir()
+        (path.parent / "nested" / "colours.tosca").write_text(yaml_text(
+            # language=yaml
+            """
+            tosca_definitions_version: tosca_simple_yaml_1_3
+            imports:
+              - ../types.yaml
+            """
+        ))
+        path.write_text(path.read_text().replace("- types.yaml", "- nested/colours.tosca"))
+
+        assert template_cache.parse_with_imports(path, {"colour": "red"})[1] == [
+            "nested/colours.tosca", "service.yaml", "types.yaml"
+        ]
+
+        parse_service_template(path, {"colour": "red"}, storage)
+        parse_service_template(path, {"colour": "red"}, storage)
+        colours = path.parent / "nested" / "colours.tosca"
+        colours.write_text(colours.read_text() + "\n# changed\n")
+        parse_service_template(path, {"colour": "red"}, storage)
+
+        assert len(parses) == 3
+
+    def test_imports_outside_of_the_template_directory_are_not_cached(self, service_template, monkeypatch):
+        path, storage = service_template
+        parse_with_imports = template_cache.parse_with_imports
+        # like the files that the parser downloads for TOSCA 2.0 URL imports
+        monkeypatch.setattr(template_cache, "parse_with_imports", lambda *args: (parse_with_imports(*args)[0], None))
+
+        template, _ = parse_service_template(path, {"colour": "red"}, storage)
+        parse_service_template(path, {"colour": "red"}, storage)
+
+        assert Topology.instantiate(template).find_node("my_node").get_property(["SELF", "colour"]) == "red"
+        assert not (storage.path / "cache" / "templates").exists()
+
+    def test_parser_without_the_expected_internals_is_not_cached(self, service_template, parses, monkeypatch):
+        # the parser module itself still needs its internals, only the cache must not see them
+        monkeypatch.setattr(template_cache, "tosca", types.SimpleNamespace())
+        path, storage = service_template
+        template, _ = parse_service_template(path, {"colour": "red"}, storage)
+        parse_service_template(path, {"colour": "red"}, storage)
+
+        assert len(parses) == 2
+        assert Topology.instantiate(template).find_node("my_node").get_property(["SELF", "colour"]) == "red"
+        assert not (storage.path / "cache").exists()
+
+    def test_versions_are_part_of_the_key(self, service_template, parses, monkeypatch):
+        path, storage = service_template
+        parse_service_template(path, {"colour": "red"}, storage)
+        monkeypatch.setattr(template_cache, "_version", lambda package: "upgraded")
+        parse_service_template(path, {"colour": "red"}, storage)
+
+        assert len(parses) == 2
+
+    def test_entries_that_fail_to_unpickle_are_misses(self, service_template, parses):
+        path, storage = service_template
+        parse_service_template(path, {"colour": "red"}, storage)
+        for entry in (storage.path / "cache" / "templates").iterdir():
+            entry.write_bytes(b"\x80\x05garbage")
+        template, _ = parse_service_template(path, {"colour": "red"}, storage)
+
+        assert len(parses) == 2
+        assert Topology.instantiate(template).find_node("my_node").get_property(["SELF", "colour"]) == "red"
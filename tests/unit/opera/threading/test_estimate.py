@@ -0,0 +1,54 @@
+import pytest
+
+from opera.threading.estimate import (
+    Eta, bottom_levels, critical_path, estimate_durations, makespan, update_durations, useful_workers
+)
+
+
+class TestEstimate:
+    # vm -> db -> app and vm -> cache, where app also needs the cache
+    durations = dict(vm=10.0, db=5.0, cache=2.0, app=3.0, docs=4.0)
+    dependencies = dict(db=["vm"], cache=["vm"], app=["db", "cache"])
+
+    def test_critical_path(self):
+        assert critical_path(self.durations, self.dependencies) == (18.0, ["vm", "db", "app"])
+        assert critical_path({}, {}) == (0.0, [])
+
+    @pytest.mark.parametrize("workers,expected", [(1, 24.0), (2, 18.0), (3, 18.0)])
+    def test_makespan(self, workers, expected):
+        assert makespan(self.durations, self.dependencies, workers) == expected
+
+    def test_useful_workers(self):
+        assert useful_workers(self.durations, self.dependencies) == 2
+        assert useful_workers({f"n{i}": 1.0 for i in range(6)}, {}) == 6
+
+    def test_running_nodes_and_done_dependencies(self):
+        # vm and db are done and the cache has been running for a second
+        remaining = dict(cache=2.0, app=3.0, docs=4.0)
+        assert makespan(remaining, self.dependencies, 1, elapsed=dict(cache=1.0)) == 8.0
+        assert makespan(remaining, self.dependencies, 2, elapsed=dict(cache=1.0)) == 4.0
+
+    def test_durations(self):
+        history = update_durations({}, dict(vm=10.0))
+        history = update_durations(history, dict(vm=20.0, db=4.0), smoothing=0.5)
+        assert history == dict(vm=15.0, db=4.0)
+
+        assert estimate_durations(["vm", "db", "app"], history) == (dict(vm=15.0, db=4.0, app=9.5), ["app"])
+
+    def test_eta(self):
+        eta = Eta(self.durations, self.dependencies, 2)
+        assert eta.remaining(["vm"], dict(db=2.0)) == 6.0
+        # estimates are not repeated while nodes complete in quick succession
+        assert eta.remaining(["db"], {}) is None
+
+    def test_bottom_levels(self):
+        assert bottom_levels(self.durations, self.dependencies) == dict(vm=18.0, db=8.0, cache=5.0, app=3.0, docs=4.0)
+
+    def test_priorities_shorten_makespan(self):
+        # cheap leaves that come first in FIFO order delay the long chain with a single worker per chain
+        durations = dict(leaf_0=1.0, leaf_1=1.0, leaf_2=1.0, head=1.0, tail=10.0)
+        dependencies = dict(tail=["head"])
+        priorities = bottom_levels(durations, dependencies)
+
+        assert makespan(durations, dependencies, 2) == 12.0
+        assert makespan(durations, dependencies, 2, priorities=priorities) == 11.0
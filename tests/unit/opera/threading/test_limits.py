@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from opera.error import DataError
+from opera.threading import DependencyScheduler, NodeExecutor
+from opera.threading.limits import ConcurrencyLimits
+
+
+class FakeTemplate:
+    def __init__(self, types):
+        self.types = types
+
+    def is_a(self, typ):
+        return typ in self.types
+
+
+class HostedNode:
+    lock = threading.Lock()
+    running = {}
+    peaks = {}
+
+    def __init__(self, tosca_id, host, types=("tosca.nodes.Root",)):
+        self.tosca_id = tosca_id
+        self.host = host
+        self.template = FakeTemplate(types)
+        self.deployed = False
+
+    def find_host(self):
+        return self.host
+
+    def _count(self, step):
+        with self.lock:
+            for group in (self.host, *self.template.types):
+                HostedNode.running[group] = HostedNode.running.get(group, 0) + step
+                HostedNode.peaks[group] = max(HostedNode.peaks.get(group, 0), HostedNode.running[group])
+
+    def deploy(self, verbose, workdir):
+        self._count(1)
+        time.sleep(0.01)
+        self._count(-1)
+        self.deployed = True
+
+
+class TestConcurrencyLimits:
+    def test_limits_per_host_and_type(self):
+        HostedNode.running, HostedNode.peaks = {}, {}
+        nodes = [HostedNode(f"app_{i}", "10.0.0.1") for i in range(12)]
+        nodes += [HostedNode(f"db_{i}", "10.0.0.2", ("tosca.nodes.Root", "db")) for i in range(6)]
+        nodes += [HostedNode(f"local_{i}", "localhost") for i in range(6)]
+        limits = ConcurrencyLimits(per_host=3, hosts={"localhost": 1}, types={"db": 2})
+        scheduler = DependencyScheduler(nodes, lambda n: n.deployed, lambda n: (), limits=limits)
+
+        with NodeExecutor(8) as executor:
+            scheduler.run(executor, "deploy", False, ".")
+
+        assert all(n.deployed for n in nodes)
+        assert HostedNode.peaks["10.0.0.1"] == 3
+        assert HostedNode.peaks["db"] == 2
+        assert HostedNode.peaks["localhost"] == 1
+        assert HostedNode.peaks["tosca.nodes.Root"] <= 8
+        assert not any(limits.running.values())
+
+    def test_blocked_nodes_keep_their_priority(self):
+        nodes = [HostedNode("a", "vm"), HostedNode("b", "vm"), HostedNode("c", "other")]
+        limits = ConcurrencyLimits(per_host=1)
+        scheduler = DependencyScheduler(nodes, lambda n: n.deployed, lambda n: (),
+                                        priorities=dict(a=3, b=2, c=1), limits=limits)
+
+        assert scheduler.take_ready() == "a"
+        # b waits for the host of a, so c runs in the meantime
+        assert scheduler.take_ready() == "c"
+        assert scheduler.take_ready() is None
+        scheduler.complete("a")
+        assert scheduler.take_ready() == "b"
+
+    def test_load(self, tmp_path):
+        path = tmp_path / "limits.yaml"
+        path.write_text("per_host: 4\nhosts:\n  10.0.0.1: 1\ntypes:\n  tosca.nodes.Database: 2\n", encoding="utf-8")
+
+        limits = ConcurrencyLimits.load(path, per_host=2)
+        assert (limits.per_host, limits.hosts, limits.types) == (2, {"10.0.0.1": 1}, {"tosca.nodes.Database": 2})
+        assert ConcurrencyLimits.load(path).per_host == 4
+
+    @pytest.mark.parametrize("content", ["per_host: 0\n", "types:\n  db: many\n", "workers: 3\n", "[1, 2]\n"])
+    def test_invalid_limits(self, tmp_path, content):
+        path = tmp_path / "limits.yaml"
+        path.write_text(content, encoding="utf-8")
+
+        with pytest.raises(DataError):
+            ConcurrencyLimits.load(path)
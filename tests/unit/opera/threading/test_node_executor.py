@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+from opera.error import AggregatedOperationError, OperaError
+from opera.threading import DependencyScheduler, NodeExecutor
+
+
+class CountingNode:
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def __init__(self, tosca_id):
+        self.tosca_id = tosca_id
+        self.validated = False
+
+    def validate(self, verbose, workdir):
+        with self.lock:
+            CountingNode.running += 1
+            CountingNode.peak = max(CountingNode.peak, CountingNode.running)
+        time.sleep(0.01)
+        with self.lock:
+            CountingNode.running -= 1
+        self.validated = True
+
+
+class TestNodeExecutor:
+    @pytest.mark.parametrize("num_workers", [1, 3, 8])
+    def test_workers_bound_concurrency(self, num_workers):
+        CountingNode.peak = 0
+        nodes = [CountingNode(f"node_{i}") for i in range(30)]
+        scheduler = DependencyScheduler(nodes, lambda n: n.validated, lambda n: ())
+
+        with NodeExecutor(num_workers) as executor:
+            scheduler.run(executor, "validate", False, ".")
+
+        assert all(n.validated for n in nodes)
+        assert 1 <= CountingNode.peak <= num_workers
+
+    def test_slots_are_exhausted(self):
+        with NodeExecutor(2) as executor:
+            assert executor.acquire_slot()
+            assert executor.acquire_slot()
+            assert not executor.acquire_slot()
+
+    def test_invalid_number_of_workers(self):
+        with pytest.raises(ValueError):
+            NodeExecutor(0)
+
+    def test_errors_are_aggregated(self):
+        def fail(verbose, workdir):
+            raise OperaError("boom")
+
+        with NodeExecutor(1) as executor:
+            assert executor.acquire_slot()
+            executor.submit_operation(fail, "failing_0", False, ".")
+            with pytest.raises(AggregatedOperationError) as e:
+                executor.wait_results()
+
+        assert "failing_0" in e.value.inner_exceptions
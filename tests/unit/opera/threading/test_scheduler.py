@@ -0,0 +1,80 @@
+import threading
+
+from opera.threading import DependencyScheduler, NodeExecutor
+
+
+class FakeNode:
+    def __init__(self, tosca_id, log, lock, done=False):
+        self.tosca_id = tosca_id
+        self.requires = []
+        self.done = done
+        self.visits = 0
+        self._log = log
+        self._lock = lock
+
+    def deploy(self, verbose, workdir):
+        with self._lock:
+            assert all(n.done for n in self.requires), f"{self.tosca_id} started before its dependencies"
+            self.visits += 1
+            self.done = True
+            self._log.append(self.tosca_id)
+
+
+def _graph(edges, done=()):
+    log = []
+    lock = threading.Lock()
+    nodes = {}
+    for source, target in edges:
+        for name in (source, target):
+            if name not in nodes:
+                nodes[name] = FakeNode(name, log, lock, name in done)
+        nodes[source].requires.append(nodes[target])
+    return nodes, log
+
+
+class TestDependencyScheduler:
+    def test_dependencies_are_respected(self):
+        nodes, log = _graph([("app", "db"), ("app", "vm"), ("db", "vm"), ("lb", "app")])
+        scheduler = DependencyScheduler(nodes.values(), lambda n: n.done, lambda n: n.requires)
+
+        with NodeExecutor(4) as executor:
+            scheduler.run(executor, "deploy", False, ".")
+
+        assert log == ["vm", "db", "app", "lb"]
+        assert all(n.visits == 1 for n in nodes.values())
+
+    def test_done_nodes_are_skipped(self):
+        nodes, log = _graph([("app", "db"), ("db", "vm")], done=("vm", "db"))
+        scheduler = DependencyScheduler(nodes.values(), lambda n: n.done, lambda n: n.requires)
+
+        with NodeExecutor(2) as executor:
+            scheduler.run(executor, "deploy", False, ".")
+
+        assert log == ["app"]
+
+    def test_wide_graph(self):
+        edges = [(f"leaf_{i}", "root") for i in range(200)] + [("top", f"leaf_{i}") for i in range(200)]
+        nodes, log = _graph(edges)
+        scheduler = DependencyScheduler(nodes.values(), lambda n: n.done, lambda n: n.requires)
+
+        with NodeExecutor(8) as executor:
+            scheduler.run(executor, "deploy", False, ".")
+
+        assert log[0] == "root"
+        assert log[-1] == "top"
+        assert len(log) == 202
+        assert all(n.visits == 1 for n in nodes.values())
+
+    def test_priorities(self):
+        # leaves are ready first, but the head of the chain has the highest priority
+        edges = [("chain_1", "chain_0"), ("chain_2", "chain_1"), ("leaf_0", "root"), ("leaf_1", "root"),
+                 ("chain_0", "root")]
+        nodes, log = _graph(edges)
+        priorities = dict(root=4, leaf_0=1, leaf_1=1, chain_0=3, chain_1=2, chain_2=1)
+        scheduler = DependencyScheduler(nodes.values(), lambda n: n.done, lambda n: n.requires,
+                                        priorities=priorities)
+
+        with NodeExecutor(1) as executor:
+            scheduler.run(executor, "deploy", False, ".")
+
+        assert log == ["root", "chain_0", "chain_1", "leaf_0", "leaf_1", "chain_2"]